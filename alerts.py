@@ -0,0 +1,575 @@
+import json
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from forecast_store import LABELS, METRICS
+from notes_store import connect
+
+SCHEMA_VERSION = 1
+
+# Comparisons a rule over a numeric field can make, and over a text field
+NUMERIC_OPS = {">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal}
+LABEL_OPS = ("==", "!=", "in")
+
+# A rule names its field by column ("pm2_5") or by its path in the forecast
+# JSON ("air_quality.pollutants.pm2_5")
+FIELD_NAMES = {".".join(path): name for name, path in {**METRICS, **LABELS}.items()}
+
+
+class Rule:
+    # One threshold: `field op value` on any of the first `days` days of a
+    # forecast (every day when days is None), for the given cities only, or
+    # for every city when cities is None. A text field's value is a
+    # category, or a list of them for "in".
+    def __init__(self, name, field, op, value, days=None, cities=None):
+        self.name = name
+        self.field = field
+        self.op = op
+        self.value = value
+        self.days = days
+        self.cities = cities
+
+
+def parse_rule(spec):
+    # A Rule from its JSON object; ValueError says what is wrong with it
+    name = spec.get("name")
+    if not isinstance(name, str) or not name:
+        raise ValueError("every rule needs a name")
+    field = spec.get("field")
+    field = FIELD_NAMES.get(field, field)
+    op = spec.get("op")
+    value = spec.get("value")
+    if field in METRICS:
+        if op not in NUMERIC_OPS:
+            raise ValueError(f"{name}: {field} takes one of {', '.join(NUMERIC_OPS)}, not {op!r}")
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{name}: {field} is compared with a number")
+    elif field in LABELS:
+        if op not in LABEL_OPS:
+            raise ValueError(f"{name}: {field} takes one of {', '.join(LABEL_OPS)}, not {op!r}")
+        values = value if op == "in" else [value]
+        if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+            raise ValueError(f"{name}: {field} is compared with {'a list of texts' if op == 'in' else 'a text'}")
+        value = values
+    else:
+        raise ValueError(f"{name}: unknown field {spec.get('field')!r}")
+    days = spec.get("days")
+    if days is not None and (isinstance(days, bool) or not isinstance(days, int) or days < 1):
+        raise ValueError(f"{name}: days must be a whole number of days from today")
+    cities = spec.get("cities")
+    if cities is not None:
+        if not isinstance(cities, list):
+            raise ValueError(f"{name}: cities must be a list of city names")
+        cities = set(cities)
+    return Rule(name, field, op, value, days, cities)
+
+
+def load_rules(path):
+    # The rules of a JSON file {"rules": [...]}; none when it does not exist
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        specs = json.load(f).get("rules", [])
+    rules = [parse_rule(spec) for spec in specs]
+    names = [rule.name for rule in rules]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"rule names must be unique: {', '.join(duplicates)}")
+    return rules
+
+
+def changed_fields(changes):
+    # The columns touched by diff_days() changes, or None when a day was
+    # added or dropped and every field may be affected
+    fields = set()
+    for _, path, _, _ in changes:
+        name = FIELD_NAMES.get(".".join(path))
+        if name is None:
+            if path in ((), ("date",)):
+                return None
+            continue  # e.g. the avatar, which no rule reads
+        fields.add(name)
+    return fields
+
+
+class AlertPairs:
+    # (city, rule name) pairs held as a boolean matrix of hits; row k is rule
+    # rule_ids[k] and column j is cities[positions[j]] (the identity when
+    # None). The hits are only turned into index arrays when the pairs are
+    # first counted or iterated, and the names only looked up as they are
+    # iterated, e.g. by AlertLog, so an evaluation raising many alerts that
+    # nobody reads does not pay for them.
+    def __init__(self, cities, rule_names, hits, rule_ids=None, positions=None):
+        self.cities = cities
+        self.rule_names = rule_names
+        self.hits = hits
+        self.rule_ids = rule_ids
+        self.positions = positions
+        self._indices = None  # (rule indices, city indices)
+
+    def indices(self):
+        if self._indices is None:
+            if self.hits is None:
+                rows = columns = np.zeros(0, dtype=np.intp)
+            else:
+                rows, columns = np.nonzero(self.hits)
+                if self.rule_ids is not None:
+                    rows = self.rule_ids[rows]
+                if self.positions is not None:
+                    columns = self.positions[columns]
+            self._indices = (rows, columns)
+        return self._indices
+
+    def __len__(self):
+        return len(self.indices()[0])
+
+    def __iter__(self):
+        cities, names = self.cities, self.rule_names
+        rules, columns = self.indices()
+        for c, r in zip(columns.tolist(), rules.tolist()):
+            yield cities[c], names[r]
+
+
+class AlertEngine:
+    # Rules compiled into a few vectorized tests. Numeric rules are grouped
+    # by (field, op, days): a group needs one max (or min) per city over the
+    # window, compared with all of the group's thresholds at once. Text rules
+    # are grouped by (field, days) over a per-city table of the categories
+    # present in the window. Each aggregate is computed once per evaluation
+    # and shared by every group that needs it; aggregates are kept days x
+    # cities, so each step runs over all the cities at once, and a window
+    # every city fills is one row of them.
+    #
+    # Which rules fire for which city is kept as a (rules x cities) boolean
+    # matrix, so a whole store is compared with the previous evaluation in
+    # a few array operations. evaluate() covers a store; update() re-evaluates
+    # one city, and only the rules over the fields that changed. Both return
+    # what changed as (raised, cleared) AlertPairs. match() evaluates a store
+    # without touching any state, and apply() then takes its result, so the
+    # log can be brought in line with a match before it is applied. The
+    # engine is not thread-safe; AlertMonitor keeps it on one thread.
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.rule_names = [rule.name for rule in self.rules]
+        self.columns = {}  # city -> its column of state
+        self.cities = []
+        self.state = np.zeros((len(self.rules), 0), dtype=bool)
+        self.sources = {}  # city -> the store it was last evaluated from
+        self._order = None  # (list of cities, their columns as a slice)
+        numeric = {}
+        labels = {}
+        self.restricted = []  # (rule index, cities) of rules for some cities only
+        for i, rule in enumerate(self.rules):
+            if rule.field in METRICS:
+                numeric.setdefault((rule.field, rule.op, rule.days), []).append(i)
+            else:
+                labels.setdefault((rule.field, rule.days), []).append(i)
+            if rule.cities is not None:
+                self.restricted.append((i, rule.cities))
+        # (field, op, days) -> (rule indices, their thresholds as a column)
+        self.numeric = {}
+        for key, ids in numeric.items():
+            thresholds = np.array([self.rules[i].value for i in ids], dtype=np.float64)
+            self.numeric[key] = (np.array(ids), thresholds[:, None])
+        self.labels = {key: ids for key, ids in labels.items()}
+        # (field, kind) -> the windows its rules look at
+        self.windows = {}
+        for field, op, days in self.numeric:
+            self.windows.setdefault((field, "max" if op in (">", ">=") else "min"), set()).add(days)
+        for field, days in self.labels:
+            self.windows.setdefault((field, "seen"), set()).add(days)
+
+    def evaluate(self, store, cities=None, fields=None):
+        # The rules over fields (all when None) for cities of store (all
+        # when None)
+        names = store.cities if cities is None else list(cities)
+        rows = slice(None) if cities is None else np.array([store.city_index[c] for c in names], dtype=np.intp)
+        fired, evaluated = self._match(store, rows, len(names), fields)
+        return self._apply(store, names, fired, evaluated)
+
+    def match(self, store):
+        # (rules x cities) booleans of the rules firing for every city of store
+        return self._match(store, slice(None), len(store.cities), None)[0]
+
+    def apply(self, store, fired):
+        # Takes fired, from match(store), as the state of store's cities
+        return self._apply(store, store.cities, fired, None)
+
+    def pairs(self, cities, fired):
+        # AlertPairs of the hits of a match() over cities
+        return AlertPairs(cities, self.rule_names, fired)
+
+    def update(self, store, city, fields=None):
+        return self.evaluate(store, [city], fields)
+
+    def check(self, store, city):
+        # Evaluates every rule for city unless store is the one it was last
+        # evaluated from, e.g. a forecast shown from the cache at start
+        if self.sources.get(city) is store:
+            return [], []
+        return self.update(store, city)
+
+    def _apply(self, store, names, fired, evaluated):
+        columns = self._columns(names)
+        if evaluated is None:
+            old = self.state[:, columns]
+        else:
+            fired = fired[evaluated]
+            old = self.state[evaluated][:, columns]
+        raised = cleared = AlertPairs(self.cities, self.rule_names, None)
+        # Only the rules that changed for some city are looked at closely
+        changed = np.flatnonzero((fired != old).any(axis=1))
+        if len(changed):
+            if len(changed) == len(fired):
+                # e.g. the first evaluation; no need to copy every row
+                fired_changed, old_changed = fired, old
+            else:
+                fired_changed, old_changed = fired[changed], old[changed]
+            rules = changed if evaluated is None else evaluated[changed]
+            positions = np.arange(self.state.shape[1])[columns]
+            raised = AlertPairs(self.cities, self.rule_names, fired_changed & ~old_changed, rules, positions)
+            cleared = AlertPairs(self.cities, self.rule_names, old_changed & ~fired_changed, rules, positions)
+            if evaluated is None:
+                self.state[:, columns] = fired
+            else:
+                self.state[np.ix_(evaluated, positions)] = fired
+        self.sources.update(dict.fromkeys(names, store))
+        return raised, cleared
+
+    def fired(self, city):
+        # Indices of the rules firing for city
+        column = self.columns.get(city)
+        return [] if column is None else np.flatnonzero(self.state[:, column]).tolist()
+
+    def active(self):
+        # A copy: the pairs are only read out later, after state may change
+        return self.pairs(self.cities, self.state[:, :len(self.cities)].copy())
+
+    def day_alerts(self, store, city):
+        # {date: [rule name, ...]} of the days on which the rules firing for
+        # city hold
+        ids = self.fired(city)
+        if not ids or city not in store.city_index:
+            return {}
+        i = store.city_index[city]
+        n = int(store.lengths[i])
+        days = {}
+        for rule_id in ids:
+            rule = self.rules[rule_id]
+            limit = n if rule.days is None else min(n, rule.days)
+            if rule.field in METRICS:
+                hits = NUMERIC_OPS[rule.op](store.metrics[rule.field][i, :limit], rule.value)
+            else:
+                codes, categories = store.labels[rule.field]
+                wanted = [c for c, category in enumerate(categories) if category in rule.value]
+                hits = np.isin(codes[i, :limit], wanted)
+                if rule.op == "!=":
+                    hits = ~hits
+            for d in np.flatnonzero(hits).tolist():
+                days.setdefault(store.dates[d], []).append(rule.name)
+        return days
+
+    def _columns(self, names):
+        # The state columns of names, as a slice when they are consecutive
+        # (a store evaluated before, in the same order), growing state for
+        # cities not seen yet
+        for city in names:
+            if city not in self.columns:
+                self.columns[city] = len(self.cities)
+                self.cities.append(city)
+        if len(self.cities) > self.state.shape[1]:
+            grown = np.zeros((len(self.rules), max(len(self.cities), 2 * self.state.shape[1])), dtype=bool)
+            grown[:, :self.state.shape[1]] = self.state
+            self.state = grown
+        if self._order is not None and self._order[0] is names:
+            return self._order[1]
+        columns = np.fromiter((self.columns[city] for city in names), dtype=np.intp, count=len(names))
+        first = columns[0] if len(names) else 0
+        if np.array_equal(columns, np.arange(first, first + len(names))):
+            columns = slice(first, first + len(names))
+            # A store's city list is evaluated over and over; remember its columns
+            self._order = (names, columns)
+        return columns
+
+    def _match(self, store, rows, count, fields):
+        # (rules x cities) booleans of the rules that fire for store's rows,
+        # and the indices of the rules evaluated (None for all of them)
+        fired = np.zeros((len(self.rules), count), dtype=bool)
+        evaluated = []
+        if not count or not store.max_days:
+            return fired, None if fields is None else np.array(evaluated, dtype=np.intp)
+        lengths = store.lengths[rows]
+        shortest = int(lengths.min())
+        last_days = {}  # days -> each city's last day in the window, -1 for none
+        windowed = {}  # (field, kind, days) -> max, min or categories seen over the window, per city
+
+        def last_day(days):
+            # (last day clipped to 0, cities without any day or None); the
+            # last day is one number when every city has the whole window
+            last = last_days.get(days)
+            if last is None:
+                window = store.max_days if days is None else min(days, store.max_days)
+                if shortest >= window:
+                    last = last_days[days] = (window - 1, None)
+                    return last
+                last = (lengths if days is None else np.minimum(lengths, days)) - 1
+                empty = last < 0
+                last = last_days[days] = (np.maximum(last, 0), empty if empty.any() else None)
+            return last
+
+        def over_window(field, kind, days):
+            # Every window of field that a rule looks at, in one pass over
+            # the days: a running max, min or set of categories seen is
+            # taken one whole day (all the cities) at a time, and kept for
+            # each city on the last day of its window
+            values = windowed.get((field, kind, days))
+            if values is not None:
+                return values
+            if kind == "seen":
+                codes = store.labels[field][0][rows]
+                # Bit c: category c occurs on the day
+                day = lambda d: np.left_shift(np.uint64(1), codes[:, d].astype(np.uint64))
+                ufunc, empty = np.bitwise_or, np.uint64(0)
+            else:
+                columns = store.metrics[field][rows]
+                day = lambda d: columns[:, d]
+                ufunc, empty = (np.maximum, -np.inf) if kind == "max" else (np.minimum, np.inf)
+            windows = {window: last_day(window) for window in self.windows[(field, kind)]}
+            ends = {}  # day -> the windows every city ends on that day
+            uneven = []  # (window, each city's last day) of the others
+            for window, (last, _) in windows.items():
+                if isinstance(last, int):
+                    ends.setdefault(last, []).append(window)
+                else:
+                    uneven.append((window, last))
+            stop = max([*ends, *(int(last.max()) for _, last in uneven)])
+            current = day(0).copy()
+            found = {window: np.empty_like(current) for window, _ in uneven}
+            for d in range(stop + 1):
+                if d:
+                    ufunc(current, day(d), out=current)
+                for window in ends.get(d, ()):
+                    found[window] = current.copy()
+                for window, last in uneven:
+                    np.copyto(found[window], current, where=last == d)
+            for window, (_, no_days) in windows.items():
+                values = found[window]
+                if no_days is not None:
+                    values = np.where(no_days, empty, values)
+                windowed[(field, kind, window)] = values
+            return windowed[(field, kind, days)]
+
+        for (field, op, days), (ids, thresholds) in self.numeric.items():
+            if fields is not None and field not in fields:
+                continue
+            if op in (">", ">="):
+                values = over_window(field, "max", days)
+            else:
+                values = over_window(field, "min", days)
+            fired[ids] = NUMERIC_OPS[op](values, thresholds)
+            evaluated.extend(ids.tolist())
+
+        for (field, days), ids in self.labels.items():
+            if fields is not None and field not in fields:
+                continue
+            categories = store.labels[field][1]
+            index = {category: c for c, category in enumerate(categories)}
+            if len(categories) <= 64:
+                # Bit c of seen: category c occurs on some day in the window
+                seen = over_window(field, "seen", days)
+            for rule_id in ids:
+                rule = self.rules[rule_id]
+                wanted = [index[v] for v in rule.value if v in index]
+                if rule.op == "!=":
+                    wanted = [c for c in range(len(categories)) if c not in wanted]
+                if len(categories) <= 64:
+                    bits = np.uint64(sum(1 << c for c in wanted))
+                    fired[rule_id] = (seen & bits) != 0
+                else:
+                    codes = store.labels[field][0][rows]
+                    last, no_days = last_day(days)
+                    window = np.arange(store.max_days)[None, :] <= np.reshape(last, (-1, 1))
+                    if no_days is not None:
+                        window &= ~no_days[:, None]
+                    fired[rule_id] = (np.isin(codes, wanted) & window).any(axis=1)
+            evaluated.extend(ids)
+
+        names = None
+        for rule_id, cities in self.restricted:
+            if fields is None or self.rules[rule_id].field in fields:
+                if names is None:
+                    names = store.cities if isinstance(rows, slice) else [store.cities[r] for r in rows.tolist()]
+                fired[rule_id] &= np.fromiter((name in cities for name in names), dtype=bool, count=count)
+        return fired, None if fields is None else np.array(sorted(evaluated), dtype=np.intp)
+
+
+# --- History ---
+def migrate(conn):
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version < 1:
+        with conn:
+            # An alert is open until cleared_at is set
+            conn.execute('''CREATE TABLE IF NOT EXISTS alerts (
+                id INTEGER PRIMARY KEY,
+                city TEXT NOT NULL,
+                rule TEXT NOT NULL,
+                raised_at TEXT NOT NULL,
+                cleared_at TEXT
+            )''')
+            conn.execute('CREATE INDEX IF NOT EXISTS alerts_open ON alerts (city, rule) WHERE cleared_at IS NULL')
+            conn.execute('CREATE INDEX IF NOT EXISTS alerts_city ON alerts (city, id)')
+            conn.execute('PRAGMA user_version=1')
+
+
+class AlertLog:
+    # Every alert raised, with when it was raised and cleared, in SQLite.
+    def __init__(self, path):
+        self.path = path
+        self.conn = connect(path)
+        migrate(self.conn)
+
+    def open_alerts(self):
+        return set(self.conn.execute('SELECT city, rule FROM alerts WHERE cleared_at IS NULL'))
+
+    def record(self, raised, cleared):
+        if not raised and not cleared:
+            return
+        now = datetime.now().isoformat(timespec='seconds')
+        with self.conn:
+            self.conn.executemany('INSERT INTO alerts (city, rule, raised_at) VALUES (?, ?, ?)',
+                                  [(city, rule, now) for city, rule in raised])
+            self.conn.executemany('UPDATE alerts SET cleared_at=? WHERE city=? AND rule=? AND cleared_at IS NULL',
+                                  [(now, city, rule) for city, rule in cleared])
+
+    def sync(self, active):
+        # Raises and clears alerts so the open ones are exactly active, a set
+        # of (city, rule name); e.g. at start, against the last run's
+        active = set(active)
+        open_alerts = self.open_alerts()
+        self.record(sorted(active - open_alerts), sorted(open_alerts - active))
+
+    def history(self, city=None, limit=100):
+        # (city, rule, raised_at, cleared_at) rows, newest first
+        if city is None:
+            rows = self.conn.execute('''SELECT city, rule, raised_at, cleared_at FROM alerts
+                                        ORDER BY id DESC LIMIT ?''', (limit,))
+        else:
+            rows = self.conn.execute('''SELECT city, rule, raised_at, cleared_at FROM alerts
+                                        WHERE city=? ORDER BY id DESC LIMIT ?''', (city, limit))
+        return rows.fetchall()
+
+    def close(self):
+        self.conn.close()
+
+
+# --- Worker ---
+class AlertMonitor:
+    # An AlertEngine and its AlertLog kept on one worker thread, so neither
+    # evaluating the rules nor the SQLite write behind it runs on the Tk
+    # loop. start(store) evaluates every city of store and brings the log
+    # in line with the result; update() re-evaluates a city whose forecast
+    # changed. Jobs run in the order they were given. Each city's
+    # {date: [rule name, ...]} comes back through root.after into days,
+    # which is all a render reads, and on_change(city) is then called (with
+    # None once start() is done).
+    def __init__(self, rules, log_path, root, on_change=None, poll_interval=50):
+        self.engine = AlertEngine(rules)
+        self.log_path = log_path
+        self.root = root
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="alerts")
+        self.ready = not self.engine.rules
+        self.days = {}  # city -> {date: [rule name, ...]}
+        self.sources = {}  # city -> the store last sent to the worker
+        self.results = queue.Queue()
+        self.outstanding = 0
+        self._log = None  # the worker's connection
+        self._polling = False
+
+    def start(self, store):
+        if self.engine.rules:
+            self._submit(self._start, store)
+
+    def update(self, store, city, fields=None):
+        # After city's forecast changed to store; fields as changed_fields()
+        if self.engine.rules:
+            self.sources[city] = store
+            self._submit(self._update, store, city, fields)
+
+    def day_alerts(self, store, city):
+        # {date: [rule name, ...]} for the cards. A store not sent to the
+        # worker yet, e.g. a forecast shown from the cache at start, is
+        # queued here; its alerts show once the worker is done with it.
+        if not self.ready:
+            return {}
+        if self.sources.get(city) is not store:
+            self.sources[city] = store
+            self._submit(self._check, store, city)
+        return self.days.get(city, {})
+
+    def close(self):
+        # Lets the queued jobs finish, so what they raise is logged
+        self.executor.submit(self._close)
+        self.executor.shutdown(wait=True)
+
+    # --- Worker side ---
+    def _connection(self):
+        if self._log is None:
+            self._log = AlertLog(self.log_path)
+        return self._log
+
+    def _start(self, store):
+        fired = self.engine.match(store)
+        self._connection().sync(self.engine.pairs(store.cities, fired))
+        self.engine.apply(store, fired)
+        return None, None
+
+    def _update(self, store, city, fields):
+        self._connection().record(*self.engine.update(store, city, fields))
+        return city, self.engine.day_alerts(store, city)
+
+    def _check(self, store, city):
+        # Every rule for city unless store is the one it was evaluated from
+        self._connection().record(*self.engine.check(store, city))
+        return city, self.engine.day_alerts(store, city)
+
+    def _close(self):
+        if self._log is not None:
+            self._log.close()
+
+    # --- Main-thread side ---
+    def _submit(self, job, *args):
+        self.outstanding += 1
+        future = self.executor.submit(job, *args)
+        future.add_done_callback(lambda f: self.results.put((job, f)))
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        while True:
+            try:
+                job, future = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.outstanding -= 1
+            try:
+                city, days = future.result()
+            except Exception as e:
+                print(f"Could not evaluate alerts: {e}")
+                continue
+            if job == self._start:
+                self.ready = True
+            else:
+                self.days[city] = days
+            if self.on_change is not None:
+                self.on_change(city)
+        if self.outstanding:
+            self.root.after(self.poll_interval, self._poll)
+        else:
+            self._polling = False
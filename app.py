@@ -0,0 +1,865 @@
+import tkinter as tk
+from tkinter import messagebox, simpledialog, ttk
+import threading
+from geopy.point import Point
+from alerts import AlertMonitor, changed_fields, load_rules
+from card_renderer import CardRenderer
+from city_index import CityIndex
+from city_picker import CityPicker
+from dashboard import DashboardView, SparklineCache
+from detail_windows import DetailWindowPool
+from forecast_cache import CachedForecasts, ForecastCache
+from forecast_provider import FileForecastProvider, ForecastService, HttpForecastProvider
+from forecast_snapshot import load_forecast
+from forecast_store import AVATARS
+from forecast_watcher import ForecastReloader
+from formatters import DisplayFormatter
+from gradients import GradientCache
+from hourly_charts import MAX_FORECAST_DAYS, HourlyPanel, HourlyStore
+from image_service import ImageService
+from loop_profiler import LoopProfiler, ProfilerOverlay
+from news_feed import NewsFeed, NewsView
+from notes_store import NotesStore
+from render_scheduler import RenderScheduler
+from theming import ThemeEngine, dark_theme, light_theme
+
+class WeatherApp:
+    # The built app: its root window, its stores and services, and the UI
+    # paths as plain functions, so each can be driven and timed on its own
+    # (see benchmarks/suite.py). run() enters the main loop and closes
+    # everything once the window is gone.
+    def __init__(self, root, **parts):
+        self.root = root
+        for name, part in parts.items():
+            setattr(self, name, part)
+
+    def run(self):
+        self.root.mainloop()
+        self.close()
+
+    def close(self):
+        # Each part is shut down even when an earlier one fails; the first
+        # error is raised once they all have run. Notes still queued for the
+        # writer thread are committed, but their callbacks would update a
+        # window that is gone, so they are dropped.
+        steps = [lambda: self.notes_store.close(deliver=False),
+                 self.image_service.shutdown,
+                 self.sparklines.shutdown,
+                 self.forecast_service.shutdown]
+        if self.forecast_reloader is not None:
+            steps.append(self.forecast_reloader.stop)
+        steps += [self.forecast_cache.close, self.alert_monitor.close]
+        if self.profiler is not None:
+            if self.trace_path:
+                steps.append(lambda: self.profiler.export_trace(self.trace_path))
+            steps.append(self.profiler.uninstall)
+        error = None
+        for step in steps:
+            try:
+                step()
+            except Exception as e:
+                if error is None:
+                    error = e
+                else:
+                    print(f"Error while closing: {e}")
+        if error is not None:
+            raise error
+
+
+def create_app(root=None, forecast_path='forcast_data.json', news_path='news_data.json',
+               notes_path='weather_notes.db', cache_path='forecast_cache.db', gazetteer_path='cities.csv',
+               cities=None, api_url=None, watch=True, profile=False, trace_path=None, units='metric',
+               alert_rules_path='alert_rules.json', alert_log_path='alert_log.db', hourly_path='hourly_data.json'):
+    # Builds the app on root (a new Tk window by default) without entering
+    # the main loop. The data files are parameters so benchmarks can point
+    # the app at synthetic data; api_url selects the HTTP provider, and
+    # watch=False leaves forcast_data.json unwatched. profile=True times
+    # every Tk callback (see loop_profiler.py); with a trace_path the trace
+    # is written there when the app closes. units is the unit system shown
+    # first, "metric" or "imperial". Alert rules are read from
+    # alert_rules_path and fired alerts logged to alert_log_path. Hourly
+    # series for the charts are read from hourly_path.
+    cities = list(cities) if cities else None
+
+    # The news view is built the first time it is shown and kept, cards and
+    # all, between visits; the feed is only re-read when the file changed
+    news_feed = NewsFeed(news_path)
+    news_view = None
+
+    def show_news_view():
+        nonlocal _today_frame, news_view
+        # Destroy the Today view if it exists
+        if _today_frame is not None:
+            _today_frame.destroy()
+            _today_frame = None
+        main_frame.pack_forget()
+        cards_frame.pack_forget()
+        hide_dashboard()
+        if news_view is None:
+            news_view = NewsView(root, news_feed, scheduler, theme_engine, on_back=show_upcoming_days,
+                                 resize_delay=resize_delay)
+        news_view.show()
+        return news_view
+
+    def hide_news_view():
+        if news_view is not None:
+            news_view.hide()
+
+    # The dashboard of every city is kept the same way; its sparklines are
+    # drawn off the main thread and cached across visits
+    dashboard = None
+
+    def show_dashboard():
+        nonlocal _today_frame, dashboard
+        if _today_frame is not None:
+            _today_frame.destroy()
+            _today_frame = None
+        main_frame.pack_forget()
+        cards_frame.pack_forget()
+        hide_news_view()
+        if dashboard is None:
+            dashboard = DashboardView(root, cities, forecasts.store, lambda: formatter.units, sparklines,
+                                      scheduler, theme_engine, on_open=open_city, on_back=show_upcoming_days,
+                                      resize_delay=resize_delay)
+        dashboard.show()
+        return dashboard
+
+    def hide_dashboard():
+        if dashboard is not None:
+            dashboard.hide()
+
+    def refresh_dashboard():
+        if dashboard is not None and dashboard.shown:
+            dashboard.invalidate()
+
+    def open_city(city):
+        selected_city.set(city)
+        show_upcoming_days()
+
+    # Create the main window
+    if root is None:
+        root = tk.Tk()
+
+    # Installed before any widget exists, so every callback is timed
+    profiler = LoopProfiler(root).install() if profile else None
+
+    # Set window title
+    root.title("Weather's by Mohammad Khalilzadeh")
+
+    # Set window size to 600x400
+    root.geometry("600x400")
+
+    # Cards, notes, news and theme are redrawn by marking them dirty here; all
+    # invalidations made while handling one event are rendered in one idle pass
+    scheduler = RenderScheduler(root)
+    scheduler.profiler = profiler
+    # Resizes render this many ms after the last <Configure> of a drag
+    resize_delay = 150
+
+    # Widgets register under a semantic role and are coloured as they are
+    # created; switching themes only touches the registered widgets
+    current_theme = light_theme
+    theme_engine = ThemeEngine(root, current_theme)
+    theme_engine.register(root, "window")
+
+    def load_forecast_with_progress(path):
+        # The forecast loads on a worker thread while the Tk loop keeps running.
+        # A progress bar is only shown if the snapshot has to be rebuilt, which
+        # streams the JSON one city at a time.
+        state = {"progress": None, "store": None, "error": None}
+        done = tk.BooleanVar(value=False)
+        splash = tk.Frame(root)
+        status = tk.Label(splash, text="Loading forecasts...", font=("Arial", 12))
+        status.pack(pady=(40, 10))
+        bar = ttk.Progressbar(splash, mode="determinate", maximum=100, length=300)
+        bar.pack()
+
+        def on_progress(done_bytes, total_bytes, cities):
+            state["progress"] = (done_bytes, total_bytes, cities)
+
+        def work():
+            try:
+                state["store"] = load_forecast(path, progress=on_progress)
+            except Exception as e:
+                state["error"] = e
+
+        def poll():
+            if state["progress"] is not None:
+                done_bytes, total_bytes, cities = state["progress"]
+                if not splash.winfo_ismapped():
+                    splash.pack(fill=tk.BOTH, expand=True)
+                bar["value"] = 100 * done_bytes / max(total_bytes, 1)
+                status.config(text=f"Loading forecasts... {cities} cities")
+            if worker.is_alive():
+                root.after(50, poll)
+            else:
+                done.set(True)
+
+        worker = threading.Thread(target=work, name="forecast-loader", daemon=True)
+        worker.start()
+        root.after(50, poll)
+        root.wait_variable(done)
+        splash.destroy()
+        if state["error"] is not None:
+            raise state["error"]
+        return state["store"]
+
+    # Load forecast data into the columnar store; dates start from today and
+    # avatars are classified for every city in one pass. Later launches open the
+    # memory-mapped snapshot instead of parsing the JSON again.
+    forecast_store = load_forecast_with_progress(forecast_path)
+    # Every city in the forecast can be picked unless create_app() was given a list
+    if cities is None:
+        cities = list(forecast_store.cities)
+
+    # Refreshes run on a small thread pool. With an api_url they come
+    # from that HTTP API (forecast_stub_server.py serves one locally), otherwise
+    # forcast_data.json is read again.
+    if api_url:
+        forecast_provider = HttpForecastProvider(api_url)
+    else:
+        forecast_provider = FileForecastProvider(forecast_path)
+    forecast_service = ForecastService(forecast_provider, root=root)
+
+    # Fetched forecasts are cached next to weather_notes.db. A city is shown from
+    # the cache straight away, even when stale, and revalidated in the
+    # background; cities never fetched fall back to the bundled forecast_store.
+    forecast_cache = ForecastCache(cache_path)
+
+    def on_forecast_change(city, changes):
+        # Only labels whose text changed are reconfigured by the cards
+        if city == selected_city.get():
+            scheduler.invalidate("cards")
+            if _today_frame is not None:
+                show_today_view()
+        update_detail_windows(city, changes)
+        refresh_dashboard()
+        store = forecasts.store(city)
+        if store is not None:
+            alert_monitor.update(store, city, changed_fields(changes))
+
+    forecasts = CachedForecasts(forecast_cache, forecast_service, forecast_store, on_change=on_forecast_change)
+
+    # Every displayed forecast string comes from here, formatted once per
+    # city, unit system and forecast; renders only look strings up
+    formatter = DisplayFormatter(units)
+
+    def city_texts(city):
+        store = forecasts.store(city)
+        return formatter.texts(city, store) if store is not None else None
+
+    # Threshold alerts from alert_rules.json, evaluated on a worker thread
+    # that also owns the alert log. Every city is evaluated once at start,
+    # which brings the log in line with the result; the cards show alerts
+    # once that is done. Afterwards a changed forecast only re-evaluates the
+    # rules over the fields that changed. Raised and cleared alerts are
+    # logged.
+    try:
+        alert_rules = load_rules(alert_rules_path)
+    except (OSError, ValueError) as e:
+        print(f"Could not load alert rules from {alert_rules_path}: {e}")
+        alert_rules = []
+
+    def on_alerts_change(city):
+        if city is None or city == selected_city.get():
+            scheduler.invalidate("cards")
+
+    alert_monitor = AlertMonitor(alert_rules, alert_log_path, root, on_change=on_alerts_change)
+    alert_monitor.start(forecast_store)
+
+    def city_alerts(city):
+        # {date: [alert names]} for the cards, or None without any rules
+        if not alert_monitor.engine.rules:
+            return None
+        store = forecasts.store(city)
+        return alert_monitor.day_alerts(store, city) if store is not None else {}
+
+    def refresh_forecasts():
+        forecasts.refresh_all(cities, on_forecasts_refreshed)
+
+    # The gazetteer is only loaded the first time a city is picked by its
+    # coordinates, and narrowed to the cities that have a forecast
+    forecast_city_index = None
+
+    def nearest_forecast_city(lat, lon):
+        nonlocal forecast_city_index
+        if forecast_city_index is None:
+            forecast_city_index = CityIndex.load(gazetteer_path).subset(cities)
+        return forecast_city_index.nearest(lat, lon)
+
+    def pick_city_by_coordinates():
+        text = simpledialog.askstring("Nearest City", "Coordinates (e.g. 35.7, 51.4):", parent=root)
+        if not text:
+            return
+        try:
+            point = Point(text)
+        except ValueError:
+            messagebox.showerror("Nearest City", f"Could not read coordinates: {text}", parent=root)
+            return
+        found = nearest_forecast_city(point.latitude, point.longitude)
+        if found is None:
+            messagebox.showerror("Nearest City", "No forecast city has known coordinates", parent=root)
+            return
+        selected_city.set(found[1]["name"])
+
+    def on_forecasts_refreshed(forecast_data, errors):
+        for error in errors.values():
+            print(f"Could not refresh forecast: {error}")
+
+    # Without an API, forcast_data.json is watched and the cities that changed in
+    # it are pushed through the cache like any other fetch; cities deleted from
+    # it are dropped, which clears their cards and closes their detail windows
+    def on_forecast_file_change(changed, removed):
+        for city, city_data in changed.items():
+            forecasts.put(city, city_data)
+        for city in removed:
+            forecasts.remove(city)
+
+    forecast_reloader = None
+    if watch and not api_url:
+        forecast_reloader = ForecastReloader(root, forecast_path, on_forecast_file_change).start()
+
+    # Create main frame with scrollbar
+    main_frame = theme_engine.register(tk.Frame(root), "window")
+    main_frame.pack(fill=tk.BOTH, expand=True)
+
+    # Create canvas and scrollbar
+    canvas = theme_engine.register(tk.Canvas(main_frame), "canvas")
+    scrollbar = theme_engine.register(tk.Scrollbar(main_frame, orient="vertical", command=canvas.yview), "scrollbar")
+    scrollable_frame = theme_engine.register(tk.Frame(canvas), "window")
+
+    # Configure canvas
+    # The card grid sizes itself from its row heights, so the frame's own size is
+    # the scrollregion; no need to measure every canvas item with bbox("all")
+    scrollable_frame.bind(
+        "<Configure>",
+        lambda e: canvas.configure(scrollregion=(0, 0, e.width, e.height))
+    )
+    canvas.create_window((0, 0), window=scrollable_frame, anchor="nw", width=canvas.winfo_width())
+    canvas.configure(yscrollcommand=scrollbar.set)
+
+    # Pack scrollbar and canvas
+    scrollbar.pack(side="right", fill="y")
+    canvas.pack(side="left", fill="both", expand=True)
+
+    # Bind canvas resize to update scrollable frame width
+    def on_canvas_resize(event):
+        canvas.itemconfig(canvas.find_withtag("all")[0], width=event.width)
+    canvas.bind("<Configure>", on_canvas_resize)
+
+    # Create menu bar
+    menubar = tk.Menu(root)
+    root.config(menu=menubar)
+
+    # Create Controls menu
+    controls_menu = tk.Menu(menubar, tearoff=0)
+    menubar.add_cascade(label="Controls", menu=controls_menu)
+
+    # Add theme submenu
+    theme_menu = tk.Menu(controls_menu, tearoff=0)
+    controls_menu.add_cascade(label="Theme", menu=theme_menu)
+
+    def apply_theme(theme):
+        nonlocal current_theme
+        current_theme = theme
+        scheduler.invalidate("theme")
+
+    def render_theme():
+        theme_engine.set_theme(current_theme)
+
+    def set_light_theme():
+        apply_theme(light_theme)
+    def set_dark_theme():
+        apply_theme(dark_theme)
+
+    theme_menu.add_command(label="Light", command=set_light_theme)
+    theme_menu.add_command(label="Dark", command=set_dark_theme)
+
+    # Add units submenu
+    units_menu = tk.Menu(controls_menu, tearoff=0)
+    controls_menu.add_cascade(label="Units", menu=units_menu)
+    units_var = tk.StringVar(value=formatter.units)
+
+    def set_units(units):
+        # Converts every shown value at once; strings of a unit system
+        # already used are reused as they are
+        formatter.set_units(units)
+        units_var.set(units)
+        scheduler.invalidate("cards")
+        detail_pool.relabel_all()
+        refresh_dashboard()
+        if _today_frame is not None:
+            show_today_view()
+
+    units_menu.add_radiobutton(label="Metric", variable=units_var, value="metric",
+                               command=lambda: set_units("metric"))
+    units_menu.add_radiobutton(label="Imperial", variable=units_var, value="imperial",
+                               command=lambda: set_units("imperial"))
+
+    controls_menu.add_command(label="Refresh Forecasts", command=refresh_forecasts)
+    controls_menu.add_command(label="Nearest City...", command=pick_city_by_coordinates)
+    if profiler is not None:
+        controls_menu.add_command(label="Loop Profiler...", command=lambda: ProfilerOverlay(profiler))
+
+    # Create Sections menu
+    sections_menu = tk.Menu(menubar, tearoff=0)
+    menubar.add_cascade(label="Sections", menu=sections_menu)
+    sections_menu.add_command(label="Today", command=lambda: show_today_view())
+    sections_menu.add_command(label="Upcoming days", command=lambda: show_upcoming_days())
+    sections_menu.add_command(label="Dashboard", command=lambda: show_dashboard())
+    sections_menu.add_command(label="News", command=lambda: show_news_view())
+
+    # Create a container frame for side-by-side layout
+    container_frame = theme_engine.register(tk.Frame(scrollable_frame), "window")
+    container_frame.pack(padx=20, pady=20, fill="x", expand=False)
+
+    # Create a frame for city selection
+    city_frame = theme_engine.register(tk.LabelFrame(container_frame, text="Select City", padx=10, pady=10), "group")
+    city_frame.pack(side="left", padx=(0, 10), fill="y", expand=False)
+
+    # Variable to store the selected city
+    selected_city = tk.StringVar(value="Tehran" if "Tehran" in cities else cities[0])  # Default selection
+
+    # Type-ahead search over every city, recently picked cities first
+    city_picker = CityPicker(city_frame, selected_city, cities, theme_engine)
+    city_picker.pack(anchor="w", fill="x")
+
+    # Create a frame for weather parameters
+    weather_frame = theme_engine.register(tk.LabelFrame(container_frame, text="Weather Parameters", padx=10, pady=10),
+                                          "group")
+    weather_frame.pack(side="left", fill="both", expand=True)
+
+    # Dictionary to store checkbox variables
+    weather_vars = {}
+
+    # Create checkboxes for each weather parameter
+    weather_params = [
+        "Temperature",
+        "Atmospheric Pressure",
+        "Humidity",
+        "Precipitation",
+        "Wind",
+        "Cloud Cover",
+        "UV Index",
+        "Air Quality Index (AQI)"
+    ]
+
+    # Create two columns for checkboxes
+    left_column = theme_engine.register(tk.Frame(weather_frame), "surface")
+    left_column.pack(side="left", fill="both", expand=True)
+    right_column = theme_engine.register(tk.Frame(weather_frame), "surface")
+    right_column.pack(side="left", fill="both", expand=True)
+
+    # Distribute checkboxes between columns
+    def on_param_change():
+        scheduler.invalidate("cards")
+
+    for i, param in enumerate(weather_params):
+        weather_vars[param] = tk.BooleanVar(value=True)
+        column = left_column if i < len(weather_params) // 2 else right_column
+        theme_engine.register(tk.Checkbutton(
+            column,
+            text=param,
+            variable=weather_vars[param],
+            padx=10,
+            pady=5,
+            command=on_param_change
+        ), "choice").pack(anchor="w")
+
+    # --- Cards Section ---
+    cards_frame = theme_engine.register(tk.Frame(scrollable_frame), "window")
+    cards_frame.pack(fill="x", padx=20, pady=(0, 20))
+
+    # Create a frame for the grid layout
+    grid_frame = theme_engine.register(tk.Frame(cards_frame), "window")
+    grid_frame.pack(fill="x", expand=False)
+
+    # Avatars are decoded and resized off the main thread; see image_service.py
+    image_service = ImageService(root)
+    image_service.prefetch(AVATARS)
+    sparklines = SparklineCache(root)
+
+    # Rendered Today-view gradients, keyed by (weather type, width, height)
+    gradient_cache = GradientCache(max_entries=8)
+
+    def get_avatar_image(filename, variant="card", on_ready=None):
+        return image_service.get(filename, variant, on_ready)
+
+    def set_avatar(label, filename, variant="card"):
+        # Show the avatar now if it is in memory, otherwise once it has loaded.
+        # The label keeps a reference so cache eviction cannot blank it.
+        def show(img):
+            if img and label.winfo_exists():
+                label.configure(image=img)
+                label.image = img
+        show(get_avatar_image(filename, variant, on_ready=show))
+
+    def set_detail_avatar(label, filename):
+        set_avatar(label, filename, "detail")
+
+    def detail_texts(city, day_data):
+        return city_texts(city).detail(day_data)
+
+    # Hourly series are read when a chart is first shown and again whenever
+    # hourly_data.json changed; each series is downsampled to the chart's width
+    hourly_store = HourlyStore(hourly_path)
+
+    # "See More Details" windows are built once and relabelled when reused;
+    # at most four are open at a time
+    detail_pool = DetailWindowPool(root, detail_texts, set_detail_avatar, theme_engine, max_open=4,
+                                   hourly=hourly_store, get_units=lambda: formatter.units)
+
+    def show_detailed_view(city, day_data):
+        detail_pool.show(city, day_data)
+
+    def update_detail_windows(city, changes):
+        # Reconfigure only the labels of open detail windows whose field changed
+        detail_pool.update(city, forecasts.days(city), changes)
+
+    card_renderer = CardRenderer(grid_frame, canvas, on_details=show_detailed_view,
+                                 get_image=get_avatar_image, scrollbar=scrollbar, theme=theme_engine)
+
+    def update_cards():
+        city = selected_city.get()
+        params = [p for p in weather_params if weather_vars[p].get()]
+        days = forecasts.days(city)[:forecast_days_var.get()]
+        texts = city_texts(city) if days else None
+
+        # Calculate number of columns based on window width
+        # Each card will be approximately 300 pixels wide
+        window_width = root.winfo_width() - 40  # Account for padding
+        num_columns = min(3, max(1, window_width // 300))
+
+        # Only the visible cards, and within them the labels that changed, are touched
+        card_renderer.render(city, days, params, num_columns, texts, city_alerts(city))
+
+    scheduler.register("cards", update_cards)
+
+    # Add window resize handler to update card layout
+    def on_window_resize(event):
+        # <Configure> on root also fires for every child; only the window's own
+        # width changes the column count. The cards render once the drag settles.
+        if event.widget is root and event.width != getattr(root, '_last_width', None):
+            root._last_width = event.width
+            scheduler.invalidate_later(resize_delay, "cards")
+
+    root.bind("<Configure>", on_window_resize)
+
+    # --- Spinbox for forecast days ---
+    spinbox_frame = theme_engine.register(tk.Frame(scrollable_frame), "window")
+    spinbox_frame.pack(fill="x", padx=20, pady=(0, 10))
+    theme_engine.register(tk.Label(spinbox_frame, text="Forecast Days:"), "label").pack(side="left")
+    forecast_days_var = tk.IntVar(value=7)
+    forecast_spinbox = theme_engine.register(tk.Spinbox(spinbox_frame, from_=1, to=MAX_FORECAST_DAYS, width=3,
+                                                        textvariable=forecast_days_var), "input")
+    forecast_spinbox.pack(side="left", padx=(5, 0))
+
+    def update_cards_with_days():
+        scheduler.invalidate("cards")
+    forecast_spinbox.config(command=update_cards_with_days)
+
+    # Initial population of cards
+    scheduler.invalidate("cards")
+
+    # The Today view's frame while it is shown
+    _today_frame = None
+
+    def show_upcoming_days():
+        nonlocal _today_frame
+        # Destroy today_frame if it exists
+        if _today_frame is not None:
+            _today_frame.destroy()
+            _today_frame = None
+        hide_news_view()
+        hide_dashboard()
+        # Show the main window with all cards
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        cards_frame.pack(fill="x", padx=20, pady=(0, 20))
+        scheduler.invalidate("cards")
+
+    def show_today_view():
+        nonlocal _today_frame
+        # Hide the main window with cards
+        main_frame.pack_forget()
+        cards_frame.pack_forget()
+        hide_news_view()
+        hide_dashboard()
+        # Destroy any previous today_frame
+        if _today_frame is not None:
+            _today_frame.destroy()
+        # Create a new modern UI for today's weather
+        today_frame = tk.Frame(root)
+        today_frame.pack(fill=tk.BOTH, expand=True)
+        _today_frame = today_frame
+
+        # Get today's weather data
+        city = selected_city.get()
+        days = forecasts.days(city)
+        if not days:
+            # Removed from the forecast, or not fetched yet: the view is
+            # built again when a forecast for the city arrives
+            empty_frame = theme_engine.register(tk.Frame(today_frame), "window")
+            empty_frame.place(relx=0.5, rely=0.5, anchor='center')
+            theme_engine.register(tk.Label(empty_frame, text=city, font=('Helvetica', 22, 'bold')),
+                                  "label").pack(pady=(0, 6))
+            theme_engine.register(tk.Label(empty_frame, text="No forecast available", font=('Helvetica', 12)),
+                                  "secondary_label").pack(pady=(0, 16))
+            theme_engine.register(tk.Button(empty_frame, text="Back to Main", command=show_upcoming_days,
+                                            font=('Helvetica', 12, 'bold'), relief='flat', bd=0,
+                                            padx=18, pady=8, cursor='hand2'), "accent_button").pack()
+            theme_engine.register(today_frame, "window")
+            return today_frame
+        today_data = days[0]
+
+        # Create a gradient background based on weather
+        weather_type = today_data.get("avatar", "sunny.png").replace(".png", "")
+
+        # Create gradient background
+        canvas = tk.Canvas(today_frame, highlightthickness=0, bd=0)
+        canvas.pack(fill=tk.BOTH, expand=True)
+        gradient_item = canvas.create_image(0, 0, anchor="nw", tags="gradient")
+
+        def create_gradient():
+            # One image item, rescaled from a cached master instead of a line per row
+            width = canvas.winfo_width()
+            height = canvas.winfo_height()
+            if width < 2 or height < 2:
+                return
+            # Keep a reference so an LRU eviction cannot blank the canvas
+            canvas.gradient_image = gradient_cache.get(weather_type, width, height)
+            canvas.itemconfig(gradient_item, image=canvas.gradient_image)
+
+        canvas.bind('<Configure>', lambda e: [create_gradient(), update_content_position()])
+
+        # Centered content frame
+        content_frame = tk.Frame(canvas, bg='')
+        content_window = canvas.create_window((0, 0), window=content_frame, anchor='center')
+
+        def update_content_position():
+            w = min(420, canvas.winfo_width() - 40)
+            h = min(720, canvas.winfo_height() - 40)
+            x = canvas.winfo_width() // 2
+            y = canvas.winfo_height() // 2
+            canvas.coords(content_window, x, y)
+            content_frame.config(width=w, height=h)
+
+        # Card frame (white, rounded, shadow)
+        card_frame = theme_engine.register(tk.Frame(content_frame, bd=0, highlightthickness=0), "card")
+        card_frame.place(relx=0.5, rely=0.5, anchor='center', width=400, height=700)
+        # Shadow effect (simulate with a lower frame)
+        shadow = theme_engine.register(tk.Frame(content_frame, bd=0, highlightthickness=0), "shadow")
+        shadow.place(relx=0.5, rely=0.5, anchor='center', width=410, height=710, x=6, y=6)
+        card_frame.lift()
+
+        # City and date
+        theme_engine.register(tk.Label(card_frame, text=city, font=('Helvetica', 22, 'bold')),
+                              "card_label").pack(pady=(28, 0))
+        theme_engine.register(tk.Label(card_frame, text=today_data['date'], font=('Helvetica', 12)),
+                              "card_secondary_label").pack(pady=(0, 10))
+
+        # Weather icon and temperature
+        avatar_label = theme_engine.register(tk.Label(card_frame), "card_label")
+        avatar_label.pack(pady=(0, 8))
+        set_avatar(avatar_label, today_data.get("avatar", ""))
+        today_texts = city_texts(city).today(today_data)
+        theme_engine.register(tk.Label(card_frame, text=today_texts["Now"], font=('Helvetica', 44, 'bold')),
+                              "card_label").pack()
+        theme_engine.register(tk.Label(card_frame, text=today_texts["Range"],
+                                       font=('Helvetica', 11)), "card_secondary_label").pack(pady=(0, 12))
+
+        # Weather details in a modern grid
+        details = [(label, text) for label, text in today_texts.items() if label not in ("Now", "Range")]
+        details_frame = theme_engine.register(tk.Frame(card_frame), "card")
+        details_frame.pack(pady=(8, 16), padx=24, fill='x')
+        for i, (label, value) in enumerate(details):
+            row = i // 2
+            col = i % 2
+            cell = theme_engine.register(tk.Frame(details_frame), "card")
+            cell.grid(row=row, column=col, sticky='w', padx=8, pady=6)
+            theme_engine.register(tk.Label(cell, text=label, font=('Helvetica', 10, 'bold')),
+                                  "card_secondary_label").pack(anchor='w')
+            theme_engine.register(tk.Label(cell, text=value, font=('Helvetica', 12)), "card_label").pack(anchor='w')
+        # Add subtle dividers
+        for r in range(1, (len(details)+1)//2):
+            divider = theme_engine.register(tk.Frame(details_frame, height=1), "divider")
+            divider.grid(row=r, column=0, columnspan=2, sticky='ew', pady=(0,0))
+
+        # Today's hourly series; wheel to zoom out over the coming days
+        hourly_panel = HourlyPanel(card_frame, hourly_store, lambda: formatter.units, theme_engine, height=150)
+        hourly_panel.pack(padx=24, fill='x')
+        hourly_panel.show(city, today_data['date'])
+
+        # Add Back to Main button at the bottom of the card
+        def back_to_main():
+            if _today_frame is not None:
+                _today_frame.destroy()
+            show_upcoming_days()
+        back_button = tk.Button(card_frame, text="Back to Main", 
+                              command=back_to_main,
+                              font=('Helvetica', 12, 'bold'),
+                              relief='flat',
+                              bd=0,
+                              padx=18,
+                              pady=8,
+                              cursor='hand2')
+        theme_engine.register(back_button, "accent_button")
+        back_button.pack(pady=(10, 18))
+
+        # Initial position update
+        today_frame.after(100, update_content_position)
+        return today_frame
+
+    # --- Notes Database Setup ---
+    # Migrates the old keyless notes table; writes go through a background thread
+    notes_store = NotesStore(notes_path, root=root)
+
+    def save_note_to_db(city, note, on_done=None):
+        notes_store.add_note(city, note, on_done)
+
+    def get_notes_from_db(city):
+        return notes_store.get_notes(city)
+
+    def delete_note_from_db(note_id, on_done=None):
+        notes_store.delete_note(note_id, on_done)
+
+    # --- Notes Section UI ---
+    notes_frame = theme_engine.register(tk.LabelFrame(scrollable_frame, text="City Notes", padx=10, pady=10), "group")
+    notes_frame.pack(fill="x", padx=20, pady=(0, 20))
+
+    # Search box across every city's notes
+    search_frame = theme_engine.register(tk.Frame(notes_frame), "surface")
+    search_frame.pack(side="top", fill="x", pady=(0, 8))
+    theme_engine.register(tk.Label(search_frame, text="Search all notes:"), "card_label").pack(side="left")
+    search_entry = theme_engine.register(tk.Entry(search_frame, width=30), "input")
+    search_entry.pack(side="left", padx=(5, 0))
+
+    note_entry = theme_engine.register(tk.Entry(notes_frame, width=40), "input")
+    note_entry.pack(side="left", padx=(0, 10))
+
+    add_note_button = theme_engine.register(tk.Button(notes_frame, text="Add Note", width=10), "accent_button")
+    add_note_button.pack(side="left")
+
+    def add_note():
+        city = selected_city.get()
+        note = note_entry.get().strip()
+        if note:
+            # The list refreshes once the writer thread has committed the note
+            save_note_to_db(city, note, on_done=lambda note_id: scheduler.invalidate("notes"))
+            note_entry.delete(0, tk.END)
+    add_note_button.config(command=add_note)
+
+    notes_listbox = theme_engine.register(tk.Listbox(notes_frame, width=50, height=4), "list")
+    notes_listbox.pack(side="left", padx=(10, 0))
+    notes_scrollbar = theme_engine.register(tk.Scrollbar(notes_frame, orient="vertical", command=notes_listbox.yview),
+                                            "scrollbar")
+    notes_scrollbar.pack(side="left", fill="y")
+    # Database ids of the notes shown in notes_listbox, row for row
+    note_ids = []
+    # Open search, if any; its results are fetched a page at a time
+    notes_search = None
+    search_after_id = None
+
+    def update_notes_list():
+        nonlocal notes_search
+        notes_listbox.delete(0, tk.END)
+        note_ids.clear()
+        if search_entry.get().strip():
+            notes_search = notes_store.search(search_entry.get())
+            load_search_page()
+            return
+        notes_search = None
+        city = selected_city.get()
+        for note_id, note in get_notes_from_db(city):
+            notes_listbox.insert(tk.END, note)
+            note_ids.append(note_id)
+
+    def load_search_page():
+        for note_id, city, note in notes_search.next_page():
+            notes_listbox.insert(tk.END, f"{city}: {note}")
+            note_ids.append(note_id)
+
+    def on_notes_scroll(first, last):
+        notes_scrollbar.set(first, last)
+        # Fetch the next page of results as the listbox nears the end
+        if notes_search is not None and not notes_search.done and float(last) > 0.9:
+            load_search_page()
+    notes_listbox.configure(yscrollcommand=on_notes_scroll)
+
+    def on_search_key(event):
+        # Wait for a pause in typing before querying
+        nonlocal search_after_id
+        if search_after_id is not None:
+            root.after_cancel(search_after_id)
+        search_after_id = root.after(150, run_search)
+
+    def run_search():
+        nonlocal search_after_id
+        search_after_id = None
+        scheduler.invalidate("notes")
+    search_entry.bind('<KeyRelease>', on_search_key)
+
+    scheduler.register("notes", update_notes_list)
+    # Themed last, so a theme switch made in the same pass as a cards or notes
+    # render also reaches the widgets that render created
+    scheduler.register("theme", render_theme)
+
+    def on_city_change():
+        # The only path for a city change; the city picker just sets selected_city
+        scheduler.invalidate("cards", "notes")
+
+    selected_city.trace_add('write', lambda *args: on_city_change())
+
+    # Delete note on double-click
+
+    def on_note_double_click(event):
+        selection = notes_listbox.curselection()
+        if selection:
+            # Delete by id so duplicates of the same text are left alone, and drop
+            # the row right away instead of waiting for the commit
+            index = selection[0]
+            delete_note_from_db(note_ids.pop(index))
+            notes_listbox.delete(index)
+    notes_listbox.bind('<Double-Button-1>', on_note_double_click)
+
+    return WeatherApp(
+        root,
+        scheduler=scheduler,
+        theme_engine=theme_engine,
+        forecast_store=forecast_store,
+        hourly_store=hourly_store,
+        forecast_service=forecast_service,
+        forecast_cache=forecast_cache,
+        forecast_reloader=forecast_reloader,
+        profiler=profiler,
+        trace_path=trace_path,
+        forecasts=forecasts,
+        formatter=formatter,
+        alert_monitor=alert_monitor,
+        image_service=image_service,
+        sparklines=sparklines,
+        gradient_cache=gradient_cache,
+        notes_store=notes_store,
+        card_renderer=card_renderer,
+        cities=cities,
+        selected_city=selected_city,
+        city_picker=city_picker,
+        weather_vars=weather_vars,
+        forecast_days_var=forecast_days_var,
+        search_entry=search_entry,
+        note_entry=note_entry,
+        notes_listbox=notes_listbox,
+        detail_pool=detail_pool,
+        update_cards=update_cards,
+        apply_theme=apply_theme,
+        refresh_forecasts=refresh_forecasts,
+        nearest_forecast_city=nearest_forecast_city,
+        news_feed=news_feed,
+        show_news_view=show_news_view,
+        show_dashboard=show_dashboard,
+        show_today_view=show_today_view,
+        show_upcoming_days=show_upcoming_days,
+        show_detailed_view=show_detailed_view,
+        update_notes_list=update_notes_list,
+        add_note=add_note,
+        run_search=run_search,
+    )
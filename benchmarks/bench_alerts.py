@@ -0,0 +1,117 @@
+# Alert rules (alerts.py) against a synthetic forecast of N cities x M days:
+# compiling R random rules, evaluating all of them over every city (the
+# first pass raises the alerts, a second finds nothing changed), listing
+# and naming every raised alert as the alert log does, and re-evaluating
+# one city after a single field changed, as a forecast update does. A
+# per-rule, per-day Python loop over a sample of cities is timed too and
+# scaled up, as the baseline.
+#
+# All of this runs on the alerts worker (AlertMonitor), never on the Tk
+# loop. At the defaults a full evaluation is still tens of milliseconds,
+# not a few: the (rules x cities) result alone is 10 million booleans.
+#   python benchmarks/bench_alerts.py [--cities N] [--days M] [--rules R]
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+from alerts import NUMERIC_OPS, AlertEngine, Rule
+from bench_forecast_store import synthetic_forecast
+from forecast_store import LABELS, METRICS, ForecastStore
+
+
+def synthetic_rules(store, count, seed=0):
+    # Mostly numeric thresholds that a few percent of cities reach over the
+    # whole forecast, as real alerts are rare; the rest match the rarest
+    # category of a text field on the first day
+    rng = random.Random(seed)
+    highs = {field: column.max(axis=1) for field, column in store.metrics.items()}
+    lows = {field: column.min(axis=1) for field, column in store.metrics.items()}
+    rules = []
+    for i in range(count):
+        days = rng.choice([None, 1, 3, 7])
+        if rng.random() < 0.8:
+            field = rng.choice(list(METRICS))
+            if rng.random() < 0.8:
+                op, value = rng.choice([">", ">="]), np.percentile(highs[field], rng.uniform(95, 100))
+            else:
+                op, value = rng.choice(["<", "<="]), np.percentile(lows[field], rng.uniform(0, 5))
+            rules.append(Rule(f"rule {i}", field, op, float(value), days))
+        else:
+            field = rng.choice(["uv_risk_level", "aqi_level", "wind_direction"])
+            codes, categories = store.labels[field]
+            rarest = int(np.argmin(np.bincount(codes.ravel(), minlength=len(categories))))
+            rules.append(Rule(f"rule {i}", field, "==", [categories[rarest]], 1))
+    return rules
+
+
+def naive_fired(store, rules, city):
+    # The rules firing for city, one rule and one day at a time
+    days = store.days(city)
+    columns = store.columns(city, list(METRICS) + list(LABELS))
+    fired = set()
+    for i, rule in enumerate(rules):
+        limit = len(days) if rule.days is None else min(len(days), rule.days)
+        values = columns[rule.field][:limit]
+        if rule.field in METRICS:
+            test = NUMERIC_OPS[rule.op]
+            hit = any(test(value, rule.value) for value in values)
+        else:
+            hit = any(value in rule.value for value in values)
+        if hit:
+            fired.add(i)
+    return fired
+
+
+def ms(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) * 1000 / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=16)
+    parser.add_argument("--rules", type=int, default=1000)
+    args = parser.parse_args()
+
+    store = ForecastStore.from_json(synthetic_forecast(args.cities, args.days))
+    rules = synthetic_rules(store, args.rules)
+    print(f"{args.rules} rules x {args.cities} cities x {args.days} days")
+
+    compile_ms, engine = ms(lambda: AlertEngine(rules))
+    first_ms, (raised, _) = ms(lambda: engine.evaluate(store))
+    again_ms, (unchanged, _) = ms(lambda: engine.evaluate(store), repeat=5)
+    names_ms, _ = ms(lambda: list(raised))
+    print(f"compile                      {compile_ms:9.1f} ms")
+    print(f"evaluate all (first)         {first_ms:9.1f} ms  {len(raised)} alerts raised")
+    print(f"evaluate all (unchanged)     {again_ms:9.1f} ms  {len(unchanged)} raised")
+    print(f"list and name raised alerts  {names_ms:9.1f} ms  (only the log does, on the alerts worker)")
+
+    # One city's AQI doubles: only the AQI rules run, for that city only
+    city = store.cities[0]
+    changed = ForecastStore.from_json({"cities": {city: {"forecast": [dict(day) for day in store.days(city)]}}})
+    changed.metrics["aqi"] = changed.metrics["aqi"] * 2
+    update_ms, _ = ms(lambda: engine.update(changed, city, {"aqi"}), repeat=200)
+    full_ms, _ = ms(lambda: engine.update(changed, city), repeat=200)
+    print(f"update 1 city, 1 field       {update_ms:9.3f} ms")
+    print(f"update 1 city, every field   {full_ms:9.3f} ms")
+
+    sample = store.cities[:max(1, min(200, args.cities))]
+    engine = AlertEngine(rules)
+    engine.evaluate(store)
+    naive_ms, fired = ms(lambda: [naive_fired(store, rules, city) for city in sample])
+    mismatches = sum(set(engine.fired(city)) != hits for city, hits in zip(sample, fired))
+    print(f"python loop, all cities      {naive_ms * args.cities / len(sample):9.1f} ms  "
+          f"(from {len(sample)} cities; {mismatches} disagree)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# Compare the old destroy-and-rebuild update_cards() with the pooled,
+# virtualized CardRenderer, in time per scenario and widgets alive.
+# Needs a display (run under Xvfb on servers):
+#   python benchmarks/bench_cards.py
+import json
+import os
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from card_renderer import CardRenderer, card_param_text
+
+weather_params = [
+    "Temperature",
+    "Atmospheric Pressure",
+    "Humidity",
+    "Precipitation",
+    "Wind",
+    "Cloud Cover",
+    "UV Index",
+    "Air Quality Index (AQI)"
+]
+
+
+def make_days(count):
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "forcast_data.json")
+    with open(path, 'r', encoding='utf-8') as f:
+        base = json.load(f)["cities"]["Tehran"]["forecast"]
+    days = []
+    for i in range(count):
+        day = json.loads(json.dumps(base[i % len(base)]))
+        day["date"] = f"day-{i}"
+        days.append(day)
+    return days
+
+
+# The pre-CardRenderer implementation, kept here as the baseline
+def legacy_update_cards(grid_frame, city, days, params, num_columns):
+    for widget in grid_frame.winfo_children():
+        widget.destroy()
+    for i, day in enumerate(days):
+        card = tk.Frame(grid_frame, bd=2, relief="groove", padx=10, pady=10)
+        card.grid(row=i // num_columns, column=i % num_columns, padx=5, pady=5, sticky="nsew")
+        left_frame = tk.Frame(card)
+        left_frame.pack(side="left", padx=10)
+        info_frame = tk.Frame(card)
+        info_frame.pack(side="left", fill="both", expand=True)
+        tk.Label(info_frame, text=day["date"], font=("Arial", 10, "bold")).pack(anchor="w")
+        params_frame = tk.Frame(info_frame)
+        params_frame.pack(fill="both", expand=True)
+        for param in params:
+            tk.Label(params_frame, text=card_param_text(param, day), anchor="w", wraplength=200).pack(anchor="w")
+        button_frame = tk.Frame(card)
+        button_frame.pack(side="bottom", fill="x", pady=(10, 0))
+        tk.Button(button_frame, text="See More Details").pack(pady=5)
+    for i in range(num_columns):
+        grid_frame.grid_columnconfigure(i, weight=1)
+
+
+def timed(root, fn):
+    start = time.perf_counter()
+    fn()
+    root.update_idletasks()
+    return (time.perf_counter() - start) * 1000
+
+
+def count_widgets(widget):
+    return sum(1 + count_widgets(child) for child in widget.winfo_children())
+
+
+def scroll_area(root):
+    canvas = tk.Canvas(root)
+    canvas.pack(fill="both", expand=True)
+    frame = tk.Frame(canvas)
+    canvas.create_window((0, 0), window=frame, anchor="nw", width=960)
+    root.update()
+    return canvas, frame
+
+
+def run_scenarios(root, render, scroll):
+    all_params = list(weather_params)
+    fewer_params = all_params[1:]
+    results = {}
+    results["first render"] = timed(root, lambda: render(all_params, 3))
+    results["same data"] = timed(root, lambda: render(all_params, 3))
+    results["toggle param"] = timed(root, lambda: render(fewer_params, 3))
+    results["resize 3->2 cols"] = timed(root, lambda: render(fewer_params, 2))
+    results["scroll to end"] = timed(root, scroll)
+    return results
+
+
+def main():
+    root = tk.Tk()
+    root.geometry("1000x800")
+    print(f"{'days':>5} {'scenario':<18} {'legacy ms':>10} {'pooled ms':>10} {'speedup':>8}")
+    for count in (7, 90, 365):
+        days = make_days(count)
+
+        canvas, frame = scroll_area(root)
+        legacy = run_scenarios(root, lambda params, cols: legacy_update_cards(frame, "Tehran", days, params, cols),
+                               lambda: canvas.yview_moveto(1.0))
+        legacy_widgets = count_widgets(frame)
+        canvas.destroy()
+
+        canvas, frame = scroll_area(root)
+        renderer = CardRenderer(frame, canvas, on_details=lambda c, d: None, get_image=lambda name, on_ready=None: None)
+
+        def scroll_pooled():
+            canvas.configure(scrollregion=(0, 0, 960, renderer.grid.total_height()))
+            canvas.yview_moveto(1.0)
+            renderer.grid.refresh()
+        pooled = run_scenarios(root, lambda params, cols: renderer.render("Tehran", days, params, cols), scroll_pooled)
+        pooled_widgets = count_widgets(frame)
+        canvas.destroy()
+
+        for scenario, legacy_ms in legacy.items():
+            pooled_ms = pooled[scenario]
+            print(f"{count:>5} {scenario:<18} {legacy_ms:>10.1f} {pooled_ms:>10.1f} {legacy_ms / max(pooled_ms, 0.001):>7.1f}x")
+        print(f"{count:>5} {'widgets':<18} {legacy_widgets:>10} {pooled_widgets:>10}")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# Hourly charts (hourly_charts.py) over one synthetic series of N points:
+# building its pyramid, and picking the points of a view W px wide, for the
+# whole series and for views zoomed in 10x and 1000x. Each view is checked
+# to keep the series' highest and lowest point in range, and compared with
+# min/max bucketing the raw points of the range directly, and with turning
+# every point in range into canvas coordinates as drawing them all would.
+# With a display (run under Xvfb on servers) a chart is then zoomed and
+# panned across the series, reported as p50/p95 ms per render with the
+# number of canvas items and line points it ended up with.
+#   python benchmarks/bench_charts.py [--points N] [--width W] [--frames F]
+import argparse
+import os
+import sys
+import time
+import tkinter as tk
+from datetime import datetime
+
+import numpy as np
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+from hourly_charts import HOURLY_SERIES, HourlyChart, SeriesPyramid, minmax_decimate
+
+
+def synthetic_series(count, step_hours, seed=0):
+    # A daily cycle with a random walk on top, every step_hours hours
+    rng = np.random.default_rng(seed)
+    hours = np.arange(count) * step_hours
+    values = 12 + 8 * np.cos((hours - 15) / 24 * 2 * np.pi) + np.cumsum(rng.normal(0, 0.05, count))
+    return hours, np.round(values, 2)
+
+
+def synthetic_hourly(cities, days, interval_minutes=60, seed=0):
+    # hourly_data.json for cities, every series `days` days long
+    count = days * 24 * 60 // interval_minutes
+    data = {}
+    for i, city in enumerate(cities):
+        series = {}
+        for j, name in enumerate(HOURLY_SERIES):
+            _, values = synthetic_series(count, interval_minutes / 60, seed + i * len(HOURLY_SERIES) + j)
+            series[name] = {"values": values.tolist()}
+        data[city] = {"interval_minutes": interval_minutes, "series": series}
+    return {"cities": data}
+
+
+def ms(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) * 1000 / repeat, result
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def views(x):
+    # name -> (x0, x1): everything, a tenth and a thousandth of the series
+    first, last = float(x[0]), float(x[-1])
+    middle, span = (first + last) / 2, last - first
+    return {"all": (first, last),
+            "zoom 10x": (middle - span / 20, middle + span / 20),
+            "zoom 1000x": (middle - span / 2000, middle + span / 2000)}
+
+
+def bench_views(pyramid, x, y, width):
+    print(f"{'view':12} {'level':>5} {'points':>7} {'pyramid ms':>10} {'direct ms':>10} {'all points ms':>13}  extremes")
+    for name, (x0, x1) in views(x).items():
+        pyramid_ms, (level, xs, ys) = ms(lambda: pyramid.points(x0, x1, width), repeat=50)
+        lo, hi = np.searchsorted(x, x0), np.searchsorted(x, x1, "right")
+        direct_ms, _ = ms(lambda: minmax_decimate(x[lo:hi], y[lo:hi], max(3, -(-(hi - lo) // (width // 2)))),
+                          repeat=50)
+        scale = width / (x1 - x0)
+        every_ms, _ = ms(lambda: [(float(px), float(py)) for px, py in zip((x[lo:hi] - x0) * scale, y[lo:hi])])
+        kept = ys.max() >= y[lo:hi].max() and ys.min() <= y[lo:hi].min()
+        print(f"{name:12} {level:>5} {len(xs):>7} {pyramid_ms:>10.3f} {direct_ms:>10.3f} {every_ms:>13.1f}  "
+              f"{'kept' if kept else 'LOST'}{'' if len(xs) <= width else '  OVER WIDTH'}")
+
+
+def bench_chart(pyramid, width, frames):
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"(chart skipped: {e})")
+        return
+    root.geometry(f"{width + 58}x240")
+    chart = HourlyChart(root, height=220)
+    chart.pack(fill="both", expand=True)
+    chart.set_series(pyramid, "Temperature", HOURLY_SERIES["temperature"][1], datetime(2024, 3, 20))
+    chart.set_view(*pyramid.bounds())
+    root.update()
+
+    def step(name, action):
+        times, points = [], 0
+        for i in range(frames):
+            start = time.perf_counter()
+            action(i)
+            chart.render()
+            root.update_idletasks()
+            times.append((time.perf_counter() - start) * 1000)
+            points = max(points, chart.drawn)
+        print(f"{name:12} {percentile(times, 0.5):>8.2f} {percentile(times, 0.95):>8.2f} {points:>7} "
+              f"{len(chart.find_all()):>6}")
+
+    print(f"{'render':12} {'p50 ms':>8} {'p95 ms':>8} {'points':>7} {'items':>6}")
+    step("zoom in/out", lambda i: chart.zoom(0.8 if (i // 30) % 2 == 0 else 1.25))
+    chart.set_view(*pyramid.bounds())
+    chart.zoom(0.01)
+    step("pan", lambda i: chart.pan((chart.view[1] - chart.view[0]) / 20))
+    root.destroy()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=100000)
+    parser.add_argument("--width", type=int, default=800)
+    parser.add_argument("--frames", type=int, default=120)
+    args = parser.parse_args()
+
+    # One point a minute; 100k is about 70 days
+    x, y = synthetic_series(args.points, 1 / 60)
+    build_ms, pyramid = ms(lambda: SeriesPyramid(x, y), repeat=5)
+    sizes = ", ".join(str(len(level[0])) for level in pyramid.levels)
+    print(f"{args.points} points, {args.width} px wide")
+    print(f"pyramid build {build_ms:.1f} ms; levels {sizes}")
+    bench_views(pyramid, x, y, args.width)
+    bench_chart(pyramid, args.width, args.frames)
+
+
+if __name__ == "__main__":
+    main()
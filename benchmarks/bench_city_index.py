@@ -0,0 +1,75 @@
+# City index over a synthetic gazetteer: build, save and load times, and
+# nearest / k-nearest / radius query latency against a brute-force NumPy
+# scan of every place. Runs without a display.
+#   python benchmarks/bench_city_index.py [places] [queries]
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from city_index import CityIndex, to_xyz
+
+
+def synthetic_gazetteer(count, seed=0):
+    # Places spread evenly over the sphere, as a CSV like cities.csv
+    rng = np.random.default_rng(seed)
+    lat = np.degrees(np.arcsin(rng.uniform(-1, 1, count)))
+    lon = rng.uniform(-180, 180, count)
+    population = rng.integers(1000, 5000000, count)
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write("name,country,lat,lon,population\n")
+        for i in range(count):
+            f.write(f"Place {i},XX,{lat[i]:.5f},{lon[i]:.5f},{population[i]}\n")
+    return path
+
+
+def latency(fn, queries):
+    times = []
+    for lat, lon in queries:
+        start = time.perf_counter()
+        fn(lat, lon)
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return times[len(times) // 2], times[int(len(times) * 0.95)]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    num_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    path = synthetic_gazetteer(count)
+    index_path = os.path.splitext(path)[0] + ".index.npz"
+    try:
+        start = time.perf_counter()
+        index = CityIndex.load(path)
+        print(f"{count} places: build + save {(time.perf_counter() - start) * 1000:8.1f} ms")
+        start = time.perf_counter()
+        CityIndex.load(path)
+        print(f"{'':>{len(str(count))}}  load saved    {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+        rng = np.random.default_rng(1)
+        queries = list(zip(np.degrees(np.arcsin(rng.uniform(-1, 1, num_queries))).tolist(),
+                           rng.uniform(-180, 180, num_queries).tolist()))
+        xyz = to_xyz(index.lat, index.lon)
+
+        def brute_nearest(lat, lon):
+            return int(np.argmin(np.einsum("ij,ij->i", xyz - to_xyz(lat, lon), xyz - to_xyz(lat, lon))))
+
+        print(f"{'query':<22} {'p50 ms':>8} {'p95 ms':>8}")
+        for name, fn in [("nearest", index.nearest),
+                         ("10 nearest", lambda lat, lon: index.k_nearest(lat, lon, 10)),
+                         ("within 50 km", lambda lat, lon: index.within(lat, lon, 50)),
+                         ("brute-force nearest", brute_nearest)]:
+            p50, p95 = latency(fn, queries)
+            print(f"{name:<22} {p50:>8.3f} {p95:>8.3f}")
+    finally:
+        for leftover in (path, index_path):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# Keystroke-to-suggestion latency of the city picker over a large synthetic
+# list of names: typing whole names one key at a time, backspacing, and a
+# typo that falls back to fuzzy matching. With a display (or Xvfb) it also
+# times the dropdown refresh after each keystroke.
+#   python benchmarks/bench_city_picker.py [names]
+import os
+import random
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from city_picker import CityMatcher, CityPicker
+
+SYLLABLES = ["ba", "kar", "zan", "jan", "teh", "ran", "qaz", "vin", "sha", "hr", "abad", "mash", "had",
+             "is", "fa", "han", "shi", "raz", "ta", "briz", "ko", "rd", "mi", "ya", "zd", "ne", "sa", "ri"]
+PREFIXES = ["", "", "", "Bandar ", "Khomeyni ", "Shahr-e ", "Qasr-e ", "New "]
+
+
+def synthetic_names(count, seed=0):
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        names.add(rng.choice(PREFIXES) + word)
+    return sorted(names)
+
+
+def keystrokes(words):
+    # Each word typed key by key, then deleted key by key
+    for word in words:
+        for j in range(1, len(word) + 1):
+            yield word[:j]
+        for j in range(len(word) - 1, -1, -1):
+            yield word[:j]
+
+
+def report(name, times):
+    times.sort()
+    print(f"{name:<28} {times[len(times) // 2]:>8.3f} {times[int(len(times) * 0.95)]:>8.3f} {times[-1]:>8.3f}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    names = synthetic_names(count)
+    rng = random.Random(1)
+    words = rng.sample(names, 50) + ["abad", "shahr-e k"]
+
+    start = time.perf_counter()
+    matcher = CityMatcher(names)
+    print(f"{count} names, index built in {(time.perf_counter() - start) * 1000:.1f} ms")
+    while matcher._postings is None:
+        time.sleep(0.05)
+    print(f"{'keystroke':<28} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+
+    times = []
+    for query in keystrokes(words):
+        start = time.perf_counter()
+        matcher.matches(query)
+        times.append((time.perf_counter() - start) * 1000)
+    report("prefix match", times)
+
+    times = []
+    for word in words[:20]:
+        typo = word[:2] + word[3:] if len(word) > 4 else word + "x"
+        start = time.perf_counter()
+        matcher.fuzzy(typo)
+        times.append((time.perf_counter() - start) * 1000)
+    report("fuzzy fallback", times)
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"(dropdown skipped: {e})")
+        return
+    variable = tk.StringVar(root, value=names[0])
+    picker = CityPicker(root, variable, names)
+    picker.pack()
+    root.update()
+    times = []
+    for query in keystrokes(words[:10]):
+        start = time.perf_counter()
+        picker.query.set(query)
+        root.update_idletasks()
+        times.append((time.perf_counter() - start) * 1000)
+    report("keystroke -> dropdown", times)
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
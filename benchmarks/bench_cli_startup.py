@@ -0,0 +1,124 @@
+# Cold start of the command line (cli.py) as a cron job sees it: a fresh
+# interpreter per run, timed from spawn to exit, on a synthetic forecast of
+# N cities x M days whose snapshot is already built. Each command also runs
+# once under `python -X importtime`; the slowest imports are listed and any
+# GUI or NumPy import is flagged. Exits with status 1 when a command's p50
+# is over --budget ms or it imported tkinter or PIL. By default the budget
+# counts the time on top of a bare `python -c pass` (the +ms column), which
+# no script can avoid and which varies a lot between machines; with
+# --absolute it holds the whole p50, interpreter included. Both are shown.
+#   python benchmarks/bench_cli_startup.py [--cities N] [--days M] [--repeat R] [--budget MS] [--absolute]
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+from bench_forecast_store import synthetic_forecast
+from forecast_snapshot import load_forecast
+from notes_store import NotesStore
+
+CLI = os.path.join(REPO, "cli.py")
+# Modules the command line must never import
+FORBIDDEN = ("tkinter", "_tkinter", "PIL")
+
+
+def commands(paths, cities):
+    # name -> (arguments, held to the budget); a full export is bound by
+    # its output rather than by startup, so it is only reported
+    forecast = ["--forecast", paths["forecast"]]
+    notes = ["--notes-db", paths["notes"]]
+    return {
+        "--help": (["--help"], True),
+        "forecast 1 city": (["forecast", cities[0]] + forecast, True),
+        "forecast 100 cities (csv)": (["forecast", *cities[:100], "--format", "csv"] + forecast, True),
+        "forecast all, 1 day (json)": (["forecast", "--all", "--format", "json", "--days", "1"] + forecast, False),
+        "notes 1 city": (["notes", cities[0]] + notes, True),
+        "notes search": (["notes", "--search", "rain"] + notes, True),
+    }
+
+
+def run(args, script=CLI):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *([script] if script else []), *args], cwd=REPO,
+                   stdout=subprocess.DEVNULL, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def import_times(args):
+    # (module, cumulative us) from -X importtime for everything imported
+    # after interpreter startup (site and its .pth files)
+    result = subprocess.run([sys.executable, "-X", "importtime", CLI] + args, cwd=REPO,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if line.startswith("import time:") and len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((parts[2].strip(), int(parts[1])))
+            if parts[2] == " site":
+                rows = []
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--budget", type=float, default=100.0, help="p50 ms allowed per command, beyond a bare interpreter")
+    parser.add_argument("--absolute", action="store_true", help="hold the whole p50 to the budget")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="weather-cli-")
+    try:
+        paths = {"forecast": os.path.join(directory, "forcast_data.json"),
+                 "notes": os.path.join(directory, "weather_notes.db")}
+        data = synthetic_forecast(args.cities, args.days)
+        with open(paths["forecast"], "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        load_forecast(paths["forecast"])  # builds the snapshot, as the first GUI start would
+        cities = list(data["cities"])
+        notes = NotesStore(paths["notes"])
+        for i in range(2000):
+            notes.add_note(cities[i % len(cities)], f"note {i} about rain and wind")
+        notes.close()
+
+        bare = sorted(run(["-c", "pass"], script=None) for _ in range(args.repeat))
+        base = bare[(len(bare) - 1) // 2]
+        print(f"{args.cities} cities x {args.days} days; a bare interpreter takes {base:.1f} ms p50")
+        if args.absolute:
+            print(f"budget: {args.budget:.0f} ms p50 in all")
+        else:
+            print(f"budget: {args.budget:.0f} ms p50 on top of the interpreter, i.e. {base + args.budget:.0f} ms "
+                  f"in all on this machine (--absolute holds the whole p50 to {args.budget:.0f} ms)")
+        print(f"{'command':28} {'p50 ms':>8} {'p95 ms':>8} {'+ms':>7}  slowest imports")
+        failed = False
+        for name, (argv, budgeted) in commands(paths, cities).items():
+            times = sorted(run(argv) for _ in range(args.repeat))
+            p50 = times[(len(times) - 1) // 2]
+            p95 = times[min(len(times) - 1, int(round(0.95 * (len(times) - 1))))]
+            imported = import_times(argv)
+            names = {module for module, _ in imported}
+            top = ", ".join(f"{module} {us / 1000:.1f}" for module, us in
+                            sorted(imported, key=lambda row: row[1], reverse=True)[:3])
+            flags = [module for module in FORBIDDEN if module in names]
+            if "numpy" in names:
+                top += "  [numpy]"
+            if flags:
+                top += f"  [FORBIDDEN: {', '.join(flags)}]"
+            over = budgeted and (p50 if args.absolute else p50 - base) > args.budget
+            failed = failed or over or bool(flags)
+            note = "  OVER BUDGET" if over else "" if budgeted else "  (not budgeted: bound by its output)"
+            print(f"{name:28} {p50:8.1f} {p95:8.1f} {p50 - base:7.1f}  {top}{note}")
+        sys.exit(1 if failed else 0)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# Scrolling the dashboard (dashboard.py) over N synthetic cities of M days.
+# Each frame moves the view down by a fraction of a tile row and lets Tk
+# rebind, lay out and redraw; reported as p50/p95 ms per frame and the frame
+# rate that gives, for a cold pass (sparklines drawn on the worker pool as
+# their tiles come into view) and a warm one (every sparkline cached), with
+# the number of tile widgets alive. Drawing every sparkline on the pool is
+# timed first and runs anywhere; the scroll passes need a display (run under
+# Xvfb on servers).
+#   python benchmarks/bench_dashboard.py [--cities N] [--days M] [--frames F]
+import argparse
+import os
+import sys
+import time
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+from bench_forecast_store import synthetic_forecast
+from dashboard import DASHBOARD_METRICS, DEFAULT_METRICS, SPARKLINE_SIZE, DashboardView, SparklineCache, \
+    render_sparkline
+from forecast_store import ForecastStore
+from render_scheduler import RenderScheduler
+from theming import ThemeEngine, light_theme
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def report(name, times, extra=""):
+    p50, p95 = percentile(times, 0.5), percentile(times, 0.95)
+    print(f"{name:<24} {p50:>8.2f} {p95:>8.2f} {1000 / max(p95, 0.001):>9.0f}  {extra}")
+
+
+def draw_all(store, metrics, workers):
+    # Every sparkline of every city, drawn on a pool of `workers` threads
+    jobs = [store.columns(city, metrics) for city in store.cities]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda columns: [render_sparkline(columns[name], *SPARKLINE_SIZE, DASHBOARD_METRICS[name][1])
+                                       for name in metrics], jobs))
+    return (time.perf_counter() - start) * 1000
+
+
+def scroll_pass(root, view, frames):
+    # Times `frames` steps from the top; a step is a third of a tile row
+    grid = view.tile_grid
+    step = grid.row_height / 3 / max(1, grid.total_height())
+    view.canvas.yview_moveto(0)
+    root.update()
+    times = []
+    for i in range(1, frames + 1):
+        start = time.perf_counter()
+        view.canvas.yview_moveto(min(1.0, i * step))
+        grid.refresh()
+        root.update_idletasks()
+        times.append((time.perf_counter() - start) * 1000)
+        # Let finished sparklines arrive between frames, as the main loop would
+        root.update()
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", type=int, default=500)
+    parser.add_argument("--days", type=int, default=16)
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+
+    store = ForecastStore.from_json(synthetic_forecast(args.cities, args.days))
+    metrics = list(DEFAULT_METRICS)
+    count = args.cities * len(metrics)
+    print(f"{args.cities} cities x {args.days} days, {len(metrics)} sparklines per tile")
+    for workers in (1, 2, 4):
+        ms = draw_all(store, metrics, workers)
+        print(f"draw {count} sparklines on {workers} worker(s): {ms:.0f} ms ({ms / count:.3f} ms each)")
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"(scrolling skipped: {e})")
+        return
+    root.geometry("1000x800")
+    scheduler = RenderScheduler(root)
+    theme = ThemeEngine(root, light_theme)
+    sparklines = SparklineCache(root)
+    view = DashboardView(root, list(store.cities), lambda city: store, lambda: "metric", sparklines,
+                         scheduler, theme, on_open=lambda city: None, on_back=lambda: None)
+    start = time.perf_counter()
+    view.show()
+    scheduler.flush()
+    root.update()
+    print(f"first show: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    print(f"{'pass':<24} {'p50 ms':>8} {'p95 ms':>8} {'p95 fps':>9}")
+    report("scroll (cold)", scroll_pass(root, view, args.frames),
+           f"{sparklines.misses} drawn, {view.tile_grid.cell_count()} tiles")
+    while sparklines.pending:
+        root.update()
+        time.sleep(0.01)
+    hits = sparklines.hits
+    report("scroll (warm)", scroll_pass(root, view, args.frames),
+           f"{sparklines.hits - hits} cache hits, {view.tile_grid.cell_count()} tiles")
+    sparklines.shutdown()
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# Load-and-classify time for N cities x M days: the old per-day loop in
+# main.py (strftime + weather_to_image on nested dicts) versus building a
+# ForecastStore, which classifies every day of every city in one pass. Then
+# from the file: json.load plus the old loop, versus the streamed ingest
+# into a snapshot (run once per file change) and opening that snapshot.
+#   python benchmarks/bench_forecast_store.py [cities] [days]
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from forecast_ingest import ingest
+from forecast_snapshot import read_snapshot
+from forecast_store import ForecastStore, weather_to_image
+
+DIRECTIONS = ["N", "NE", "E", "SE", "S", "SW", "W", "NW"]
+RISKS = ["Low", "Moderate", "High", "Very High"]
+LEVELS = ["Good", "Moderate", "Unhealthy"]
+
+
+def synthetic_day(rng):
+    low = rng.randint(-15, 30)
+    return {
+        "date": "2024-03-20",
+        "avatar": "sunny.png",
+        "temperature": {"min": low, "max": low + rng.randint(2, 12), "current": low + rng.randint(0, 8), "unit": "Celsius"},
+        "atmospheric_pressure": {"value": rng.randint(990, 1030), "unit": "hPa"},
+        "humidity": {"value": rng.randint(10, 100), "unit": "%"},
+        "precipitation": {"value": rng.randint(0, 30), "unit": "mm", "probability": rng.randint(0, 100)},
+        "wind": {"speed": rng.randint(0, 60), "direction": rng.choice(DIRECTIONS), "unit": "km/h"},
+        "cloud_cover": {"value": rng.randint(0, 100), "unit": "%"},
+        "uv_index": {"value": rng.randint(0, 11), "risk_level": rng.choice(RISKS)},
+        "air_quality": {"aqi": rng.randint(0, 300), "level": rng.choice(LEVELS),
+                        "pollutants": {"pm2_5": rng.randint(0, 150), "pm10": rng.randint(0, 200),
+                                       "o3": rng.randint(0, 120), "no2": rng.randint(0, 80), "so2": rng.randint(0, 40)}},
+    }
+
+
+def synthetic_forecast(num_cities, num_days, seed=0):
+    rng = random.Random(seed)
+    return {"cities": {f"City {i}": {"forecast": [synthetic_day(rng) for _ in range(num_days)]}
+                       for i in range(num_cities)}}
+
+
+def legacy_load(data):
+    today = datetime.now()
+    for city_data in data["cities"].values():
+        for idx, day in enumerate(city_data["forecast"]):
+            day["date"] = (today + timedelta(days=idx)).strftime("%Y-%m-%d")
+            day["avatar"] = weather_to_image(day)
+
+
+def main():
+    num_cities = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    num_days = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    data = synthetic_forecast(num_cities, num_days)
+    print(f"{num_cities} cities x {num_days} days")
+
+    start = time.perf_counter()
+    legacy_load(data)
+    legacy_ms = (time.perf_counter() - start) * 1000
+    print(f"legacy loop            {legacy_ms:8.1f} ms")
+
+    start = time.perf_counter()
+    store = ForecastStore.from_json(data)
+    columnar_ms = (time.perf_counter() - start) * 1000
+    print(f"columnar load+classify {columnar_ms:8.1f} ms  ({legacy_ms / columnar_ms:.2f}x)")
+
+    start = time.perf_counter()
+    store.avatars = store.classify()
+    print(f"  classify only        {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+    start = time.perf_counter()
+    store.days("City 0")
+    print(f"  one city's dict view {(time.perf_counter() - start) * 1000:8.3f} ms")
+
+    mismatches = sum(store.day(city, i)["avatar"] != day["avatar"]
+                     for city, city_data in data["cities"].items()
+                     for i, day in enumerate(city_data["forecast"]))
+    print(f"avatar mismatches vs weather_to_image: {mismatches}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "forecast.json")
+        snapshot_path = os.path.join(tmp, "forecast.snap")
+        with open(json_path, "w") as f:
+            json.dump(data, f)
+
+        start = time.perf_counter()
+        with open(json_path) as f:
+            legacy_load(json.load(f))
+        legacy_ms = (time.perf_counter() - start) * 1000
+        print(f"file: json.load + loop {legacy_ms:8.1f} ms")
+
+        start = time.perf_counter()
+        ingest(json_path, snapshot_path, "bench")
+        ingest_ms = (time.perf_counter() - start) * 1000
+        print(f"file: streamed ingest  {ingest_ms:8.1f} ms  ({legacy_ms / ingest_ms:.2f}x)")
+
+        start = time.perf_counter()
+        read_snapshot(snapshot_path)
+        print(f"file: snapshot open    {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# Resize latency of the Today-view gradient: one create_line per pixel row
+# (the old create_gradient) versus a single image from GradientCache.
+# Needs a display (run under Xvfb on servers):
+#   python benchmarks/bench_gradient.py
+import os
+import statistics
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gradients import GradientCache, bg_colors
+
+# A drag-resize: widths and heights stepping up, then back down
+SIZES = [(800 + 40 * i, 600 + 24 * i) for i in range(30)]
+SIZES += list(reversed(SIZES))
+
+
+def legacy_gradient(canvas, start_color, end_color, width, height):
+    canvas.delete("gradient")
+    for i in range(height):
+        r1, g1, b1 = int(start_color[1:3], 16), int(start_color[3:5], 16), int(start_color[5:7], 16)
+        r2, g2, b2 = int(end_color[1:3], 16), int(end_color[3:5], 16), int(end_color[5:7], 16)
+        r = r1 + (r2 - r1) * i // height
+        g = g1 + (g2 - g1) * i // height
+        b = b1 + (b2 - b1) * i // height
+        color = f'#{r:02x}{g:02x}{b:02x}'
+        canvas.create_line(0, i, width, i, fill=color, tags="gradient")
+
+
+def measure(root, draw):
+    times = []
+    for width, height in SIZES:
+        start = time.perf_counter()
+        draw(width, height)
+        root.update_idletasks()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def report(name, times, items):
+    times = sorted(times)
+    p95 = times[int(len(times) * 0.95) - 1]
+    print(f"{name:<10} p50 {statistics.median(times):8.2f} ms   p95 {p95:8.2f} ms   canvas items {items}")
+
+
+def main():
+    root = tk.Tk()
+    canvas = tk.Canvas(root, width=2000, height=1400)
+    canvas.pack()
+    start_color, end_color = bg_colors["sunny"]
+
+    legacy = measure(root, lambda w, h: legacy_gradient(canvas, start_color, end_color, w, h))
+    report("legacy", legacy, len(canvas.find_all()))
+    canvas.delete("all")
+
+    cache = GradientCache(max_entries=8)
+    item = canvas.create_image(0, 0, anchor="nw", tags="gradient")
+
+    def draw(width, height):
+        canvas.gradient_image = cache.get("sunny", width, height)
+        canvas.itemconfig(item, image=canvas.gradient_image)
+    cached = measure(root, draw)
+    report("cached", cached, len(canvas.find_all()))
+    print(f"cache hits {cache.hits}, misses {cache.misses}")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
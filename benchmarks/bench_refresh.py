@@ -0,0 +1,56 @@
+# Load test of the forecast refresh path against the local stub server:
+# a cold refresh of every city, then a revalidating one (ETag -> 304), with
+# injected latency and failures. Reports wall time, responses by kind and
+# how many connections the pooled session opened. Runs without a display.
+#   python benchmarks/bench_refresh.py [cities] [workers] [latency] [fail_rate]
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_forecast_store import synthetic_forecast
+from forecast_provider import ForecastService, HttpForecastProvider
+from forecast_stub_server import StubForecastServer
+
+
+def refresh(service, cities):
+    done = threading.Event()
+    outcome = {}
+
+    def on_done(forecast_data, errors):
+        outcome["ok"] = len(forecast_data["cities"])
+        outcome["errors"] = len(errors)
+        done.set()
+
+    start = time.perf_counter()
+    service.fetch_all(cities, on_done)
+    done.wait()
+    return (time.perf_counter() - start) * 1000, outcome
+
+
+def main():
+    num_cities = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.05
+    fail_rate = float(sys.argv[4]) if len(sys.argv) > 4 else 0.05
+    data = synthetic_forecast(num_cities, 7)
+    cities = list(data["cities"])
+    server = StubForecastServer(data, latency=latency, jitter=latency / 2, fail_rate=fail_rate, seed=0).start()
+    print(f"{num_cities} cities, {workers} workers, {latency * 1000:.0f} ms latency, {fail_rate:.0%} failures")
+    print(f"serial estimate {num_cities * latency * 1.25 * 1000:8.0f} ms")
+    try:
+        provider = HttpForecastProvider(server.url, pool_size=workers)
+        service = ForecastService(provider, max_workers=workers)
+        for name in ("cold", "revalidate"):
+            elapsed, outcome = refresh(service, cities)
+            print(f"{name:<10} {elapsed:8.0f} ms   ok {outcome['ok']:>5}   failed {outcome['errors']:>4}")
+        print(f"server responses {dict(server.stats)}")
+        print(f"connections opened {len(server.clients)}")
+        service.shutdown()
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# Startup cost of the forecast data for a small and a very large file:
+# parsing the JSON, building the snapshot once, and loading the snapshot on
+# later launches. With a display (or Xvfb) it also times a fresh process
+# from interpreter start to its first mapped Tk window, with and without a
+# warm snapshot.
+#   python benchmarks/bench_startup.py
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+from bench_forecast_store import synthetic_forecast
+from forecast_snapshot import load_forecast
+from forecast_store import ForecastStore
+
+SIZES = {"small": (4, 7), "large": (10000, 16)}
+
+FIRST_WINDOW = """
+import sys, tkinter as tk
+sys.path.insert(0, {repo!r})
+if {use_snapshot!r}:
+    from forecast_snapshot import load_forecast
+    store = load_forecast({json_path!r})
+else:
+    import json
+    from forecast_store import ForecastStore
+    with open({json_path!r}, 'r', encoding='utf-8') as f:
+        store = ForecastStore.from_json(json.load(f))
+store.days(store.cities[0])
+root = tk.Tk()
+root.update()
+root.destroy()
+"""
+
+
+def ms(start):
+    return (time.perf_counter() - start) * 1000
+
+
+def first_window(json_path, use_snapshot):
+    code = FIRST_WINDOW.format(repo=REPO, json_path=json_path, use_snapshot=use_snapshot)
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True)
+    if result.returncode != 0:
+        return None
+    return ms(start)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, (num_cities, num_days) in SIZES.items():
+            json_path = os.path.join(tmp, f"{label}.json")
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(synthetic_forecast(num_cities, num_days), f)
+            size_mb = os.path.getsize(json_path) / 1e6
+            print(f"{label}: {num_cities} cities x {num_days} days, {size_mb:.1f} MB")
+
+            start = time.perf_counter()
+            with open(json_path, "r", encoding="utf-8") as f:
+                ForecastStore.from_json(json.load(f))
+            print(f"  json parse + store     {ms(start):9.1f} ms")
+
+            start = time.perf_counter()
+            load_forecast(json_path)
+            print(f"  build snapshot         {ms(start):9.1f} ms")
+
+            start = time.perf_counter()
+            store = load_forecast(json_path)
+            store.days(store.cities[0])
+            print(f"  load snapshot          {ms(start):9.1f} ms")
+
+            for use_snapshot in (False, True):
+                elapsed = first_window(json_path, use_snapshot)
+                name = "first window, snapshot" if use_snapshot else "first window, json"
+                if elapsed is None:
+                    print(f"  {name:<22} (no display)")
+                else:
+                    print(f"  {name:<22} {elapsed:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# Theme-switch latency against widget count: the old apply_theme(), which
+# walked every widget under root and guessed roles from widget classes and
+# font strings, versus ThemeEngine.set_theme() over registered roles.
+# Needs a display (run under Xvfb on servers):
+#   python benchmarks/bench_theme.py
+import os
+import statistics
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from card_renderer import Card
+from theming import ThemeEngine, dark_theme, light_theme
+
+SWITCHES = 10
+
+
+# The pre-ThemeEngine walk, kept here as the baseline
+def legacy_apply_theme(root, theme):
+    def update_widget_colors(widget):
+        for child in widget.winfo_children():
+            if isinstance(child, tk.Frame):
+                child.configure(bg=theme['bg'])
+            elif isinstance(child, tk.LabelFrame):
+                child.configure(bg=theme['card_bg'], fg=theme['fg'])
+            elif isinstance(child, tk.Label):
+                fg = theme['fg']
+                if hasattr(child, 'cget') and child.cget('font'):
+                    font = str(child.cget('font'))
+                    if '10' in font or '11' in font or '12' in font:
+                        fg = theme.get('secondary_fg', theme['fg'])
+                child.configure(bg=theme['bg'], fg=fg)
+            elif isinstance(child, tk.Button):
+                child.configure(bg=theme['accent'], fg=theme['accent_fg'], activebackground=theme['button_active_bg'], activeforeground=theme['button_active_fg'])
+            elif isinstance(child, tk.Checkbutton):
+                child.configure(bg=theme['card_bg'], fg=theme['fg'], activebackground=theme['card_bg'])
+            elif isinstance(child, tk.Radiobutton):
+                child.configure(bg=theme['card_bg'], fg=theme['fg'], activebackground=theme['card_bg'])
+            elif isinstance(child, tk.Canvas):
+                child.configure(bg=theme['bg'], highlightbackground=theme['bg'])
+            elif isinstance(child, tk.Scrollbar):
+                child.configure(bg=theme['bg'], troughcolor=theme['card_bg'], activebackground=theme['accent'])
+            update_widget_colors(child)
+    update_widget_colors(root)
+
+
+def build_cards(root, count, theme=None):
+    frame = tk.Frame(root)
+    frame.pack(fill="both", expand=True)
+    texts = [f"Parameter {i}: {i * 7} units" for i in range(8)]
+    for i in range(count):
+        card = Card(frame, on_details=lambda city, day: None,
+                    get_image=lambda name, on_ready=None: None, theme=theme)
+        card._update_params(texts)
+        card.grid(row=i // 3, column=i % 3)
+    root.update()
+    return frame
+
+
+def count_widgets(widget):
+    return sum(1 + count_widgets(child) for child in widget.winfo_children())
+
+
+def measure(root, switch):
+    times = []
+    for i in range(SWITCHES):
+        theme = dark_theme if i % 2 == 0 else light_theme
+        start = time.perf_counter()
+        switch(theme)
+        root.update_idletasks()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    root = tk.Tk()
+    root.geometry("1000x800")
+    print(f"{'cards':>6} {'widgets':>8} {'walk ms':>9} {'engine ms':>10} {'speedup':>8}")
+    for count in (10, 100, 500, 2000):
+        frame = build_cards(root, count)
+        widgets = count_widgets(root)
+        walk = measure(root, lambda theme: legacy_apply_theme(root, theme))
+        frame.destroy()
+
+        engine = ThemeEngine(root, light_theme)
+        frame = build_cards(root, count, engine)
+        switched = measure(root, engine.set_theme)
+        frame.destroy()
+
+        print(f"{count:>6} {widgets:>8} {walk:>9.1f} {switched:>10.1f} {walk / max(switched, 0.001):>7.1f}x")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+# Benchmark suite for the app's hot paths, driven through create_app() on
+# synthetic data: N cities x M days of forecasts, K notes and L news items,
+# written to a temporary directory. Every path runs --repeat times and is
+# reported as p50/p95 ms, with the Tk widget count and the process RSS after
+# it. The data paths (forecast load, cache, notes search) run anywhere; the
+# UI paths need a display (run under Xvfb on servers) and are skipped
+# without one.
+#   python benchmarks/suite.py [--cities N] [--days M] [--notes K] [--news L] [--repeat R]
+# --out FILE writes the results as a JSON baseline; --compare FILE checks
+# them against one and exits with status 1 when a path's p50 got slower by
+# more than --tolerance (a fraction) and --min-delta ms.
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+import tkinter as tk
+
+from app import create_app
+from bench_charts import synthetic_hourly
+from bench_forecast_store import synthetic_forecast
+from forecast_cache import ForecastCache
+from forecast_snapshot import load_forecast
+from formatters import DisplayFormatter
+from news_feed import NewsFeed
+from notes_store import NotesStore
+from theming import dark_theme, light_theme
+
+WORDS = ["rain", "wind", "storm", "sunny", "cold", "heat", "fog", "snow", "umbrella", "jacket",
+         "traffic", "flood", "clear", "cloudy", "humid", "dry", "trip", "garden", "market", "school"]
+
+
+# --- Synthetic data ---
+def synthetic_notes(cities, count, seed=0):
+    rng = random.Random(seed)
+    return [(rng.choice(cities), " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 12))))
+            for _ in range(count)]
+
+
+def synthetic_news(count, seed=0):
+    rng = random.Random(seed)
+    return [{"title": " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 9))).capitalize(),
+             "summary": " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 40))).capitalize() + ".",
+             "date": f"2024-06-{1 + i % 28:02d}"}
+            for i in range(count)]
+
+
+def write_data(directory, num_cities, num_days, num_notes, num_news):
+    forecast_data = synthetic_forecast(num_cities, num_days)
+    paths = {name: os.path.join(directory, name)
+             for name in ("forcast_data.json", "news_data.json", "weather_notes.db", "forecast_cache.db",
+                          "alert_log.db", "hourly_data.json")}
+    with open(paths["forcast_data.json"], "w", encoding="utf-8") as f:
+        json.dump(forecast_data, f)
+    with open(paths["news_data.json"], "w", encoding="utf-8") as f:
+        json.dump(synthetic_news(num_news), f)
+    with open(paths["hourly_data.json"], "w", encoding="utf-8") as f:
+        json.dump(synthetic_hourly(list(forecast_data["cities"])[:8], num_days), f)
+    store = NotesStore(paths["weather_notes.db"])
+    for city, note in synthetic_notes(list(forecast_data["cities"]), num_notes):
+        store.add_note(city, note)
+    store.close()
+    return forecast_data, paths
+
+
+# --- Measurement ---
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def rss_kb():
+    # Current resident set size; peak RSS where /proc is not available
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def count_widgets(widget):
+    return sum(1 + count_widgets(child) for child in widget.winfo_children())
+
+
+def measure(results, name, step, repeat, setup=None, root=None):
+    # Times step() repeat times; setup() runs untimed before each call. With
+    # a root, pending idle work (layout, redraws) counts towards the step.
+    times = []
+    for i in range(repeat):
+        if setup is not None:
+            setup(i)
+        start = time.perf_counter()
+        step(i)
+        if root is not None:
+            root.update_idletasks()
+        times.append((time.perf_counter() - start) * 1000)
+    result = {"p50_ms": percentile(times, 0.5), "p95_ms": percentile(times, 0.95), "runs": repeat,
+              "rss_kb": rss_kb()}
+    if root is not None:
+        result["widgets"] = count_widgets(root)
+    results[name] = result
+    widgets = result.get("widgets", "")
+    print(f"{name:<32} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {widgets:>8} {result['rss_kb'] // 1024:>7}")
+
+
+# --- Data paths ---
+def bench_data(results, forecast_data, paths, repeat):
+    cities = list(forecast_data["cities"])
+    json_path = paths["forcast_data.json"]
+    snapshot = os.path.splitext(json_path)[0] + ".snapshot"
+
+    def drop_snapshot(i):
+        if os.path.exists(snapshot):
+            os.remove(snapshot)
+    measure(results, "forecast load (cold)", lambda i: load_forecast(json_path), max(1, repeat // 4),
+            setup=drop_snapshot)
+    load_forecast(json_path)
+    measure(results, "forecast load (snapshot)", lambda i: load_forecast(json_path), repeat)
+
+    store = load_forecast(json_path)
+    measure(results, "forecast days(city)", lambda i: store.days(cities[i % len(cities)]), repeat,
+            setup=lambda i: store._days.clear())
+
+    formatter = DisplayFormatter()
+
+    def switch_units(i):
+        # A fresh formatter each time: converting the store and formatting
+        # one city, as the first switch to a unit system does
+        fresh = DisplayFormatter("imperial" if i % 2 else "metric")
+        fresh.texts(cities[i % len(cities)], store)
+    measure(results, "format city texts", lambda i: formatter.texts(cities[i % len(cities)], store), repeat,
+            setup=lambda i: formatter._cities.clear())
+    measure(results, "unit switch (cold)", switch_units, repeat)
+
+    cache = ForecastCache(paths["forecast_cache.db"])
+    provider = "bench"
+    for city in cities:
+        cache.put(city, provider, forecast_data["cities"][city])
+    measure(results, "cache get", lambda i: cache.get(cities[i % len(cities)], provider), repeat)
+    measure(results, "cache put (unchanged)",
+            lambda i: cache.put(cities[i % len(cities)], provider, forecast_data["cities"][cities[i % len(cities)]]),
+            repeat)
+    cache.close()
+
+    feed = NewsFeed(paths["news_data.json"])
+    measure(results, "news feed (parse)", lambda i: feed.refresh(), max(1, repeat // 4),
+            setup=lambda i: setattr(feed, "key", None))
+    dates = sorted(set(feed.dates))
+    measure(results, "news feed (page)",
+            lambda i: feed.page(i % 3, 50, dates[i % len(dates)] if dates else None), repeat)
+
+    notes = NotesStore(paths["weather_notes.db"])
+    measure(results, "notes search", lambda i: notes.search(WORDS[i % len(WORDS)]).next_page(), repeat)
+    measure(results, "notes for city", lambda i: notes.get_notes(cities[i % len(cities)]), repeat)
+    notes.close()
+
+
+# --- UI paths ---
+def settle(app):
+    # Lets startup work (image loads, forecast fetches, renders) finish
+    for _ in range(50):
+        app.root.update()
+        if not app.forecast_service.pending and not app.scheduler.dirty:
+            break
+        time.sleep(0.02)
+
+
+def bench_ui(results, forecast_data, paths, repeat):
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"(UI paths skipped: {e})")
+        return
+
+    cities = list(forecast_data["cities"])
+    root.geometry("1000x800")
+    app = create_app(root, forecast_path=paths["forcast_data.json"], news_path=paths["news_data.json"],
+                     notes_path=paths["weather_notes.db"], cache_path=paths["forecast_cache.db"],
+                     alert_log_path=paths["alert_log.db"], hourly_path=paths["hourly_data.json"],
+                     cities=cities[:8], watch=False)
+    app.forecast_days_var.set(len(forecast_data["cities"][cities[0]]["forecast"]))
+    settle(app)
+    shown = app.cities
+
+    def switch_city(i):
+        app.selected_city.set(shown[(i + 1) % len(shown)])
+        app.scheduler.flush()
+    measure(results, "city switch (cards + notes)", switch_city, repeat, root=root)
+
+    def type_city(i):
+        name = shown[i % len(shown)]
+        app.city_picker.query.set(name[:1 + i % len(name)])
+    measure(results, "city picker keystroke", type_city, repeat, root=root)
+    app.city_picker.close()
+
+    params = list(app.weather_vars)
+
+    def toggle_param(i):
+        var = app.weather_vars[params[i % len(params)]]
+        var.set(not var.get())
+        app.update_cards()
+    measure(results, "update_cards (toggle param)", toggle_param, repeat, root=root)
+
+    def toggle_theme(i):
+        app.apply_theme(dark_theme if i % 2 == 0 else light_theme)
+        app.scheduler.flush()
+    measure(results, "apply_theme", toggle_theme, repeat, root=root)
+    app.apply_theme(light_theme)
+    app.scheduler.flush()
+
+    def search(i):
+        app.search_entry.delete(0, tk.END)
+        app.search_entry.insert(0, WORDS[i % len(WORDS)])
+        app.run_search()
+    measure(results, "notes search (listbox)", search, repeat, root=root)
+    app.search_entry.delete(0, tk.END)
+    app.update_notes_list()
+
+    days = app.forecasts.days(shown[0])
+    measure(results, "detail window (open)", lambda i: app.show_detailed_view(shown[0], days[i % len(days)]),
+            repeat, root=root)
+    app.detail_pool.close_all()
+
+    measure(results, "today view (build)", lambda i: app.show_today_view(), repeat, root=root)
+    sizes = ["1000x800", "1200x900", "800x600", "1400x1000"]
+
+    def resize(i):
+        root.geometry(sizes[i % len(sizes)])
+        root.update()
+    measure(results, "today view (resize)", resize, repeat, root=root)
+    app.show_upcoming_days()
+    root.geometry("1000x800")
+
+    measure(results, "news view (show)", lambda i: app.show_news_view(), repeat, root=root)
+    widths = ["1000x800", "600x800"]  # across the two-column breakpoint
+
+    def relayout_news(i):
+        root.geometry(widths[i % len(widths)])
+        root.update()
+        app.scheduler.invalidate("news")
+        app.scheduler.flush()
+    measure(results, "news view (relayout)", relayout_news, repeat, root=root)
+    app.show_upcoming_days()
+    root.geometry("1000x800")
+
+    measure(results, "dashboard (show)", lambda i: app.show_dashboard(), repeat, root=root)
+    app.show_upcoming_days()
+    settle(app)
+
+    app.close()
+    root.destroy()
+
+
+# --- Baselines ---
+def compare(results, baseline, tolerance, min_delta):
+    regressions = []
+    for name, result in results.items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        delta = result["p50_ms"] - old["p50_ms"]
+        if delta > min_delta and result["p50_ms"] > old["p50_ms"] * (1 + tolerance):
+            regressions.append(name)
+            print(f"REGRESSION {name}: p50 {old['p50_ms']:.2f} -> {result['p50_ms']:.2f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the app's hot paths on synthetic data")
+    parser.add_argument("--cities", type=int, default=200)
+    parser.add_argument("--days", type=int, default=16)
+    parser.add_argument("--notes", type=int, default=20000)
+    parser.add_argument("--news", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--out", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="a baseline written by --out")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown, as a fraction")
+    parser.add_argument("--min-delta", type=float, default=1.0, help="ignore slowdowns under this many ms")
+    parser.add_argument("--skip-ui", action="store_true")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="weather-bench-")
+    cwd = os.getcwd()
+    # Images and other assets are looked up relative to the repo
+    os.chdir(REPO)
+    try:
+        forecast_data, paths = write_data(directory, args.cities, args.days, args.notes, args.news)
+        print(f"{args.cities} cities x {args.days} days, {args.notes} notes, {args.news} news items")
+        print(f"{'path':<32} {'p50 ms':>9} {'p95 ms':>9} {'widgets':>8} {'RSS MB':>7}")
+        results = {}
+        bench_data(results, forecast_data, paths, args.repeat)
+        if not args.skip_ui:
+            bench_ui(results, forecast_data, paths, args.repeat)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(directory, ignore_errors=True)
+
+    report = {
+        "params": {"cities": args.cities, "days": args.days, "notes": args.notes, "news": args.news,
+                   "repeat": args.repeat},
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("params") != report["params"]:
+            print("Warning: baseline was recorded with different parameters")
+        if compare(results, baseline, args.tolerance, args.min_delta):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import tkinter as tk
+
+from formatters import FORMATS, format_day
+from theming import ROLES, light_theme
+from virtual_grid import VirtualGrid
+
+
+# --- Card text for each weather parameter ---
+def card_param_text(param, day, units="metric"):
+    # One card line, formatted on the spot; CardRenderer.render() is normally
+    # handed a CityTexts with every line already formatted
+    if param not in FORMATS["card"]:
+        return param
+    return format_day("card", param, day, units)
+
+
+def _unthemed(widget, role):
+    # Without a ThemeEngine, widgets get the light theme and keep it
+    widget.configure(**ROLES[role](light_theme))
+    return widget
+
+
+class Card(tk.Frame):
+    # One forecast card. The widget tree is built once and afterwards only
+    # the labels whose text or image actually changed are reconfigured.
+    # With a ThemeEngine, every widget is registered under its role.
+    def __init__(self, parent, on_details, get_image, theme=None):
+        super().__init__(parent, bd=2, relief="groove", padx=10, pady=10)
+        self.get_image = get_image
+        self.themed = theme.register if theme is not None else _unthemed
+        self.themed(self, "card")
+        self.city = None
+        self.day = None
+        self.date = None
+        self.avatar = None
+        self.texts = []
+
+        # Left side: Avatar. The frame reserves the avatar's space while the
+        # image is still loading, so row heights do not jump when it arrives.
+        left_frame = self.themed(tk.Frame(self, width=128, height=128), "surface")
+        left_frame.pack(side="left", padx=10)
+        self.avatar_label = self.themed(tk.Label(left_frame), "card_label")
+
+        # Middle: Info
+        info_frame = self.themed(tk.Frame(self), "surface")
+        info_frame.pack(side="left", fill="both", expand=True)
+        self.date_label = self.themed(tk.Label(info_frame, font=("Arial", 10, "bold")), "card_secondary_label")
+        self.date_label.pack(anchor="w")
+        # Alerts firing on this day; packed only while alert rules exist
+        self.alerts = None
+        self.alert_label = self.themed(tk.Label(info_frame, font=("Arial", 9, "bold"), anchor="w"),
+                                       "card_alert_label")
+
+        # Parameter labels are pooled too; only the first len(texts) are packed
+        self.params_frame = self.themed(tk.Frame(info_frame), "surface")
+        self.params_frame.pack(fill="both", expand=True)
+        self.param_labels = []
+
+        # Button at the bottom of the card
+        button_frame = self.themed(tk.Frame(self), "surface")
+        button_frame.pack(side="bottom", fill="x", pady=(10, 0))
+        self.themed(tk.Button(
+            button_frame,
+            text="See More Details",
+            command=lambda: on_details(self.city, self.day)
+        ), "accent_button").pack(pady=5)
+
+    def set_day(self, city, day, texts, alerts=None):
+        # alerts is the names of the alerts firing on this day, or None
+        # when there are no alert rules at all
+        self.city = city
+        self.day = day
+        if day["date"] != self.date:
+            self.date = day["date"]
+            self.date_label.config(text=self.date)
+        avatar = day.get("avatar", "")
+        if avatar != self.avatar:
+            self.avatar = avatar
+            self._show_avatar(self.get_image(avatar, on_ready=lambda img: self._on_avatar_ready(avatar, img)))
+        if texts != self.texts:
+            self._update_params(texts)
+        if alerts != self.alerts:
+            self._show_alerts(alerts)
+
+    def _on_avatar_ready(self, avatar, img):
+        # The card may have been recycled for another day in the meantime
+        if avatar == self.avatar and self.winfo_exists():
+            self._show_avatar(img)
+
+    def _show_avatar(self, img):
+        if img:
+            self.avatar_label.config(image=img)
+            self.avatar_label.image = img
+            self.avatar_label.pack()
+        else:
+            self.avatar_label.pack_forget()
+
+    def _show_alerts(self, alerts):
+        if alerts is None:
+            self.alert_label.pack_forget()
+        else:
+            # One line whatever the count, so every card keeps the row height
+            text = ""
+            if alerts:
+                text = f"⚠ {alerts[0]}" + (f" (+{len(alerts) - 1})" if len(alerts) > 1 else "")
+            self.alert_label.config(text=text)
+            if self.alerts is None:
+                self.alert_label.pack(anchor="w", after=self.date_label)
+        self.alerts = list(alerts) if alerts is not None else None
+
+    def _update_params(self, texts):
+        old_count = len(self.texts)
+        while len(self.param_labels) < len(texts):
+            self.param_labels.append(self.themed(tk.Label(self.params_frame, anchor="w", wraplength=200),
+                                                 "card_label"))
+        for i, text in enumerate(texts):
+            label = self.param_labels[i]
+            if i >= old_count:
+                label.config(text=text)
+                label.pack(anchor="w")
+            elif self.texts[i] != text:
+                label.config(text=text)
+        for label in self.param_labels[len(texts):old_count]:
+            label.pack_forget()
+        self.texts = list(texts)
+
+
+class CardRenderer:
+    # Retained-mode renderer for the forecast card grid. Cards are pooled by a
+    # VirtualGrid, which only keeps cards for the rows in view, and each Card
+    # diffs itself against its previous contents, so a param toggle, a resize
+    # or a scroll only touches the labels and positions that changed.
+    def __init__(self, parent, canvas, on_details, get_image, scrollbar=None, theme=None):
+        self.on_details = on_details
+        self.get_image = get_image
+        self.theme = theme
+        self.city = None
+        self.params = None
+        self.texts = None
+        self.alerts = None
+        self.grid = VirtualGrid(parent, canvas, self._create_card, self._bind_card,
+                                scrollbar=scrollbar)
+
+    def render(self, city, days, params, num_columns, texts=None, alerts=None):
+        # texts is the city's formatters.CityTexts, so binding a card only
+        # looks its lines up; alerts maps a date to the names of the alerts
+        # firing on it (see alerts.py), or is None without alert rules
+        remeasure = params != self.params or (alerts is None) != (self.alerts is None)
+        self.city = city
+        self.params = list(params)
+        self.texts = texts
+        self.alerts = alerts
+        self.grid.set_items(days, num_columns, remeasure=remeasure)
+
+    def _create_card(self, parent):
+        return Card(parent, self.on_details, self.get_image, self.theme)
+
+    def _bind_card(self, card, day):
+        if self.texts is not None:
+            texts = self.texts.card(day, self.params)
+        else:
+            texts = [card_param_text(p, day) for p in self.params]
+        alerts = self.alerts.get(day["date"], []) if self.alerts is not None else None
+        card.set_day(self.city, day, texts, alerts)
+
+
+class NewsCard(tk.Frame):
+    # A news item card with a drop shadow. Its owner sets the wraplength for
+    # the column width; it is only reconfigured when it actually changes.
+    def __init__(self, parent, theme=None):
+        super().__init__(parent)
+        themed = theme.register if theme is not None else _unthemed
+        themed(self, "window")
+        self.news = None
+        self.wrap = None
+        # Shadow
+        shadow = themed(tk.Frame(self, bd=0, highlightthickness=0), "shadow")
+        shadow.place(relx=0, rely=0, x=8, y=8, relwidth=1, relheight=1)
+        # Card
+        card = themed(tk.Frame(self, bd=0, highlightthickness=0), "card")
+        card.place(relx=0, rely=0, relwidth=1, relheight=1)
+        card.lift()
+        # Title
+        self.title_label = themed(tk.Label(card, font=('Helvetica', 15, 'bold'), justify='left'), "card_label")
+        self.title_label.pack(anchor='w', pady=(18, 2), padx=18)
+        # Date
+        self.date_label = themed(tk.Label(card, font=('Helvetica', 10)), "card_secondary_label")
+        self.date_label.pack(anchor='w', padx=18)
+        # Summary
+        self.summary_label = themed(tk.Label(card, font=('Helvetica', 12), justify='left'), "card_label")
+        self.summary_label.pack(anchor='w', pady=(6, 16), padx=18)
+
+    def set_news(self, news):
+        if news is not self.news:
+            self.news = news
+            self.title_label.config(text=news['title'])
+            self.date_label.config(text=news['date'])
+            self.summary_label.config(text=news['summary'])
+
+    def set_wraplength(self, wrap):
+        if wrap != self.wrap and wrap > 0:
+            self.wrap = wrap
+            self.title_label.config(wraplength=wrap)
+            self.summary_label.config(wraplength=wrap)
@@ -0,0 +1,204 @@
+import csv
+import heapq
+import json
+import os
+
+import numpy as np
+
+from forecast_format import source_key
+
+EARTH_RADIUS_KM = 6371.0088
+# Ranges at most this long are scanned instead of split further
+LEAF_SIZE = 16
+INDEX_VERSION = 1
+
+
+def to_xyz(lat, lon):
+    # Points on the unit sphere; straight-line (chord) distance between them
+    # orders places the same way great-circle distance does
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(np.asarray(chord) / 2, 1.0))
+
+
+def km_to_chord(km):
+    return 2 * np.sin(min(km / EARTH_RADIUS_KM, np.pi) / 2)
+
+
+def read_gazetteer(path):
+    # name,country,lat,lon,population rows; population may be empty
+    names, countries, lat, lon, population = [], [], [], [], []
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            names.append(row["name"])
+            countries.append(row.get("country") or "")
+            lat.append(float(row["lat"]))
+            lon.append(float(row["lon"]))
+            population.append(int(row.get("population") or 0))
+    return names, countries, lat, lon, population
+
+
+class CityIndex:
+    # An offline gazetteer with a KD-tree over the places' positions on the
+    # unit sphere. The tree is implicit: arrays are stored in tree order, and
+    # the node over [lo, hi) splits at mid = (lo + hi) // 2 on axis
+    # split_axis[mid], with [lo, mid) on the low side and (mid, hi) on the
+    # high side. Queries return (distance_km, place) pairs, nearest first,
+    # with place a dict of name, country, lat, lon and population.
+    def __init__(self, names, countries, lat, lon, population, xyz=None, split_axis=None):
+        self.names = np.asarray(names)
+        self.countries = np.asarray(countries)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.population = np.asarray(population, dtype=np.int64)
+        if xyz is None:
+            self._build()
+        else:
+            self.xyz = xyz
+            self.split_axis = split_axis
+        # Plain lists: indexing them from the query loop is much cheaper than
+        # indexing NumPy arrays one element at a time
+        axis = self.split_axis.astype(np.intp)
+        self._split = np.where(axis >= 0, self.xyz[np.arange(len(axis)), np.maximum(axis, 0)], 0.0).tolist()
+        self._axis = self.split_axis.tolist()
+
+    @classmethod
+    def load(cls, path="cities.csv", index_path=None):
+        # The index saved next to the gazetteer when it was built from the
+        # current file, else a fresh build that is saved for next time
+        index_path = index_path or os.path.splitext(path)[0] + ".index.npz"
+        key = source_key(path)
+        try:
+            with np.load(index_path) as saved:
+                if json.loads(str(saved["key"])) == {"version": INDEX_VERSION, **key}:
+                    return cls(saved["names"], saved["countries"], saved["lat"], saved["lon"],
+                               saved["population"], saved["xyz"], saved["split_axis"])
+        except (OSError, ValueError, KeyError):
+            pass
+        index = cls(*read_gazetteer(path))
+        try:
+            index.save(index_path, key)
+        except OSError as e:
+            print(f"Could not save city index: {e}")
+        return index
+
+    def save(self, path, key):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, key=json.dumps({"version": INDEX_VERSION, **key}), names=self.names,
+                     countries=self.countries, lat=self.lat, lon=self.lon, population=self.population,
+                     xyz=self.xyz, split_axis=self.split_axis)
+        os.replace(tmp, path)
+
+    def __len__(self):
+        return len(self.names)
+
+    def subset(self, names):
+        # A smaller index over just these places, e.g. the cities that have a
+        # forecast; names not in the gazetteer are skipped
+        wanted = set(names)
+        rows = [i for i, name in enumerate(self.names.tolist()) if name in wanted]
+        return CityIndex(self.names[rows], self.countries[rows], self.lat[rows], self.lon[rows],
+                         self.population[rows])
+
+    def place(self, i):
+        return {"name": str(self.names[i]), "country": str(self.countries[i]),
+                "lat": float(self.lat[i]), "lon": float(self.lon[i]),
+                "population": int(self.population[i])}
+
+    # --- Queries ---
+    def nearest(self, lat, lon):
+        found = self.k_nearest(lat, lon, 1)
+        return found[0] if found else None
+
+    def k_nearest(self, lat, lon, k):
+        if k <= 0 or not len(self):
+            return []
+        heap = []  # (-chord^2, row): the k best so far, worst on top
+        self._knn(to_xyz(lat, lon).tolist(), k, heap, 0, len(self))
+        return self._results(sorted((-d2, i) for d2, i in heap))
+
+    def within(self, lat, lon, radius_km):
+        limit = float(km_to_chord(radius_km)) ** 2
+        found = []
+        self._radius(to_xyz(lat, lon).tolist(), limit, found, 0, len(self))
+        return self._results(sorted(found))
+
+    def _results(self, found):
+        distances = chord_to_km(np.sqrt([d2 for d2, _ in found]))
+        return [(float(km), self.place(i)) for km, (_, i) in zip(distances, found)]
+
+    def _leaf(self, q, lo, hi):
+        diff = self.xyz[lo:hi] - q
+        return zip(np.einsum("ij,ij->i", diff, diff).tolist(), range(lo, hi))
+
+    def _knn(self, q, k, heap, lo, hi):
+        if hi - lo <= LEAF_SIZE:
+            for d2, i in self._leaf(q, lo, hi):
+                if len(heap) < k:
+                    heapq.heappush(heap, (-d2, i))
+                elif d2 < -heap[0][0]:
+                    heapq.heapreplace(heap, (-d2, i))
+            return
+        mid = (lo + hi) // 2
+        x, y, z = self.xyz[mid].tolist()
+        d2 = (q[0] - x) ** 2 + (q[1] - y) ** 2 + (q[2] - z) ** 2
+        if len(heap) < k:
+            heapq.heappush(heap, (-d2, mid))
+        elif d2 < -heap[0][0]:
+            heapq.heapreplace(heap, (-d2, mid))
+        gap = q[self._axis[mid]] - self._split[mid]
+        near, far = ((lo, mid), (mid + 1, hi)) if gap < 0 else ((mid + 1, hi), (lo, mid))
+        self._knn(q, k, heap, *near)
+        # The far side can only help if the splitting plane is closer than
+        # the worst of the k found so far
+        if len(heap) < k or gap * gap < -heap[0][0]:
+            self._knn(q, k, heap, *far)
+
+    def _radius(self, q, limit, found, lo, hi):
+        if hi - lo <= LEAF_SIZE:
+            found.extend((d2, i) for d2, i in self._leaf(q, lo, hi) if d2 <= limit)
+            return
+        mid = (lo + hi) // 2
+        x, y, z = self.xyz[mid].tolist()
+        d2 = (q[0] - x) ** 2 + (q[1] - y) ** 2 + (q[2] - z) ** 2
+        if d2 <= limit:
+            found.append((d2, mid))
+        gap = q[self._axis[mid]] - self._split[mid]
+        if gap < 0 or gap * gap <= limit:
+            self._radius(q, limit, found, lo, mid)
+        if gap >= 0 or gap * gap <= limit:
+            self._radius(q, limit, found, mid + 1, hi)
+
+    # --- Building ---
+    def _build(self):
+        xyz = to_xyz(self.lat, self.lon)
+        n = len(xyz)
+        order = np.arange(n)
+        split_axis = np.full(n, -1, dtype=np.int8)
+        ranges = [(0, n)]
+        while ranges:
+            lo, hi = ranges.pop()
+            if hi - lo <= LEAF_SIZE:
+                continue
+            rows = order[lo:hi]
+            points = xyz[rows]
+            # Split the widest axis at its median
+            axis = int(np.argmax(np.ptp(points, axis=0)))
+            mid = (lo + hi) // 2
+            order[lo:hi] = rows[np.argpartition(points[:, axis], mid - lo)]
+            split_axis[mid] = axis
+            ranges.append((lo, mid))
+            ranges.append((mid + 1, hi))
+        self.xyz = np.ascontiguousarray(xyz[order])
+        self.split_axis = split_axis
+        self.names = self.names[order]
+        self.countries = self.countries[order]
+        self.lat = self.lat[order]
+        self.lon = self.lon[order]
+        self.population = self.population[order]
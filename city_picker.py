@@ -0,0 +1,308 @@
+import difflib
+import re
+import threading
+import tkinter as tk
+import unicodedata
+from bisect import bisect_left
+
+import numpy as np
+
+from theming import ROLES, light_theme
+
+# Sorts after every character a city name can contain
+_HIGHEST = "\U0010ffff"
+# Where a later word of a name starts: "Bandar Abbas", "Khomeyni-Shahr"
+_WORD_START = re.compile(r"[\s\-'’/(]+(?=\w)")
+# Below this many names fuzzy matching just asks difflib
+_TRIGRAM_MIN = 5000
+
+
+def _unthemed(widget, role):
+    widget.configure(**ROLES[role](light_theme))
+    return widget
+
+
+def normalize(text):
+    # The form names are matched in: case-folded, without accents
+    if text.isascii():
+        return text.casefold()
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CityMatcher:
+    # Type-ahead matching over a fixed list of names. Two sorted indexes are
+    # searched with bisect: the whole names, and every later word of a name
+    # ("abb" finds "Bandar Abbas"). Whole-name matches come first, each group
+    # in alphabetical order. A query that extends the previous one only
+    # searches inside the previous result ranges, so typing narrows the
+    # search keystroke by keystroke. When nothing matches, fuzzy() ranks
+    # names by shared trigrams and then by difflib similarity; its trigram
+    # index is built on a background thread.
+    def __init__(self, names):
+        self.names = list(names)
+        self.keys = [normalize(name) for name in self.names]
+        full = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+        self.full_keys = [self.keys[i] for i in full]
+        self.full_ids = full
+        words = []
+        for i, key in enumerate(self.keys):
+            for match in _WORD_START.finditer(key):
+                words.append((key[match.end():], i))
+        words.sort()
+        self.word_keys = [key for key, _ in words]
+        self.word_ids = [i for _, i in words]
+        self._last = ("", (0, len(self.full_keys)), (0, len(self.word_keys)))
+        self._postings = None  # trigram -> array of ids, once built
+        if len(self.names) >= _TRIGRAM_MIN:
+            threading.Thread(target=self._build_trigrams, name="city-trigrams", daemon=True).start()
+
+    def matches(self, query):
+        # ids of the names matching query, whole-name matches first
+        q = normalize(query.strip())
+        if not q:
+            return list(self.full_ids)
+        last_q, full_range, word_range = self._last
+        if not q.startswith(last_q):
+            full_range, word_range = (0, len(self.full_keys)), (0, len(self.word_keys))
+        full_range = self._range(self.full_keys, q, *full_range)
+        word_range = self._range(self.word_keys, q, *word_range)
+        self._last = (q, full_range, word_range)
+        ids = self.full_ids[full_range[0]:full_range[1]]
+        keys = self.keys
+        # A name whose whole key matches is already listed once
+        ids.extend(i for i in self.word_ids[word_range[0]:word_range[1]] if not keys[i].startswith(q))
+        return ids
+
+    def matches_one(self, i, query):
+        q = normalize(query.strip())
+        key = self.keys[i]
+        return key.startswith(q) or any(key[m.end():].startswith(q) for m in _WORD_START.finditer(key))
+
+    def fuzzy(self, query, limit=20):
+        # ids of the names most like query, best first
+        q = normalize(query.strip())
+        if not q:
+            return []
+        if len(self.names) < _TRIGRAM_MIN:
+            candidates = range(len(self.keys))
+        elif self._postings is None:
+            return []  # still building
+        else:
+            postings = [self._postings[t] for t in _trigrams(q) if t in self._postings]
+            if not postings:
+                return []
+            counts = np.bincount(np.concatenate(postings), minlength=len(self.keys))
+            top = min(len(counts) - 1, limit * 4)
+            candidates = np.argpartition(-counts, top)[:top + 1]
+            candidates = candidates[counts[candidates] > 0].tolist()
+        matcher = difflib.SequenceMatcher(b=q)
+        scored = []
+        for i in candidates:
+            matcher.set_seq1(self.keys[i])
+            if matcher.real_quick_ratio() >= 0.5 and matcher.quick_ratio() >= 0.5:
+                ratio = matcher.ratio()
+                if ratio >= 0.5:
+                    scored.append((-ratio, self.keys[i], i))
+        scored.sort()
+        return [i for _, _, i in scored[:limit]]
+
+    def _range(self, keys, q, lo, hi):
+        start = bisect_left(keys, q, lo, hi)
+        return start, bisect_left(keys, q + _HIGHEST, start, hi)
+
+    def _build_trigrams(self):
+        postings = {}
+        for i, key in enumerate(self.keys):
+            for trigram in _trigrams(key):
+                ids = postings.get(trigram)
+                if ids is None:
+                    postings[trigram] = [i]
+                else:
+                    ids.append(i)
+        self._postings = {trigram: np.array(ids, dtype=np.int32) for trigram, ids in postings.items()}
+
+
+class CityPicker(tk.Frame):
+    # A type-ahead entry for choosing one city out of thousands. Each
+    # keystroke recomputes the suggestions from a CityMatcher, recently
+    # picked cities first, and shows them in a dropdown that only ever holds
+    # max_rows Listbox rows: scrolling rebinds those rows to another window
+    # of the suggestions. Picking a city sets `variable`, so everything that
+    # traces it refreshes as before; setting the variable elsewhere updates
+    # the entry and the recent list too.
+    def __init__(self, parent, variable, cities, theme=None, max_rows=10, max_recent=8, width=24):
+        super().__init__(parent)
+        themed = theme.register if theme is not None else _unthemed
+        themed(self, "surface")
+        self.variable = variable
+        self.matcher = CityMatcher(cities)
+        self.index = {name: i for i, name in enumerate(self.matcher.names)}
+        self.max_rows = max_rows
+        self.max_recent = max_recent
+        self.recent = []  # ids, most recent first
+        self.items = []  # ids of the current suggestions
+        self.top = 0  # first suggestion shown in the dropdown
+        self.active = 0  # suggestion picked by Return
+        self._setting = False
+
+        self.query = tk.StringVar(value=variable.get())
+        self.entry = themed(tk.Entry(self, textvariable=self.query, width=width), "input")
+        self.entry.pack(fill="x")
+
+        self.dropdown = themed(tk.Toplevel(self), "window")
+        self.dropdown.withdraw()
+        self.dropdown.overrideredirect(True)
+        self.listbox = themed(tk.Listbox(self.dropdown, height=max_rows, activestyle="none",
+                                         exportselection=False), "list")
+        self.scrollbar = themed(tk.Scrollbar(self.dropdown, orient="vertical", command=self._on_scrollbar),
+                                "scrollbar")
+        self.scrollbar.pack(side="right", fill="y")
+        self.listbox.pack(side="left", fill="both", expand=True)
+
+        self.query.trace_add("write", lambda *args: self._on_query())
+        variable.trace_add("write", lambda *args: self._on_selected())
+        self._remember(variable.get())
+        self.entry.bind("<Down>", lambda e: self._move(1))
+        self.entry.bind("<Up>", lambda e: self._move(-1))
+        self.entry.bind("<Next>", lambda e: self._move(self.max_rows))
+        self.entry.bind("<Prior>", lambda e: self._move(-self.max_rows))
+        self.entry.bind("<Return>", lambda e: self._pick_active())
+        self.entry.bind("<Escape>", lambda e: self.close())
+        self.entry.bind("<FocusIn>", lambda e: self.entry.select_range(0, tk.END))
+        self.entry.bind("<FocusOut>", lambda e: self.after(150, self._close_unless_focused))
+        self.listbox.bind("<ButtonRelease-1>", self._on_click)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.listbox.bind(sequence, self._on_wheel)
+
+    # --- Suggestions ---
+    def suggestions(self, query):
+        # Suggestion ids for query: recent matches first, then the rest;
+        # fuzzy matches when nothing starts with query
+        ids = self.matcher.matches(query)
+        if not ids:
+            return self.matcher.fuzzy(query)
+        recent = [i for i in self.recent if not query.strip() or self.matcher.matches_one(i, query)]
+        if not recent:
+            return ids
+        seen = set(recent)
+        return recent + [i for i in ids if i not in seen]
+
+    def open(self):
+        self.items = self.suggestions(self.query.get())
+        self.top = 0
+        self.active = 0
+        if not self.items:
+            self.close()
+            return
+        rows = min(self.max_rows, len(self.items))
+        self.listbox.configure(height=rows)
+        self._render()
+        x = self.entry.winfo_rootx()
+        y = self.entry.winfo_rooty() + self.entry.winfo_height()
+        self.dropdown.geometry(f"{max(self.entry.winfo_width(), 160)}x{self.listbox.winfo_reqheight()}+{x}+{y}")
+        self.dropdown.deiconify()
+        self.dropdown.lift()
+
+    def close(self):
+        self.dropdown.withdraw()
+        self._set_query(self.variable.get())
+
+    def pick(self, i):
+        self.dropdown.withdraw()
+        name = self.matcher.names[i]
+        if name == self.variable.get():
+            self._set_query(name)
+        else:
+            self.variable.set(name)
+
+    # --- Dropdown rows ---
+    def _render(self):
+        rows = int(self.listbox.cget("height"))
+        names = self.matcher.names
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(tk.END, *(names[i] for i in self.items[self.top:self.top + rows]))
+        if self.top <= self.active < self.top + rows:
+            self.listbox.selection_set(self.active - self.top)
+        count = len(self.items)
+        self.scrollbar.set(self.top / count, min(1.0, (self.top + rows) / count))
+
+    def _scroll_to(self, top):
+        rows = int(self.listbox.cget("height"))
+        top = max(0, min(top, len(self.items) - rows))
+        if top != self.top:
+            self.top = top
+            self._render()
+
+    def _move(self, delta):
+        if not self.dropdown.winfo_viewable():
+            self.open()
+            return "break"
+        if not self.items:
+            return "break"
+        self.active = max(0, min(self.active + delta, len(self.items) - 1))
+        rows = int(self.listbox.cget("height"))
+        if self.active < self.top:
+            self._scroll_to(self.active)
+        elif self.active >= self.top + rows:
+            self._scroll_to(self.active - rows + 1)
+        self._render()
+        return "break"
+
+    def _pick_active(self):
+        if self.dropdown.winfo_viewable() and self.items:
+            self.pick(self.items[self.active])
+        return "break"
+
+    def _on_click(self, event):
+        row = self.listbox.nearest(event.y)
+        if 0 <= self.top + row < len(self.items):
+            self.pick(self.items[self.top + row])
+
+    def _on_wheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self._scroll_to(self.top - 3)
+        else:
+            self._scroll_to(self.top + 3)
+        return "break"
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        rows = int(self.listbox.cget("height"))
+        if action == "moveto":
+            self._scroll_to(int(float(amount) * len(self.items)))
+        elif action == "scroll":
+            step = rows if unit == "pages" else 1
+            self._scroll_to(self.top + int(amount) * step)
+
+    # --- State ---
+    def _on_query(self):
+        if not self._setting:
+            self.open()
+
+    def _on_selected(self):
+        name = self.variable.get()
+        self._remember(name)
+        self._set_query(name)
+
+    def _remember(self, name):
+        i = self.index.get(name)
+        if i is not None:
+            self.recent = [i] + [j for j in self.recent if j != i][:self.max_recent - 1]
+
+    def _set_query(self, text):
+        self._setting = True
+        try:
+            self.query.set(text)
+        finally:
+            self._setting = False
+
+    def _close_unless_focused(self):
+        focus = self.focus_get()
+        if focus is not self.entry and focus is not self.listbox:
+            if self.dropdown.winfo_viewable():
+                self.close()
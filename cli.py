@@ -0,0 +1,225 @@
+# Command-line queries over the same data as the GUI, for scripts and cron
+# jobs. Prints a table, JSON or CSV:
+#   python cli.py forecast Tehran Karaj --days 3
+#   python cli.py forecast --all --fields avatar,temperature_max,aqi --format csv
+#   python cli.py notes Tehran --format json
+#   python cli.py notes --search "heavy rain"
+#   python cli.py cities
+# main.py hands its arguments to this when it is given any. Nothing here
+# imports tkinter or PIL, and every heavier module is imported by the
+# command that needs it: answering from an up-to-date forecast snapshot
+# only needs the standard library, and NumPy is only loaded to (re)build a
+# stale snapshot.
+import argparse
+import os
+import sys
+
+# Columns shown by `forecast` without --fields
+DEFAULT_FIELDS = ["avatar", "temperature_min", "temperature_max", "temperature_current",
+                  "humidity", "precipitation_probability", "wind_speed", "aqi"]
+
+
+class CliError(Exception):
+    pass
+
+
+# --- Data ---
+def open_forecast(path):
+    # The forecast behind path: read straight from its snapshot when that
+    # was built from the current file, else loaded (and the snapshot
+    # rebuilt) through forecast_snapshot, as the GUI does
+    from forecast_format import SnapshotReader, source_key
+
+    try:
+        reader = SnapshotReader(os.path.splitext(path)[0] + ".snapshot")
+        key, quick = reader.header["key"], source_key(path, with_hash=False)
+        if key["mtime_ns"] == quick["mtime_ns"] and key["size"] == quick["size"]:
+            return reader
+        reader.close()
+    except (OSError, ValueError, KeyError):
+        pass
+    if not os.path.exists(path):
+        raise CliError(f"no forecast file at {path}")
+    from contextlib import redirect_stdout
+
+    from forecast_snapshot import load_forecast
+    # Keep load messages out of the output
+    with redirect_stdout(sys.stderr):
+        return load_forecast(path)
+
+
+def open_notes(path):
+    if not os.path.exists(path):
+        raise CliError(f"no notes database at {path}")
+    import sqlite3
+
+    from notes_store import NotesStore
+    try:
+        # Read-only: a query never migrates or writes to the database
+        return NotesStore(path, read_only=True)
+    except sqlite3.DatabaseError as e:
+        raise CliError(f"cannot read notes from {path}: {e}") from e
+
+
+def wanted_cities(args, known):
+    # The cities named on the command line or in --cities-file, or every
+    # known one with --all; names not in known are reported and skipped,
+    # and with known=None every name is taken
+    if args.all:
+        return list(known), []
+    names = list(args.cities)
+    if args.cities_file:
+        f = sys.stdin if args.cities_file == "-" else open(args.cities_file, "r", encoding="utf-8")
+        with f:
+            names.extend(line.strip() for line in f if line.strip())
+    if not names:
+        raise CliError("name at least one city, or use --all or --cities-file")
+    if known is None:
+        return names, []
+    missing = [name for name in names if name not in known]
+    return [name for name in names if name in known], missing
+
+
+# --- Commands ---
+def cmd_forecast(args):
+    from forecast_format import LABELS, METRICS
+
+    known = ["avatar", *METRICS, *LABELS]
+    fields = known if args.fields == "all" else [f.strip() for f in args.fields.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in known]
+    if unknown:
+        raise CliError(f"unknown fields: {', '.join(unknown)} (choose from {', '.join(known)})")
+    forecast = open_forecast(args.forecast)
+    cities, missing = wanted_cities(args, forecast.city_index)
+    names = ["date"] + fields
+
+    def rows():
+        # Only the requested columns of each city are read
+        for city in cities:
+            columns = forecast.columns(city, names, args.days)
+            for values in zip(*(columns[name] for name in names)):
+                yield [city, *values]
+    write_rows(["city"] + names, rows(), args.format)
+    return missing
+
+
+def cmd_notes(args):
+    if not (args.search or args.all or args.cities or args.cities_file):
+        raise CliError("name at least one city, or use --all, --cities-file or --search")
+    notes = open_notes(args.notes_db)
+    missing = []
+    try:
+        if args.search:
+            search = notes.search(args.search)
+            rows = []
+            while not search.done:
+                rows.extend(list(row) for row in search.next_page())
+        elif args.all:
+            rows = [list(row) for row in notes.get_all_notes()]
+        else:
+            cities, missing = wanted_cities(args, None)
+            rows = [[note_id, city, note] for city in cities for note_id, note in notes.get_notes(city)]
+        write_rows(["id", "city", "note"], rows, args.format)
+    finally:
+        notes.close()
+    return missing
+
+
+def cmd_cities(args):
+    forecast = open_forecast(args.forecast)
+    write_rows(["city", "days"], ([city, int(days)] for city, days in zip(forecast.cities, forecast.lengths)),
+               args.format)
+    return []
+
+
+# --- Output ---
+def write_rows(columns, rows, fmt, out=None):
+    out = out or sys.stdout
+    if fmt == "csv":
+        import csv
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(columns)
+        writer.writerows(rows)
+    elif fmt == "json":
+        import json
+        # One object per line inside the array, written as rows come
+        out.write("[")
+        for i, row in enumerate(rows):
+            out.write(",\n " if i else "\n ")
+            out.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+        out.write("\n]\n")
+    else:
+        rows = [[str(value) for value in row] for row in rows]
+        widths = [max([len(column)] + [len(row[i]) for row in rows]) for i, column in enumerate(columns)]
+        numeric = [all(_is_number(row[i]) for row in rows) and bool(rows) for i in range(len(columns))]
+
+        def line(values):
+            return "  ".join(value.rjust(width) if right else value.ljust(width)
+                             for value, width, right in zip(values, widths, numeric)).rstrip()
+        out.write(line(columns) + "\n")
+        out.write("  ".join("-" * width for width in widths) + "\n")
+        for row in rows:
+            out.write(line(row) + "\n")
+
+
+def _is_number(text):
+    try:
+        float(text)
+    except ValueError:
+        return False
+    return True
+
+
+# --- Arguments ---
+def build_parser():
+    parser = argparse.ArgumentParser(description="Query forecasts and notes without the GUI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(sub, cities=True):
+        sub.add_argument("--format", choices=("table", "json", "csv"), default="table")
+        if cities:
+            sub.add_argument("cities", nargs="*", metavar="CITY")
+            sub.add_argument("--all", action="store_true", help="every city")
+            sub.add_argument("--cities-file", metavar="FILE", help="one city per line; - reads stdin")
+
+    forecast = commands.add_parser("forecast", help="forecast days of one or more cities")
+    add_common(forecast)
+    forecast.add_argument("--forecast", default="forcast_data.json", metavar="PATH")
+    forecast.add_argument("--days", type=int, default=None, help="at most this many days per city")
+    forecast.add_argument("--fields", default=",".join(DEFAULT_FIELDS),
+                          help="comma-separated columns, or 'all' (default: %(default)s)")
+    forecast.set_defaults(run=cmd_forecast)
+
+    notes = commands.add_parser("notes", help="notes of one or more cities, or a full-text search")
+    add_common(notes)
+    notes.add_argument("--notes-db", default="weather_notes.db", metavar="PATH")
+    notes.add_argument("--search", metavar="TEXT", help="ranked search over every city's notes")
+    notes.set_defaults(run=cmd_notes)
+
+    cities = commands.add_parser("cities", help="the cities that have a forecast")
+    add_common(cities, cities=False)
+    cities.add_argument("--forecast", default="forcast_data.json", metavar="PATH")
+    cities.set_defaults(run=cmd_cities)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        missing = args.run(args)
+        sys.stdout.flush()
+    except CliError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    except BrokenPipeError:
+        # The reader went away (e.g. `| head`); stop quietly
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
+    for name in missing:
+        print(f"unknown city: {name}", file=sys.stderr)
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,336 @@
+import queue
+import tkinter as tk
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageDraw, ImageTk
+
+from formatters import CONVERTED, NUMBER_FORMATS, conversion
+from virtual_grid import VirtualGrid
+
+# Metrics a tile can chart, by column name -> (label, line colour, unit when
+# the column has no unit label of its own)
+DASHBOARD_METRICS = {
+    "temperature_max": ("Max temp", (231, 76, 60), ""),
+    "temperature_min": ("Min temp", (52, 152, 219), ""),
+    "precipitation_probability": ("Rain chance", (41, 128, 185), "%"),
+    "humidity": ("Humidity", (22, 160, 133), "%"),
+    "wind_speed": ("Wind", (127, 140, 141), ""),
+    "uv_index": ("UV index", (243, 156, 18), ""),
+    "aqi": ("AQI", (142, 68, 173), ""),
+}
+DEFAULT_METRICS = ("temperature_max", "precipitation_probability", "aqi")
+
+# Size of one sparkline at 1x, in px, and the width a tile is laid out for
+SPARKLINE_SIZE = (150, 28)
+TILE_WIDTH = 240
+
+
+# --- Sparkline images ---
+def render_sparkline(values, width, height, color, supersample=2):
+    # A line through values scaled to fill width x height, with a faint fill
+    # under it and a dot on the last value, on a transparent background.
+    # Drawn at supersample x the size and box-filtered down, which
+    # antialiases it for a fraction of a resample's cost.
+    if not values:
+        return Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    s = supersample
+    img = Image.new("RGBA", (width * s, height * s), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    pad = 3 * s
+    lo, hi = min(values), max(values)
+    span = (hi - lo) or 1
+    step = (width * s - 2 * pad) / max(1, len(values) - 1)
+    points = [(pad + i * step, height * s - pad - (v - lo) * (height * s - 2 * pad) / span)
+              for i, v in enumerate(values)]
+    if len(points) > 1:
+        draw.polygon(points + [(points[-1][0], height * s), (points[0][0], height * s)], fill=color + (40,))
+        draw.line(points, fill=color + (255,), width=2 * s, joint="curve")
+    x, y = points[-1]
+    draw.ellipse((x - 2 * s, y - 2 * s, x + 2 * s, y + 2 * s), fill=color + (255,))
+    return img.reduce(s) if s > 1 else img
+
+
+class SparklineCache:
+    # Sparkline PhotoImages by (city, metric, data version, size). Misses are
+    # drawn by render_sparkline() on a small thread pool and turned into
+    # PhotoImages on the main loop through root.after, as ImageService does
+    # for avatars, so scrolling never waits on PIL. At most max_entries
+    # images are kept, least recently used first out; widgets showing one
+    # keep their own reference.
+    def __init__(self, root, max_entries=4096, max_workers=2, poll_interval=16):
+        self.root = root
+        self.max_entries = max_entries
+        self.poll_interval = poll_interval
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sparklines")
+        self.images = OrderedDict()  # key -> PhotoImage
+        self.pending = {}  # key -> [callbacks]
+        self.results = queue.Queue()
+        self.hits = 0
+        self.misses = 0
+        self._polling = False
+
+    def get(self, key, values, color, on_ready=None):
+        # Returns the PhotoImage of key if it is in memory. Otherwise starts
+        # drawing values, returns None and calls on_ready(photo) on the main
+        # loop once it is done. key ends with the image's (width, height).
+        photo = self.images.get(key)
+        if photo is not None:
+            self.hits += 1
+            self.images.move_to_end(key)
+            return photo
+        callbacks = self.pending.get(key)
+        if callbacks is None:
+            self.misses += 1
+            callbacks = self.pending[key] = []
+            width, height = key[-1]
+            future = self.executor.submit(render_sparkline, values, width, height, color)
+            future.add_done_callback(lambda f: self.results.put((key, f)))
+            self._schedule_poll()
+        if on_ready is not None:
+            callbacks.append(on_ready)
+        return None
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # --- Main-thread side ---
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        while True:
+            try:
+                key, future = self.results.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                photo = ImageTk.PhotoImage(future.result())
+            except Exception as e:
+                print(f"Could not draw sparkline {key[:2]}: {e}")
+                photo = None
+            if photo is not None:
+                self.images[key] = photo
+                while len(self.images) > self.max_entries:
+                    self.images.popitem(last=False)
+            for callback in self.pending.pop(key, []):
+                callback(photo)
+        if self.pending:
+            self.root.after(self.poll_interval, self._poll)
+        else:
+            self._polling = False
+
+
+# --- Tiles ---
+class DashboardTile(tk.Frame):
+    # One city of the dashboard: its name and a row per chosen metric with
+    # the metric's range as text and its sparkline. Like Card, the rows are
+    # pooled and only the parts whose text or image changed are reconfigured;
+    # a sparkline still being drawn shows a blank image of the same size.
+    def __init__(self, parent, theme, get_sparkline, placeholder, on_open):
+        super().__init__(parent, bd=2, relief="groove", padx=8, pady=6, cursor="hand2")
+        self.theme = theme
+        self.get_sparkline = get_sparkline
+        self.placeholder = placeholder
+        self.on_open = on_open
+        self.city = None
+        self.lines = []  # (text, key) per shown row
+        self.rows = []  # (frame, text label, image label)
+        theme.register(self, "card")
+        self.city_label = theme.register(tk.Label(self, font=("Arial", 11, "bold"), anchor="w"), "card_label")
+        self.city_label.pack(fill="x")
+        for widget in (self, self.city_label):
+            widget.bind("<Button-1>", self._clicked)
+
+    def set_city(self, city, lines):
+        # lines is [(text, key, values, color)], one per metric
+        if city != self.city:
+            self.city = city
+            self.city_label.config(text=city)
+        while len(self.rows) < len(lines):
+            self.rows.append(self._create_row())
+        for i, (text, key, values, color) in enumerate(lines):
+            frame, text_label, image_label = self.rows[i]
+            old = self.lines[i] if i < len(self.lines) else None
+            if old is None:
+                frame.pack(fill="x")
+            if old is None or old[0] != text:
+                text_label.config(text=text)
+            if old is None or old[1] != key:
+                photo = self.get_sparkline(key, values, color,
+                                           on_ready=lambda photo, i=i, key=key: self._on_sparkline_ready(i, key, photo))
+                self._show_sparkline(image_label, photo)
+        for frame, _, _ in self.rows[len(lines):len(self.lines)]:
+            frame.pack_forget()
+        self.lines = [(text, key) for text, key, _, _ in lines]
+
+    def _create_row(self):
+        frame = self.theme.register(tk.Frame(self), "surface")
+        text_label = self.theme.register(tk.Label(frame, anchor="w", font=("Arial", 9)), "card_secondary_label")
+        text_label.pack(fill="x")
+        image_label = self.theme.register(tk.Label(frame, bd=0, anchor="w"), "card_label")
+        image_label.pack(fill="x")
+        for widget in (frame, text_label, image_label):
+            widget.bind("<Button-1>", self._clicked)
+        return frame, text_label, image_label
+
+    def _clicked(self, event):
+        if self.city is not None:
+            self.on_open(self.city)
+
+    def _on_sparkline_ready(self, i, key, photo):
+        # The tile may have been recycled for another city in the meantime
+        if i < len(self.lines) and self.lines[i][1] == key and self.winfo_exists():
+            self._show_sparkline(self.rows[i][2], photo)
+
+    def _show_sparkline(self, label, photo):
+        photo = photo or self.placeholder
+        label.config(image=photo)
+        label.image = photo
+
+
+# --- View ---
+class DashboardView(tk.Frame):
+    # Every city side by side, one tile each, with sparklines of the chosen
+    # metrics over the forecast days. Built once and kept between visits,
+    # like NewsView. Tiles only exist for the rows in view (see
+    # virtual_grid.py) and are rebound as the grid scrolls; a city's
+    # sparklines are drawn once per forecast, since get_store(city) only
+    # returns a new store when the city's forecast changed, and each store
+    # gets its own data version. Clicking a tile calls on_open(city).
+    def __init__(self, parent, cities, get_store, get_units, sparklines, scheduler, theme, on_open, on_back,
+                 metrics=DEFAULT_METRICS, resize_delay=150):
+        super().__init__(parent)
+        theme.register(self, "window")
+        self.cities = cities
+        self.get_store = get_store
+        self.get_units = get_units
+        self.scheduler = scheduler
+        self.shown = False
+        self.num_columns = None
+        self._versions = weakref.WeakKeyDictionary()  # store -> data version
+        self._next_version = 0
+
+        scale = 2 if float(self.tk.call("tk", "scaling")) >= 2.0 else 1
+        self.sparkline_size = (SPARKLINE_SIZE[0] * scale, SPARKLINE_SIZE[1] * scale)
+        self.sparklines = sparklines
+        self.placeholder = tk.PhotoImage(width=self.sparkline_size[0], height=self.sparkline_size[1])
+
+        theme.register(tk.Label(self, text="Dashboard", font=('Helvetica', 26, 'bold')),
+                       "label").pack(pady=(30, 10))
+
+        # Metric choice
+        bar = theme.register(tk.Frame(self), "window")
+        bar.pack(fill="x", padx=16, pady=(0, 8))
+        self.metric_vars = {}
+        for name, (label, _, _) in DASHBOARD_METRICS.items():
+            var = self.metric_vars[name] = tk.BooleanVar(value=name in metrics)
+            theme.register(tk.Checkbutton(bar, text=label, variable=var, command=self.invalidate),
+                           "choice").pack(side="left", padx=(0, 6))
+
+        # Back to Main button
+        back_button = tk.Button(self, text="Back to Main",
+                                command=on_back,
+                                font=('Helvetica', 12, 'bold'),
+                                relief='flat',
+                                bd=0,
+                                padx=18,
+                                pady=8,
+                                cursor='hand2')
+        theme.register(back_button, "accent_button")
+        back_button.pack(side="bottom", pady=(10, 30))
+
+        # Tile grid
+        self.canvas = theme.register(tk.Canvas(self, highlightthickness=0, bd=0), "canvas")
+        scrollbar = theme.register(tk.Scrollbar(self, orient="vertical", command=self.canvas.yview), "scrollbar")
+        self.grid_frame = theme.register(tk.Frame(self.canvas), "window")
+        grid_frame_id = self.canvas.create_window((0, 0), window=self.grid_frame, anchor="nw")
+        self.tile_grid = VirtualGrid(self.grid_frame, self.canvas,
+                                     create_cell=lambda parent: DashboardTile(parent, theme, self.sparklines.get,
+                                                                              self.placeholder, on_open),
+                                     bind_cell=self._bind_tile,
+                                     # Every tile has a row per chosen metric, so
+                                     # one is enough to measure (and starts one
+                                     # city's sparklines rather than a sample's)
+                                     scrollbar=scrollbar, padx=8, pady=8, measure_sample=1)
+
+        def on_grid_configure(event):
+            # Scrollregion comes from the row heights, not a measured bbox
+            self.canvas.configure(scrollregion=(0, 0, event.width, self.tile_grid.total_height()))
+        self.grid_frame.bind("<Configure>", on_grid_configure, add="+")
+        self.canvas.bind("<Configure>", lambda e: self.canvas.itemconfig(grid_frame_id, width=e.width), add="+")
+        self.canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        scheduler.register("dashboard", self.render)
+        self.bind('<Configure>', lambda e: scheduler.invalidate_later(resize_delay, "dashboard"))
+
+    def metrics(self):
+        return [name for name, var in self.metric_vars.items() if var.get()]
+
+    def show(self, **pack):
+        self.pack(fill=tk.BOTH, expand=True, **pack)
+        self.shown = True
+        self.invalidate()
+
+    def hide(self):
+        self.shown = False
+        self.pack_forget()
+
+    def invalidate(self):
+        # Rebinds the tiles in view, e.g. after a forecast, unit or metric
+        # change; parts of a tile that did not change are left alone
+        self.num_columns = None
+        self.scheduler.invalidate("dashboard")
+
+    def version(self, store):
+        version = self._versions.get(store)
+        if version is None:
+            version = self._versions[store] = self._next_version
+            self._next_version += 1
+        return version
+
+    # --- Rendering ---
+    def render(self):
+        if not self.shown:
+            return
+        width = self.canvas.winfo_width() or self.winfo_width() or 800
+        num_columns = max(1, width // TILE_WIDTH)
+        if num_columns != self.num_columns:
+            remeasure = self.num_columns is None
+            self.num_columns = num_columns
+            self.tile_grid.set_items(self.cities, num_columns, remeasure=remeasure)
+
+    def _bind_tile(self, tile, city):
+        store = self.get_store(city)
+        if store is None:
+            tile.set_city(city, [])
+            return
+        units = self.get_units()
+        metrics = self.metrics()
+        names = list(metrics)
+        for name in metrics:
+            if name in CONVERTED:
+                names.append(CONVERTED[name])
+        columns = store.columns(city, names)
+        version = self.version(store)
+        lines = []
+        for name in metrics:
+            label, color, unit = DASHBOARD_METRICS[name]
+            values = columns[name]
+            text = label
+            if values:
+                lo, hi = min(values), max(values)
+                fmt = "%g"
+                if name in CONVERTED:
+                    # Converting is linear, so only the text needs it
+                    scale, offset, unit = conversion(columns[CONVERTED[name]][0], units)
+                    lo, hi = lo * scale + offset, hi * scale + offset
+                    fmt = NUMBER_FORMATS.get(unit, "%g")
+                    unit = unit if unit.startswith("°") else " " + unit
+                text = f"{label}: {fmt % lo}–{fmt % hi}{unit}"
+            lines.append((text, (city, name, version, self.sparkline_size), values, color))
+        tile.set_city(city, lines)
@@ -0,0 +1,201 @@
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import ttk
+
+from hourly_charts import HourlyPanel
+
+# Detail label shown for each top-level field of a forecast day
+DETAIL_FIELDS = {
+    "temperature": "Temperature",
+    "atmospheric_pressure": "Atmospheric Pressure",
+    "humidity": "Humidity",
+    "precipitation": "Precipitation",
+    "wind": "Wind",
+    "cloud_cover": "Cloud Cover",
+    "uv_index": "UV Index",
+    "air_quality": "Air Quality",
+}
+
+
+class DetailWindow:
+    # One "Weather Details" Toplevel, built once with a label per detail
+    # field. show() relabels it for another city and day; only labels whose
+    # text differs are reconfigured. Closing it withdraws the window instead
+    # of destroying it, so the pool can hand it out again. With an hourly
+    # store, the day's hourly series are charted under the details.
+    def __init__(self, root, labels, set_avatar, on_close, theme=None, hourly=None, get_units=None):
+        self.set_avatar = set_avatar
+        self.city = None
+        self.date = None
+        self.day_data = None
+        self.avatar = None
+        self.texts = {}  # label -> text shown
+
+        self.window = tk.Toplevel(root)
+        self.window.withdraw()
+        self.window.geometry("400x600" if hourly is None else "440x800")
+        self.window.protocol("WM_DELETE_WINDOW", lambda: on_close(self))
+        if theme is not None:
+            theme.register(self.window, "window")
+
+        # Create main frame with canvas and vertical scrollbar
+        main_frame = ttk.Frame(self.window, padding="0")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        canvas = tk.Canvas(main_frame)
+        if theme is not None:
+            theme.register(canvas, "canvas")
+        scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=canvas.yview)
+        scrollable_frame = ttk.Frame(canvas)
+        scrollable_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
+        canvas.configure(yscrollcommand=scrollbar.set)
+        canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        self.canvas = canvas
+
+        inner = ttk.Frame(scrollable_frame, padding="20")
+        inner.pack(fill=tk.BOTH, expand=True)
+        self.date_label = ttk.Label(inner, font=("Arial", 16, "bold"))
+        self.date_label.pack(pady=(0, 20))
+        avatar_frame = ttk.Frame(inner)
+        avatar_frame.pack(fill="x", pady=(0, 20))
+        self.avatar_label = ttk.Label(avatar_frame)
+        self.avatar_label.pack()
+
+        details_frame = ttk.Frame(inner)
+        details_frame.pack(fill="both", expand=True)
+        self.value_labels = {}
+        for label in labels:
+            param_frame = ttk.Frame(details_frame)
+            param_frame.pack(fill="x", pady=5)
+            ttk.Label(param_frame, text=label, font=("Arial", 10, "bold"), style="Secondary.TLabel").pack(anchor="w")
+            self.value_labels[label] = ttk.Label(param_frame)
+            self.value_labels[label].pack(anchor="w")
+
+        self.hourly_panel = None
+        if hourly is not None:
+            self.hourly_panel = HourlyPanel(inner, hourly, get_units, theme, height=180)
+            self.hourly_panel.pack(fill="x", pady=(20, 0))
+
+        ttk.Button(inner, text="Close", command=lambda: on_close(self)).pack(pady=20)
+
+    def show(self, city, day_data, texts):
+        self.day_data = day_data
+        if (city, day_data["date"]) != (self.city, self.date):
+            self.city = city
+            self.date = day_data["date"]
+            self.window.title(f"Weather Details - {city} - {self.date}")
+            self.date_label.config(text=self.date)
+            self.canvas.yview_moveto(0)
+            if self.hourly_panel is not None:
+                self.hourly_panel.show(city, self.date)
+        self.relabel(texts)
+        self.set_avatar_file(day_data.get("avatar", ""))
+
+    def relabel(self, texts):
+        for label, text in texts:
+            if self.texts.get(label) != text:
+                self.texts[label] = text
+                self.value_labels[label].config(text=text)
+
+    def set_avatar_file(self, avatar):
+        if avatar != self.avatar:
+            self.avatar = avatar
+            self.set_avatar(self.avatar_label, avatar)
+
+
+class DetailWindowPool:
+    # Hands out prebuilt DetailWindows. Opening details for a day already
+    # shown raises that window; otherwise a closed (withdrawn) window is
+    # relabelled, a new one is built while fewer than max_open exist, and
+    # past that the least recently opened window is reused. Opening details
+    # therefore costs a relabel, and the number of windows never exceeds
+    # max_open. `spare` windows are built ahead of time when Tk is idle.
+    #
+    # detail_texts(city, day_data) returns the (label, text) pairs to show, and
+    # set_avatar(label, filename) fills in the weather image. Windows chart
+    # the day's series from hourly, an HourlyStore, when one is given, with
+    # values in the unit system get_units() returns.
+    def __init__(self, root, detail_texts, set_avatar, theme=None, max_open=4, spare=1, hourly=None,
+                 get_units=None):
+        self.root = root
+        self.detail_texts = detail_texts
+        self.set_avatar = set_avatar
+        self.theme = theme
+        self.hourly = hourly
+        self.get_units = get_units
+        self.max_open = max_open
+        self.open = OrderedDict()  # (city, date) -> DetailWindow, least recent first
+        self.free = []
+        self.built = 0
+        if spare:
+            root.after_idle(self.prebuild, spare)
+
+    def prebuild(self, count):
+        while len(self.free) < count and self.built < self.max_open:
+            self.free.append(self._build())
+
+    def show(self, city, day_data):
+        key = (city, day_data["date"])
+        detail = self.open.pop(key, None)
+        if detail is None:
+            if self.free:
+                detail = self.free.pop()
+            elif self.built < self.max_open:
+                detail = self._build()
+            else:
+                _, detail = self.open.popitem(last=False)
+            detail.show(city, day_data, self.detail_texts(city, day_data))
+        self.open[key] = detail
+        detail.window.deiconify()
+        detail.window.lift()
+        return detail
+
+    def close(self, detail):
+        detail.window.withdraw()
+        key = (detail.city, detail.date)
+        if self.open.get(key) is detail:
+            del self.open[key]
+            self.free.append(detail)
+
+    def close_all(self):
+        for detail in list(self.open.values()):
+            self.close(detail)
+
+    def relabel_all(self):
+        # After a unit switch: every open window gets its texts again
+        for (city, date), detail in self.open.items():
+            detail.relabel(self.detail_texts(city, detail.day_data))
+            if detail.hourly_panel is not None:
+                detail.hourly_panel.redraw(keep_view=True)
+
+    def update(self, city, days, changes):
+        # Relabels open windows of city whose day changed, and closes those
+        # whose day is gone; changes are (day_index, path, old, new) tuples
+        # from diff_days()
+        by_date = {date: detail for (c, date), detail in self.open.items() if c == city}
+        if not by_date:
+            return
+        changed = {}
+        for day_index, path, old, new in changes:
+            if not path and new is None:
+                detail = by_date.pop(old["date"], None)
+                if detail is not None:
+                    self.close(detail)
+            elif path and day_index < len(days):
+                changed.setdefault(day_index, set()).add(path[0])
+        for day_index, fields in changed.items():
+            day_data = days[day_index]
+            detail = by_date.get(day_data["date"])
+            if detail is None:
+                continue
+            detail.day_data = day_data
+            if fields & DETAIL_FIELDS.keys():
+                detail.relabel(self.detail_texts(city, day_data))
+            if "avatar" in fields:
+                detail.set_avatar_file(day_data["avatar"])
+
+    def _build(self):
+        self.built += 1
+        return DetailWindow(self.root, DETAIL_FIELDS.values(), self.set_avatar, self.close, self.theme,
+                            self.hourly, self.get_units)
@@ -0,0 +1,367 @@
+import hashlib
+import json
+import time
+import zlib
+from collections import Counter
+from datetime import date
+
+from forecast_store import ForecastStore, diff_days
+from notes_store import connect
+
+SCHEMA_VERSION = 1
+
+
+def migrate(conn):
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version < 1:
+        with conn:
+            # forecast_date is the first day the forecast covers; body is the
+            # city's forecast JSON, zlib-compressed
+            conn.execute('''CREATE TABLE IF NOT EXISTS forecasts (
+                city TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                forecast_date TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                ttl REAL NOT NULL,
+                last_used REAL NOT NULL,
+                digest TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER NOT NULL,
+                body BLOB NOT NULL,
+                PRIMARY KEY (city, provider, forecast_date)
+            )''')
+            conn.execute('CREATE INDEX IF NOT EXISTS forecasts_last_used ON forecasts (last_used)')
+            conn.execute('PRAGMA user_version=1')
+
+
+class CacheEntry:
+    # A cached forecast's metadata. The body is only read from the database,
+    # and decompressed and parsed, when city_data is asked for; it is not
+    # kept.
+    def __init__(self, cache, city, provider, forecast_date, fetched_at, ttl, digest, etag, last_modified):
+        self.cache = cache
+        self.city = city
+        self.provider = provider
+        self.forecast_date = forecast_date
+        self.fetched_at = fetched_at
+        self.ttl = ttl
+        self.digest = digest
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def is_fresh(self, today=None, now=None):
+        # Stale once the TTL has run out, or once it is a forecast for an
+        # earlier day than today
+        today = today or date.today().isoformat()
+        now = now if now is not None else time.time()
+        return self.forecast_date >= today and now - self.fetched_at < self.ttl
+
+    @property
+    def city_data(self):
+        return self.cache.body(self.city, self.provider, self.forecast_date)
+
+    def body_loader(self):
+        # A function returning city_data that any thread may call: the
+        # compressed body is read now, and only decoded when it is called
+        raw = self.cache.raw_body(self.city, self.provider, self.forecast_date)
+        return lambda: decode_body(raw)
+
+
+def decode_body(raw):
+    return json.loads(zlib.decompress(raw))
+
+
+class ForecastCache:
+    # Fetched forecasts in SQLite, keyed by (city, provider, forecast date),
+    # so they outlive the process. Entries are never refused for being
+    # stale; get() returns the newest entry for the city and the caller
+    # decides whether to revalidate. The database is kept under max_bytes of
+    # compressed bodies by evicting the least recently used entries.
+    #
+    # Each (city, provider)'s entries are read once, without their bodies,
+    # and kept in memory, so get() does no I/O after the first call. Uses
+    # are noted in memory and written by flush_used() in one transaction;
+    # the owner calls it when idle, and put() and eviction call it first.
+    def __init__(self, path, ttl=600, max_bytes=32 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.conn = connect(path)
+        migrate(self.conn)
+        self.size = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM forecasts').fetchone()[0]
+        self.stats = Counter()  # hits, misses, stale, writes, unchanged, evictions
+        self._entries = {}  # (city, provider) -> [CacheEntry], newest forecast_date first
+        self._used = {}  # (city, provider, forecast_date) -> last use not yet written
+
+    def get(self, city, provider, forecast_date=None):
+        # The entry for forecast_date, or the newest one before it; None if
+        # the city was never fetched from this provider
+        forecast_date = forecast_date or date.today().isoformat()
+        entry = next((e for e in self._index(city, provider) if e.forecast_date <= forecast_date), None)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        if not entry.is_fresh(forecast_date):
+            self.stats["stale"] += 1
+        self._used[(city, provider, entry.forecast_date)] = time.time()
+        return entry
+
+    def body(self, city, provider, forecast_date):
+        # The city_data of one entry, read and decoded from the database
+        return decode_body(self.raw_body(city, provider, forecast_date))
+
+    def raw_body(self, city, provider, forecast_date):
+        # One entry's body as stored: compressed JSON
+        row = self.conn.execute('SELECT body FROM forecasts WHERE city=? AND provider=? AND forecast_date=?',
+                                (city, provider, forecast_date)).fetchone()
+        if row is None:
+            raise KeyError((city, provider, forecast_date))
+        return row[0]
+
+    def flush_used(self):
+        # Writes the last_used times noted by get() since the last flush
+        if not self._used:
+            return
+        used, self._used = self._used, {}
+        with self.conn:
+            self.conn.executemany('UPDATE forecasts SET last_used=? WHERE city=? AND provider=? AND forecast_date=?',
+                                  [(when, *key) for key, when in used.items()])
+
+    def _index(self, city, provider):
+        entries = self._entries.get((city, provider))
+        if entries is None:
+            rows = self.conn.execute('''SELECT forecast_date, fetched_at, ttl, digest, etag, last_modified
+                                       FROM forecasts WHERE city=? AND provider=?
+                                       ORDER BY forecast_date DESC''', (city, provider)).fetchall()
+            entries = self._entries[(city, provider)] = [CacheEntry(self, city, provider, *row) for row in rows]
+        return entries
+
+    def put(self, city, provider, city_data, forecast_date=None, ttl=None, etag=None, last_modified=None):
+        # Stores a fetch. Returns the new digest if the forecast differs from
+        # the one cached for the same day, else None (a revalidation only
+        # renews fetched_at)
+        forecast_date = forecast_date or date.today().isoformat()
+        text = json.dumps(city_data, separators=(",", ":"), sort_keys=True).encode("utf-8")
+        digest = hashlib.sha1(text).hexdigest()
+        now = time.time()
+        self.flush_used()
+        entries = self._index(city, provider)
+        with self.conn:
+            old = self.conn.execute('''SELECT digest, size FROM forecasts
+                                       WHERE city=? AND provider=? AND forecast_date=?''',
+                                    (city, provider, forecast_date)).fetchone()
+            if old is not None and old[0] == digest:
+                self.conn.execute('''UPDATE forecasts SET fetched_at=?, ttl=?, last_used=?,
+                                     etag=COALESCE(?, etag), last_modified=COALESCE(?, last_modified)
+                                     WHERE city=? AND provider=? AND forecast_date=?''',
+                                  (now, ttl or self.ttl, now, etag, last_modified, city, provider, forecast_date))
+                self.stats["unchanged"] += 1
+                for entry in entries:
+                    if entry.forecast_date == forecast_date:
+                        entry.fetched_at, entry.ttl = now, ttl or self.ttl
+                        entry.etag = etag or entry.etag
+                        entry.last_modified = last_modified or entry.last_modified
+                return None
+            body = zlib.compress(text)
+            self.conn.execute('''INSERT OR REPLACE INTO forecasts
+                                 (city, provider, forecast_date, fetched_at, ttl, last_used, digest,
+                                  etag, last_modified, size, body)
+                                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                              (city, provider, forecast_date, now, ttl or self.ttl, now, digest,
+                               etag, last_modified, len(body), body))
+            # Older days of the same city are superseded
+            removed = self.conn.execute('''SELECT COALESCE(SUM(size), 0) FROM forecasts
+                                           WHERE city=? AND provider=? AND forecast_date<?''',
+                                        (city, provider, forecast_date)).fetchone()[0]
+            self.conn.execute('DELETE FROM forecasts WHERE city=? AND provider=? AND forecast_date<?',
+                              (city, provider, forecast_date))
+        # Older days are gone and this day is replaced
+        entries[:] = [e for e in entries if e.forecast_date > forecast_date] + [
+            CacheEntry(self, city, provider, forecast_date, now, ttl or self.ttl, digest, etag, last_modified)]
+        self.size += len(body) - (old[1] if old is not None else 0) - removed
+        self.stats["writes"] += 1
+        if self.size > self.max_bytes:
+            self._evict()
+        return digest
+
+    def delete(self, city, provider):
+        # Drops every entry of the city from this provider
+        with self.conn:
+            removed = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM forecasts WHERE city=? AND provider=?',
+                                        (city, provider)).fetchone()[0]
+            self.conn.execute('DELETE FROM forecasts WHERE city=? AND provider=?', (city, provider))
+        self.size -= removed
+        self._entries[(city, provider)] = []
+        for key in [key for key in self._used if key[:2] == (city, provider)]:
+            del self._used[key]
+
+    def count(self):
+        return self.conn.execute('SELECT COUNT(*) FROM forecasts').fetchone()[0]
+
+    def close(self):
+        self.flush_used()
+        self.conn.close()
+
+    def _evict(self):
+        # Least recently used first, down to 90% of the budget so a full
+        # cache does not evict on every write
+        target = self.max_bytes * 0.9
+        self.flush_used()
+        with self.conn:
+            rows = self.conn.execute('SELECT rowid, size, city, provider FROM forecasts ORDER BY last_used').fetchall()
+            victims = []
+            for rowid, size, city, provider in rows:
+                if self.size <= target:
+                    break
+                victims.append((rowid,))
+                self.size -= size
+                # Read again from the database the next time it is asked for
+                self._entries.pop((city, provider), None)
+            self.conn.executemany('DELETE FROM forecasts WHERE rowid=?', victims)
+        self.stats["evictions"] += len(victims)
+
+
+class CachedForecasts:
+    # Stale-while-revalidate over a ForecastCache. days(city) answers at once
+    # from the cache, fresh or stale, or else from the bundled forecast
+    # store, and starts a background fetch when the entry is stale or
+    # missing. When a fetch or put() brings a forecast that differs from the
+    # one shown, on_change(city, changes) is called on the main loop with
+    # the field-by-field changes from diff_days().
+    #
+    # While the provider reports that its source is still the bundled
+    # forecast (the file provider before the file is edited), the bundled
+    # store is shown and nothing is fetched; once it changes, entries cached
+    # before the app started are revalidated. The provider is asked at most
+    # once per main-loop tick, and not again once it has said no. A city
+    # removed from the source shows no forecast, not the bundled one, until
+    # a put() brings it back. Cache uses are written back flush_delay ms
+    # after the first one, in a batch.
+    def __init__(self, cache, service, fallback, on_change=None, retry_delay=30, flush_delay=2000):
+        self.cache = cache
+        self.service = service
+        self.fallback = fallback
+        self.on_change = on_change
+        self.retry_delay = retry_delay
+        self.flush_delay = flush_delay
+        self.provider = service.provider.key
+        self._stores = {}  # city -> (digest, ForecastStore of that one city)
+        self._failed = {}  # city -> time of the last failed fetch
+        self._removed = set()
+        self._flushing = False
+        self._bundled = True
+        self._bundled_asked = False  # this main-loop tick
+        # Entries cached before a bundled source was loaded may predate it
+        self._loaded_at = time.time() if self._is_bundled() else 0
+
+    def days(self, city):
+        store = self.store(city)
+        return store.days(city) if store is not None else []
+
+    def store(self, city):
+        # The ForecastStore days(city) reads from; it is only replaced when
+        # the city's forecast changes, so it can key caches of derived data
+        if city in self._removed:
+            return None
+        if self._is_bundled():
+            return self.fallback if city in self.fallback.city_index else None
+        entry = self.cache.get(city, self.provider)
+        self._schedule_flush()
+        if (entry is None or not entry.is_fresh() or entry.fetched_at < self._loaded_at) and \
+                time.time() - self._failed.get(city, 0) >= self.retry_delay:
+            self.refresh(city, entry)
+        if entry is None:
+            return self.fallback if city in self.fallback.city_index else None
+        cached = self._stores.get(city)
+        if cached is None or cached[0] != entry.digest:
+            # The cached JSON gets dates and avatars the same way the store does
+            store = ForecastStore.from_json({"cities": {city: entry.city_data}})
+            cached = self._stores[city] = (entry.digest, store)
+        return cached[1]
+
+    def refresh(self, city, entry=None):
+        if entry is not None and (entry.etag or entry.last_modified):
+            # Revalidate with the validators saved by an earlier run; the
+            # body is only decoded, on the worker, if the source answers
+            # that it is unchanged
+            self.service.provider.seed(city, entry.etag, entry.last_modified, entry.body_loader())
+        self.service.fetch(city, self._on_fetched)
+
+    def refresh_all(self, cities, on_done=None):
+        def done(forecast_data, errors):
+            for city, city_data in forecast_data["cities"].items():
+                self._store(city, city_data)
+            if on_done is not None:
+                on_done(forecast_data, errors)
+        self.service.fetch_all(cities, done)
+
+    def put(self, city, city_data):
+        # A forecast that arrived some other way, e.g. a reloaded file
+        self._store(city, city_data)
+
+    def remove(self, city):
+        # A city gone from the source, e.g. deleted from a reloaded file
+        if city in self._removed:
+            return
+        cached = self._stores.pop(city, None)
+        old_days = cached[1].days(city) if cached is not None else self._fallback_days(city)
+        self._removed.add(city)
+        self._failed.pop(city, None)
+        self.cache.delete(city, self.provider)
+        changes = diff_days(old_days, [])
+        if changes and self.on_change is not None:
+            self.on_change(city, changes)
+
+    def flush(self):
+        self._flushing = False
+        self.cache.flush_used()
+
+    def _is_bundled(self):
+        # provider.bundled() may stat a file; cards, alerts and sparklines all
+        # ask through store(), so the answer is kept until the loop is idle
+        if self._bundled and not self._bundled_asked:
+            self._bundled = self.service.provider.bundled()
+            if self._bundled and self.service.root is not None:
+                self._bundled_asked = True
+                self.service.root.after_idle(self._next_tick)
+        return self._bundled
+
+    def _next_tick(self):
+        self._bundled_asked = False
+
+    def _schedule_flush(self):
+        if self.service.root is None:
+            return
+        if not self._flushing:
+            self._flushing = True
+            self.service.root.after(self.flush_delay, self.flush)
+
+    def _on_fetched(self, city, city_data, error):
+        if error is not None:
+            # Keep showing what we have; retry after retry_delay
+            self._failed[city] = time.time()
+            print(f"Could not refresh forecast: {error}")
+            return
+        self._failed.pop(city, None)
+        self._store(city, city_data)
+
+    def _store(self, city, city_data):
+        etag, last_modified = self.service.provider.validator(city)
+        digest = self.cache.put(city, self.provider, city_data, etag=etag, last_modified=last_modified)
+        if digest is None:
+            return
+        cached = self._stores.get(city)
+        old_days = cached[1].days(city) if cached is not None else self._fallback_days(city)
+        store = ForecastStore.from_json({"cities": {city: city_data}})
+        self._stores[city] = (digest, store)
+        self._removed.discard(city)
+        changes = diff_days(old_days, store.days(city))
+        if changes and self.on_change is not None:
+            self.on_change(city, changes)
+
+    def _fallback_days(self, city):
+        if city in self._removed or city not in self.fallback.city_index:
+            return []
+        return self.fallback.days(city)
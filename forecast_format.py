@@ -0,0 +1,173 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from datetime import date, timedelta
+
+# The forecast data layout shared by the GUI and the command line: the
+# fields of a forecast day, and the snapshot file. Nothing here imports
+# NumPy, so cli.py can answer from a snapshot without paying for it.
+
+# Numeric fields of a forecast day, by column name -> path in the JSON
+METRICS = {
+    "temperature_min": ("temperature", "min"),
+    "temperature_max": ("temperature", "max"),
+    "temperature_current": ("temperature", "current"),
+    "pressure": ("atmospheric_pressure", "value"),
+    "humidity": ("humidity", "value"),
+    "precipitation": ("precipitation", "value"),
+    "precipitation_probability": ("precipitation", "probability"),
+    "wind_speed": ("wind", "speed"),
+    "cloud_cover": ("cloud_cover", "value"),
+    "uv_index": ("uv_index", "value"),
+    "aqi": ("air_quality", "aqi"),
+    "pm2_5": ("air_quality", "pollutants", "pm2_5"),
+    "pm10": ("air_quality", "pollutants", "pm10"),
+    "o3": ("air_quality", "pollutants", "o3"),
+    "no2": ("air_quality", "pollutants", "no2"),
+    "so2": ("air_quality", "pollutants", "so2"),
+}
+
+# Text fields, stored as small integer codes into a list of categories
+LABELS = {
+    "temperature_unit": ("temperature", "unit"),
+    "pressure_unit": ("atmospheric_pressure", "unit"),
+    "humidity_unit": ("humidity", "unit"),
+    "precipitation_unit": ("precipitation", "unit"),
+    "wind_direction": ("wind", "direction"),
+    "wind_unit": ("wind", "unit"),
+    "cloud_cover_unit": ("cloud_cover", "unit"),
+    "uv_risk_level": ("uv_index", "risk_level"),
+    "aqi_level": ("air_quality", "level"),
+}
+
+# Avatar codes, in the order classify_weather() returns them
+AVATARS = ["sunny.png", "cloudy.png", "rainy.png", "stormy.png", "foggy.png", "snowy.png"]
+
+# A snapshot is MAGIC, a little-endian u64 header length, a JSON header, and
+# then the raw array blocks, each aligned to ALIGN bytes.
+MAGIC = b"WXSNAP1\n"
+ALIGN = 64
+
+# struct codes of the little-endian array dtypes a snapshot holds
+_TYPECODES = {"i1": "b", "u1": "B", "i2": "h", "u2": "H", "i4": "i", "u4": "I",
+              "i8": "q", "u8": "Q", "f4": "f", "f8": "d", "b1": "?"}
+
+
+def build_days(dates, m, t, avatars):
+    # The per-day dicts of one city, in the original JSON shape, from its
+    # columns as lists: m holds every METRICS column, t every LABELS column
+    # as text, avatars the AVATARS codes
+    return [{
+        "date": dates[d],
+        "avatar": AVATARS[avatars[d]],
+        "temperature": {"min": m["temperature_min"][d], "max": m["temperature_max"][d],
+                        "current": m["temperature_current"][d], "unit": t["temperature_unit"][d]},
+        "atmospheric_pressure": {"value": m["pressure"][d], "unit": t["pressure_unit"][d]},
+        "humidity": {"value": m["humidity"][d], "unit": t["humidity_unit"][d]},
+        "precipitation": {"value": m["precipitation"][d], "unit": t["precipitation_unit"][d],
+                          "probability": m["precipitation_probability"][d]},
+        "wind": {"speed": m["wind_speed"][d], "direction": t["wind_direction"][d],
+                 "unit": t["wind_unit"][d]},
+        "cloud_cover": {"value": m["cloud_cover"][d], "unit": t["cloud_cover_unit"][d]},
+        "uv_index": {"value": m["uv_index"][d], "risk_level": t["uv_risk_level"][d]},
+        "air_quality": {"aqi": m["aqi"][d], "level": t["aqi_level"][d],
+                        "pollutants": {"pm2_5": m["pm2_5"][d], "pm10": m["pm10"][d],
+                                       "o3": m["o3"][d], "no2": m["no2"][d], "so2": m["so2"][d]}},
+    } for d in range(len(avatars))]
+
+
+# --- Snapshot files ---
+def source_key(path, with_hash=True):
+    st = os.stat(path)
+    key = {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+    if with_hash:
+        key["sha1"] = file_sha1(path)
+    return key
+
+
+def file_sha1(path):
+    import hashlib  # only needed when a snapshot is stale
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a forecast snapshot")
+        (length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length).decode("utf-8"))
+    return header, aligned(len(MAGIC) + 8 + length)
+
+
+def aligned(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+class SnapshotReader:
+    # Reads cities out of a snapshot with the standard library only: a
+    # city's row of an array is copied out of an mmap of the file and cast
+    # with memoryview, so answering for a few cities, or a few columns of
+    # many, touches only those rows. days() and columns() return the same
+    # as ForecastStore's. Raises ValueError for a snapshot it cannot read
+    # this way (e.g. on a big-endian machine).
+    def __init__(self, path, start=None):
+        if sys.byteorder != "little":
+            raise ValueError("snapshots are little-endian")
+        self.header, data_start = read_header(path)
+        self.cities = self.header["cities"]
+        self.city_index = {city: i for i, city in enumerate(self.cities)}
+        self.categories = self.header["categories"]
+        # name -> (struct code, item size, first byte, bytes per row)
+        self._layout = {}
+        for name, spec in self.header["arrays"].items():
+            dtype = spec["dtype"]
+            if dtype[0] == ">" or dtype[1:] not in _TYPECODES:
+                raise ValueError(f"cannot read {name} of dtype {dtype}")
+            typecode = _TYPECODES[dtype[1:]]
+            itemsize = struct.calcsize(typecode)
+            row = spec["shape"][1] * itemsize if len(spec["shape"]) > 1 else 0
+            self._layout[name] = (typecode, itemsize, data_start + spec["offset"], row)
+        start = start or date.today()
+        max_days = self.header["arrays"]["avatars"]["shape"][1] if self.cities else 0
+        self.dates = [(start + timedelta(days=d)).isoformat() for d in range(max_days)]
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.lengths = self._read("lengths", 0, len(self.cities))
+
+    def close(self):
+        self._map.close()
+
+    def days(self, city):
+        c = self.columns(city, ["avatar_code", *METRICS, *LABELS])
+        return build_days(self.dates, c, c, c["avatar_code"])
+
+    def columns(self, city, names, limit=None):
+        # {name: list} of the first `limit` days of some METRICS or LABELS
+        # columns, "date", "avatar" or "avatar_code"
+        i = self.city_index[city]
+        n = self.lengths[i] if limit is None else min(limit, self.lengths[i])
+        out = {}
+        for name in names:
+            if name == "date":
+                out[name] = self.dates[:n]
+            elif name in ("avatar", "avatar_code"):
+                codes = self._read("avatars", i, n)
+                out[name] = codes if name == "avatar_code" else [AVATARS[c] for c in codes]
+            elif name in self.categories:
+                categories = self.categories[name]
+                out[name] = [categories[c] for c in self._read("label:" + name, i, n)]
+            else:
+                out[name] = self._read("metric:" + name, i, n)
+        return out
+
+    def _read(self, name, i, n):
+        # n values of row i (of the whole array when it is 1-D)
+        typecode, itemsize, start, row = self._layout[name]
+        start += i * row
+        return memoryview(self._map[start:start + n * itemsize]).cast(typecode).tolist()
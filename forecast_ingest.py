@@ -0,0 +1,330 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from forecast_snapshot import write_snapshot_blocks
+from forecast_store import LABELS, METRICS, ForecastStore, city_rows
+
+WHITESPACE = " \t\n\r"
+# A single JSON value (one city) larger than this is treated as corrupt
+# rather than buffered without bound
+MAX_VALUE_CHARS = 64 * 1024 * 1024
+
+
+# Character classes for finding where a value ends without decoding it
+_OPEN, _CLOSE, _QUOTE = 1, 2, 3
+_CLASSES = np.zeros(256, dtype=np.int8)
+_CLASSES[[ord("{"), ord("[")]] = _OPEN
+_CLASSES[[ord("}"), ord("]")]] = _CLOSE
+_CLASSES[ord('"')] = _QUOTE
+_CLASS_BYTES = _CLASSES.tobytes()
+
+
+class _Reader:
+    # Just enough of a tokenizer to walk the object structure of a JSON file
+    # while json's own decoder parses each value; only the value being decoded
+    # and one chunk of look-ahead are ever held in memory. For digests, the
+    # brackets of the whole buffer are matched at once with NumPy, so a value
+    # can be hashed from its source text without being decoded; while most
+    # values turn out to be wanted anyway, they are decoded first instead.
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.read_chars = 0
+        self.eof = False
+        self._brackets = None  # (positions, depth after each) for buf
+        self._closes = {}  # depth -> positions of the brackets closing to it
+        self.hash_first = True
+        self._wanted = [0, 0]  # values decoded, values seen, since the last switch
+
+    def fill(self):
+        # Read at least as much as is already pending, so a value spanning
+        # many chunks is re-decoded a logarithmic number of times, not once
+        # per chunk
+        chunk = self.f.read(max(self.chunk_size, len(self.buf) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        self.read_chars += len(chunk)
+        self._brackets = None
+        self._closes = {}
+        return True
+
+    def position(self):
+        return self.read_chars - (len(self.buf) - self.pos)
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or not self.fill():
+                return self.buf[self.pos] if self.pos < len(self.buf) else ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r} at character {self.position()}")
+        self.pos += 1
+
+    def value(self, digest=False, decode=None):
+        # With digest=True, returns (value, SHA-1 of the value's source text).
+        # decode(sha1) may then return False to skip building the value,
+        # which is returned as None
+        self.peek()
+        if digest and self.hash_first:
+            end = self.span_end()
+            if end is not None:
+                start, self.pos = self.pos, end
+                sha1 = hashlib.sha1(self.buf[start:end].encode("utf-8")).hexdigest()
+                if not self._wants(decode, sha1):
+                    return None, sha1
+                return self.decoder.raw_decode(self.buf, start)[0], sha1
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number running into the end of the buffer may continue
+                if end < len(self.buf) or self.eof:
+                    start, self.pos = self.pos, end
+                    if digest:
+                        sha1 = hashlib.sha1(self.buf[start:end].encode("utf-8")).hexdigest()
+                        self._wants(decode, sha1)
+                        return value, sha1
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            if len(self.buf) - self.pos > MAX_VALUE_CHARS:
+                raise ValueError(f"JSON value at character {self.position()} is too large")
+            self.fill()
+
+    def _wants(self, decode, sha1):
+        # Every 100 values, hash first again only if most were skipped
+        wanted = decode is None or decode(sha1)
+        self._wanted[0] += wanted
+        self._wanted[1] += 1
+        if self._wanted[1] == 100:
+            self.hash_first = self._wanted[0] < 50
+            self._wanted = [0, 0]
+        return wanted
+
+    def span_end(self):
+        # Where the object or array at pos ends, reading ahead as needed;
+        # None for any other value, or when its brackets do not close
+        if self.buf[self.pos:self.pos + 1] not in ("{", "["):
+            return None
+        while True:
+            if self._brackets is None:
+                self._brackets = self._match_brackets()
+            positions, depth = self._brackets
+            i = np.searchsorted(positions, self.pos)
+            level = depth[i] - 1
+            closes = self._closes.get(level)
+            if closes is None:
+                closes = self._closes[level] = positions[depth == level]
+            j = np.searchsorted(closes, self.pos)
+            if j < len(closes):
+                return int(closes[j]) + 1
+            if self.eof or len(self.buf) - self.pos > MAX_VALUE_CHARS or not self.fill():
+                return None
+
+    def _match_brackets(self):
+        # Positions of the brackets outside strings in buf, with the nesting
+        # depth after each, counted from the start of buf
+        if self.buf.isascii():
+            raw = self.buf.encode("ascii")
+            classes = np.frombuffer(raw.translate(_CLASS_BYTES), dtype=np.int8)
+            chars = np.frombuffer(raw, dtype=np.uint8)
+        else:
+            chars = np.minimum(np.frombuffer(self.buf.encode("utf-32-le"), dtype=np.uint32), 255)
+            classes = _CLASSES[chars]
+        if "\\" in self.buf:
+            # A character after an odd run of backslashes is escaped
+            slashes = np.flatnonzero(chars == ord("\\"))
+            classes = classes.copy()
+            starts = slashes[np.r_[True, np.diff(slashes) != 1]]
+            ends = slashes[np.r_[np.diff(slashes) != 1, True]]
+            escaped = ends[(ends - starts) % 2 == 0] + 1
+            classes[escaped[escaped < len(classes)]] = 0
+        positions = np.flatnonzero(classes)
+        kinds = classes[positions]
+        quotes = kinds == _QUOTE
+        outside = (np.cumsum(quotes) % 2 == 0) & ~quotes
+        positions, kinds = positions[outside], kinds[outside]
+        depth = np.cumsum(np.where(kinds == _OPEN, 1, -1))
+        return positions, depth
+
+
+def iter_cities(path, progress=None, chunk_size=1 << 20, digest=False, decode=None):
+    # Yields (city, city_data) from the "cities" object of a forecast file,
+    # one city at a time, calling progress(done, total, cities) after each.
+    # With digest=True, yields (city, city_data, SHA-1 of its source text),
+    # and decode(city, sha1) returning False leaves city_data None without
+    # parsing it. Other top-level keys are skipped.
+    with open(path, "r", encoding="utf-8") as f:
+        total = os.fstat(f.fileno()).st_size
+        reader = _Reader(f, chunk_size)
+        count = 0
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+        while True:
+            key = reader.value()
+            reader.expect(":")
+            if key == "cities":
+                reader.expect("{")
+                if reader.peek() == "}":
+                    reader.pos += 1
+                else:
+                    while True:
+                        name = reader.value()
+                        reader.expect(":")
+                        if digest:
+                            check = None if decode is None else lambda sha1: decode(name, sha1)
+                            yield (name,) + reader.value(digest=True, decode=check)
+                        else:
+                            yield name, reader.value()
+                        count += 1
+                        if progress is not None:
+                            progress(min(reader.position(), total), total, count)
+                        separator = reader.peek()
+                        reader.pos += 1
+                        if separator == "}":
+                            break
+                        if separator != ",":
+                            raise ValueError(f"expected ',' or '}}' at character {reader.position()}")
+            else:
+                reader.value()
+            separator = reader.peek()
+            reader.pos += 1
+            if separator == "}":
+                break
+            if separator != ",":
+                raise ValueError(f"expected ',' or '}}' at character {reader.position()}")
+
+
+def validate_day(day):
+    # Checks a day against the fields the UI reads. Returns an error message,
+    # or None when the day is usable. temperature.current may be missing.
+    if not isinstance(day, dict):
+        return "day is not an object"
+    for name, path in list(METRICS.items()) + list(LABELS.items()):
+        value = day
+        for key in path:
+            if not isinstance(value, dict) or key not in value:
+                value = None
+                break
+            value = value[key]
+        field = ".".join(path)
+        if value is None:
+            if name == "temperature_current":
+                continue
+            return f"missing {field}"
+        if name in METRICS:
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                return f"{field} is not a number"
+        elif not isinstance(value, str):
+            return f"{field} is not a string"
+    return None
+
+
+def validate_city(city_data):
+    if not isinstance(city_data, dict) or not isinstance(city_data.get("forecast"), list):
+        return "no forecast list"
+    if not city_data["forecast"]:
+        return "empty forecast"
+    for i, day in enumerate(city_data["forecast"]):
+        error = validate_day(day)
+        if error:
+            return f"day {i}: {error}"
+    return None
+
+
+def ingest(json_path, snapshot_path, key, progress=None, batch_size=1000):
+    # Streams json_path into a forecast snapshot in bounded memory. Cities
+    # are validated and converted batch_size at a time; each batch's columns
+    # are spooled to temporary files next to the snapshot and stitched into
+    # the final file at the end. Returns the list of skipped-record errors.
+    errors = []
+    cities = []
+    categories = {name: {} for name in LABELS}
+    spool_dir = tempfile.mkdtemp(prefix=".ingest-", dir=os.path.dirname(os.path.abspath(snapshot_path)))
+    spools = {}  # array name -> (file, [(dtype, rows, days, offset)])
+    try:
+        batch = {}
+
+        def spool(name, array):
+            if name not in spools:
+                spools[name] = (open(os.path.join(spool_dir, name.replace(":", "_")), "w+b"), [])
+            f, parts = spools[name]
+            parts.append((array.dtype, array.shape[0], array.shape[1] if array.ndim > 1 else 0, f.tell()))
+            f.write(np.ascontiguousarray(array).tobytes())
+
+        def flush_batch():
+            store = ForecastStore.from_rows(list(batch), [rows[0] for rows in batch.values()],
+                                            [rows[1] for rows in batch.values()])
+            cities.extend(store.cities)
+            spool("lengths", store.lengths)
+            spool("avatars", store.avatars)
+            for name, array in store.metrics.items():
+                spool("metric:" + name, array)
+            for name, (codes, batch_categories) in store.labels.items():
+                # Batch codes -> codes into the categories seen across all batches
+                known = categories[name]
+                lookup = np.array([known.setdefault(c, len(known)) for c in batch_categories], dtype=np.int16)
+                spool("label:" + name, lookup[codes])
+            batch.clear()
+
+        for name, city_data in iter_cities(json_path, progress):
+            # Each day's fields are read and type-checked once, straight into
+            # the batch's rows; validate_city() only runs to explain a failure
+            rows = city_rows(city_data)
+            if rows is None:
+                errors.append(f"{name}: {validate_city(city_data) or 'unreadable forecast'}")
+                continue
+            batch[name] = rows
+            if len(batch) >= batch_size:
+                flush_batch()
+        if batch:
+            flush_batch()
+
+        max_days = max((days for _, _, days, _ in spools["avatars"][1]), default=0) if spools else 0
+
+        def parts(name, dtype):
+            f, batches = spools[name]
+            for part_dtype, rows, days, offset in batches:
+                f.seek(offset)
+                count = rows * days if days else rows
+                array = np.frombuffer(f.read(count * part_dtype.itemsize), dtype=part_dtype)
+                if days:
+                    array = array.reshape(rows, days)
+                    if days < max_days:
+                        # Pad like from_json does: repeat each city's last day
+                        array = np.pad(array, ((0, 0), (0, max_days - days)), mode="edge")
+                yield array.astype(dtype, copy=False)
+
+        blocks = {}
+        names = ["lengths", "avatars"] + ["metric:" + n for n in METRICS] + ["label:" + n for n in LABELS]
+        for name in names:
+            if name not in spools:
+                dtype = np.int32 if name == "lengths" else np.int64
+                shape = (0,) if name == "lengths" else (0, 0)
+                blocks[name] = (dtype, shape, [])
+                continue
+            dtype = np.result_type(*[part[0] for part in spools[name][1]])
+            shape = (len(cities),) if name == "lengths" else (len(cities), max_days)
+            blocks[name] = (dtype, shape, parts(name, dtype))
+        write_snapshot_blocks(snapshot_path, key, cities,
+                              {name: list(known) for name, known in categories.items()}, blocks)
+    finally:
+        for f, _ in spools.values():
+            f.close()
+        shutil.rmtree(spool_dir, ignore_errors=True)
+    return errors
@@ -0,0 +1,273 @@
+import os
+import queue
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from forecast_format import SnapshotReader
+from forecast_ingest import validate_city
+from forecast_snapshot import ensure_snapshot, snapshot_path_for
+
+
+class ForecastError(Exception):
+    pass
+
+
+class ForecastProvider:
+    # Where forecasts come from. fetch(city) is called on a worker thread and
+    # returns the city's entry in the forecast_data shape, {"forecast": [day,
+    # ...]}, or raises ForecastError. key names the source in caches.
+    key = "provider"
+
+    def fetch(self, city):
+        raise NotImplementedError
+
+    def validator(self, city):
+        # (etag, last_modified) of the last fetch of city, for caching
+        return None, None
+
+    def seed(self, city, etag, last_modified, load_body):
+        # Validators remembered from an earlier run; load_body() returns the
+        # city_data they validate, and is called on a worker thread if at all
+        pass
+
+    def bundled(self):
+        # True while fetch() would return what the forecast store the app
+        # loaded at startup already holds, so there is nothing to revalidate
+        return False
+
+    def close(self):
+        pass
+
+
+class FileForecastProvider(ForecastProvider):
+    # The bundled forcast_data.json, served a city at a time from its
+    # snapshot (see forecast_snapshot.py) through a SnapshotReader, so a
+    # fetch reads only that city's rows and the JSON is never held in
+    # memory. When the file changes, the first fetch after it rebuilds the
+    # snapshot by streaming the file once; until then bundled() is True and
+    # nothing needs fetching, as the app's forecast store was loaded from
+    # the same snapshot.
+    def __init__(self, path, snapshot_path=None):
+        self.path = path
+        self.snapshot_path = snapshot_path or snapshot_path_for(path)
+        self.key = "file:" + os.path.abspath(path)
+        self.lock = threading.Lock()
+        self.bundled_key = self._stat_key()
+        self._reader_key = None
+        self._reader = None
+
+    def fetch(self, city):
+        try:
+            with self.lock:
+                key = self._stat_key()
+                if self._reader is None or key != self._reader_key:
+                    ensure_snapshot(self.path, self.snapshot_path)
+                    if self._reader is not None:
+                        self._reader.close()
+                    self._reader = SnapshotReader(self.snapshot_path)
+                    self._reader_key = key
+                if city not in self._reader.city_index:
+                    raise ForecastError(f"no forecast for {city}")
+                return {"forecast": self._reader.days(city)}
+        except (OSError, ValueError) as e:
+            raise ForecastError(f"could not read {self.path}: {e}") from e
+
+    def bundled(self):
+        return self.bundled_key is not None and self._stat_key() == self.bundled_key
+
+    def close(self):
+        with self.lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+    def _stat_key(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+
+class HttpForecastProvider(ForecastProvider):
+    # GET {base_url}/forecast/{city}, answering {"forecast": [...]}. All
+    # workers share one requests.Session whose connection pool holds
+    # pool_size connections per host, so a refresh reuses warm connections.
+    # Each city's ETag and Last-Modified are remembered and sent back as
+    # If-None-Match / If-Modified-Since; a 304 reuses the last body, loaded
+    # through the function kept with the validators.
+    def __init__(self, base_url, timeout=10, pool_size=4, session=None):
+        self.base_url = base_url.rstrip("/")
+        self.key = self.base_url
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.lock = threading.Lock()
+        self.validators = {}  # city -> (etag, last_modified, load_body)
+        self.stats = Counter()  # responses by kind: ok, not_modified, error
+
+    def url(self, city):
+        return f"{self.base_url}/forecast/{quote(city)}"
+
+    def fetch(self, city):
+        with self.lock:
+            cached = self.validators.get(city)
+        headers = {"Accept": "application/json"}
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        try:
+            response = self.session.get(self.url(city), headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            self._count("error")
+            raise ForecastError(f"{city}: {e}") from e
+        with response:
+            if response.status_code == 304 and cached is not None:
+                self._count("not_modified")
+                return cached[2]()
+            if response.status_code != 200:
+                self._count("error")
+                raise ForecastError(f"{city}: HTTP {response.status_code}")
+            try:
+                city_data = response.json()
+            except ValueError as e:
+                self._count("error")
+                raise ForecastError(f"{city}: invalid JSON") from e
+        error = validate_city(city_data)
+        if error:
+            self._count("error")
+            raise ForecastError(f"{city}: {error}")
+        with self.lock:
+            self.validators[city] = (response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                                     lambda: city_data)
+        self._count("ok")
+        return city_data
+
+    def validator(self, city):
+        with self.lock:
+            cached = self.validators.get(city)
+        return cached[:2] if cached is not None else (None, None)
+
+    def seed(self, city, etag, last_modified, load_body):
+        if etag or last_modified:
+            with self.lock:
+                self.validators.setdefault(city, (etag, last_modified, load_body))
+
+    def close(self):
+        self.session.close()
+
+    def _count(self, kind):
+        with self.lock:
+            self.stats[kind] += 1
+
+
+class ForecastService:
+    # Runs provider.fetch() on a bounded thread pool, off the Tk loop. A city
+    # that is already being fetched is not requested again; later callers
+    # just wait on the request in flight. Callbacks are delivered on the Tk
+    # main loop through root.after when a root is given, otherwise on the
+    # worker thread.
+    def __init__(self, provider, root=None, max_workers=4, poll_interval=50):
+        self.provider = provider
+        self.root = root
+        self.poll_interval = poll_interval
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="forecast")
+        self.lock = threading.Lock()
+        self.pending = {}  # city -> [on_done]
+        self.results = queue.Queue()
+        self._polling = False
+
+    def fetch(self, city, on_done=None):
+        # on_done(city, city_data, error); exactly one of the two is None
+        with self.lock:
+            callbacks = self.pending.get(city)
+            start = callbacks is None
+            if start:
+                callbacks = self.pending[city] = []
+            if on_done is not None:
+                callbacks.append(on_done)
+        if start:
+            # Outside the lock: a future that is already done runs its
+            # callback right here
+            future = self.executor.submit(self.provider.fetch, city)
+            future.add_done_callback(lambda f: self._on_done(city, f))
+        if self.root is not None:
+            self._schedule_poll()
+
+    def fetch_all(self, cities, on_done):
+        # Fetches every city and calls on_done(forecast_data, errors) once,
+        # after the last one: forecast_data holds the cities that succeeded,
+        # errors maps each failed city to its message
+        cities = list(dict.fromkeys(cities))
+        forecast_data = {"cities": {}}
+        errors = {}
+        remaining = [len(cities)]
+        if not cities:
+            on_done(forecast_data, errors)
+            return
+
+        def on_city(city, city_data, error):
+            if error is None:
+                forecast_data["cities"][city] = city_data
+            else:
+                errors[city] = error
+            # Main loop, or worker threads when there is no root
+            with self.lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                on_done({"cities": {c: forecast_data["cities"][c] for c in cities
+                                    if c in forecast_data["cities"]}}, errors)
+
+        for city in cities:
+            self.fetch(city, on_city)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.provider.close()
+
+    def _on_done(self, city, future):
+        with self.lock:
+            callbacks = self.pending.pop(city, [])
+        try:
+            result = (future.result(), None)
+        except ForecastError as e:
+            result = (None, str(e))
+        except Exception as e:
+            result = (None, f"{city}: {e}")
+        if self.root is None:
+            for callback in callbacks:
+                callback(city, *result)
+        else:
+            self.results.put((city, callbacks, result))
+
+    # --- Main-thread side ---
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        while True:
+            try:
+                city, callbacks, result = self.results.get_nowait()
+            except queue.Empty:
+                break
+            for callback in callbacks:
+                callback(city, *result)
+        with self.lock:
+            busy = bool(self.pending)
+        if busy or not self.results.empty():
+            self.root.after(self.poll_interval, self._poll)
+        else:
+            self._polling = False
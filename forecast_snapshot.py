@@ -0,0 +1,122 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+from forecast_format import MAGIC, aligned, read_header, source_key
+from forecast_store import ForecastStore
+
+# A snapshot (layout in forecast_format.py) holds every array as a raw
+# block; here they are opened with np.memmap, so loading costs one small
+# JSON parse and pages of a city's rows are only read when that city is
+# first shown. forecast_format.SnapshotReader reads the same file without
+# NumPy.
+
+
+def write_snapshot(store, path, key):
+    arrays = {"lengths": store.lengths, "avatars": store.avatars}
+    for name, array in store.metrics.items():
+        arrays["metric:" + name] = array
+    for name, (codes, _) in store.labels.items():
+        arrays["label:" + name] = codes
+    categories = {name: categories for name, (_, categories) in store.labels.items()}
+    blocks = {name: (array.dtype, array.shape, [array]) for name, array in arrays.items()}
+    write_snapshot_blocks(path, key, store.cities, categories, blocks)
+
+
+def write_snapshot_blocks(path, key, cities, categories, blocks):
+    # blocks maps each array name to (dtype, shape, parts); the parts are
+    # arrays written one after another, so a snapshot can be assembled from
+    # batches without ever holding a whole column in memory.
+    header = {"key": key, "cities": cities, "categories": categories, "arrays": {}}
+    offset = 0
+    for name, (dtype, shape, _) in blocks.items():
+        dtype = np.dtype(dtype)
+        header["arrays"][name] = {"dtype": dtype.str, "shape": list(shape), "offset": offset}
+        offset += aligned(int(np.prod(shape)) * dtype.itemsize)
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = aligned(len(MAGIC) + 8 + len(header_bytes))
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for name, (dtype, _, parts) in blocks.items():
+            f.seek(data_start + header["arrays"][name]["offset"])
+            for part in parts:
+                f.write(np.ascontiguousarray(part, dtype=dtype).tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp, path)
+
+
+def read_snapshot(path, start=None):
+    header, data_start = read_header(path)
+
+    def array(name):
+        spec = header["arrays"][name]
+        shape = tuple(spec["shape"])
+        if 0 in shape:
+            return np.zeros(shape, dtype=spec["dtype"])
+        return np.memmap(path, dtype=spec["dtype"], mode="r", offset=data_start + spec["offset"], shape=shape)
+
+    metrics = {name[len("metric:"):]: array(name) for name in header["arrays"] if name.startswith("metric:")}
+    labels = {name: (array("label:" + name), categories) for name, categories in header["categories"].items()}
+    return ForecastStore(header["cities"], array("lengths"), metrics, labels, start,
+                         avatars=array("avatars"))
+
+
+def load_forecast(json_path, snapshot_path=None, progress=None):
+    # Loads the forecast from its snapshot, (re)built by ensure_snapshot()
+    # when it is stale, calling progress(done, total, cities) as it goes.
+    try:
+        return read_snapshot(ensure_snapshot(json_path, snapshot_path, progress))
+    except SnapshotWriteError as e:
+        # Read-only install: fall back to parsing into memory
+        print(f"Could not write forecast snapshot: {e}")
+        with open(json_path, "r", encoding="utf-8") as f:
+            return ForecastStore.from_json(json.load(f))
+
+
+class SnapshotWriteError(OSError):
+    pass
+
+
+def snapshot_path_for(json_path):
+    return os.path.splitext(json_path)[0] + ".snapshot"
+
+
+def ensure_snapshot(json_path, snapshot_path=None, progress=None):
+    # The path of json_path's snapshot, rebuilt first unless it was built
+    # from the current JSON. mtime and size are checked first; the file is
+    # only hashed when they changed, so a touched but identical file does
+    # not force a rebuild. Rebuilding streams the JSON one city at a time
+    # (see forecast_ingest.py). Raises SnapshotWriteError when the snapshot
+    # cannot be written.
+    from forecast_ingest import ingest
+
+    snapshot_path = snapshot_path or snapshot_path_for(json_path)
+    quick = source_key(json_path, with_hash=False)
+    try:
+        header, _ = read_header(snapshot_path)
+        key = header["key"]
+        if key["mtime_ns"] == quick["mtime_ns"] and key["size"] == quick["size"]:
+            return snapshot_path
+        full = source_key(json_path)
+        if key["sha1"] == full["sha1"]:
+            # Same content: re-key the snapshot so the next start is quick again
+            write_snapshot(read_snapshot(snapshot_path), snapshot_path, full)
+            return snapshot_path
+    except (OSError, ValueError, KeyError):
+        full = None
+
+    try:
+        errors = ingest(json_path, snapshot_path, full or source_key(json_path), progress)
+    except OSError as e:
+        raise SnapshotWriteError(str(e)) from e
+    for error in errors[:10]:
+        print(f"Skipped forecast record: {error}")
+    if len(errors) > 10:
+        print(f"... and {len(errors) - 10} more invalid records")
+    return snapshot_path
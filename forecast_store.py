@@ -0,0 +1,230 @@
+from datetime import date
+from itertools import chain
+
+import numpy as np
+
+from forecast_format import AVATARS, LABELS, METRICS, build_days
+
+SUNNY, CLOUDY, RAINY, STORMY, FOGGY, SNOWY = range(len(AVATARS))
+
+
+# --- Weather to image mapping logic ---
+def weather_to_image(day):
+    # Use precipitation, cloud_cover, and optionally other fields
+    precip = day["precipitation"]["probability"]
+    cloud = day["cloud_cover"]["value"]
+    if precip >= 60:
+        return "rainy.png"
+    elif precip >= 20:
+        return "cloudy.png"
+    elif cloud >= 80:
+        return "stormy.png"
+    elif cloud >= 50:
+        return "cloudy.png"
+    elif cloud >= 20:
+        return "foggy.png"
+    elif day.get("temperature", {}).get("current", 20) <= 0:
+        return "snowy.png"
+    else:
+        return "sunny.png"
+
+
+def classify_weather(precip, cloud, temp_current):
+    # Vectorized weather_to_image over whole arrays; returns AVATARS codes
+    return np.select(
+        [precip >= 60, precip >= 20, cloud >= 80, cloud >= 50, cloud >= 20, temp_current <= 0],
+        [RAINY, CLOUDY, STORMY, CLOUDY, FOGGY, SNOWY],
+        default=SUNNY,
+    ).astype(np.int8)
+
+
+def diff_days(old, new):
+    # Field-by-field differences between two lists of day dicts, as
+    # (day_index, path, old_value, new_value) with path a tuple of keys. A day
+    # only one side has is reported once with path () and None on the other.
+    changes = []
+
+    def walk(i, path, a, b):
+        if isinstance(a, dict) and isinstance(b, dict):
+            for key in a.keys() | b.keys():
+                walk(i, path + (key,), a.get(key), b.get(key))
+        elif a != b:
+            changes.append((i, path, a, b))
+
+    for i in range(max(len(old), len(new))):
+        if i >= len(old):
+            changes.append((i, (), None, new[i]))
+        elif i >= len(new):
+            changes.append((i, (), old[i], None))
+        else:
+            walk(i, (), old[i], new[i])
+    return changes
+
+
+def _numbers(day):
+    # Every numeric field of a day, in METRICS order
+    t = day["temperature"]
+    p = day["precipitation"]
+    q = day["air_quality"]
+    pol = q["pollutants"]
+    current = t.get("current")
+    return (t["min"], t["max"], 20 if current is None else current, day["atmospheric_pressure"]["value"],
+            day["humidity"]["value"], p["value"], p["probability"], day["wind"]["speed"],
+            day["cloud_cover"]["value"], day["uv_index"]["value"], q["aqi"],
+            pol["pm2_5"], pol["pm10"], pol["o3"], pol["no2"], pol["so2"])
+
+
+def _labels(day):
+    # Every text field of a day, in LABELS order
+    w = day["wind"]
+    return (day["temperature"]["unit"], day["atmospheric_pressure"]["unit"], day["humidity"]["unit"],
+            day["precipitation"]["unit"], w["direction"], w["unit"], day["cloud_cover"]["unit"],
+            day["uv_index"]["risk_level"], day["air_quality"]["level"])
+
+
+_NUMBER_TYPES = {int, float}
+_TEXT_TYPES = {str}
+
+
+def city_rows(city_data):
+    # The day rows of one city as ([numbers per day], [labels per day]), read
+    # and type-checked in one pass; None when the city has no days or a day
+    # lacks a field or holds the wrong type (validate_city() says which)
+    try:
+        days = city_data["forecast"]
+        numbers = list(map(_numbers, days))
+        labels = list(map(_labels, days))
+    except (KeyError, TypeError, AttributeError):
+        return None
+    if (not numbers or not _NUMBER_TYPES.issuperset(map(type, chain.from_iterable(numbers)))
+            or not _TEXT_TYPES.issuperset(map(type, chain.from_iterable(labels)))):
+        return None
+    return numbers, labels
+
+
+class ForecastStore:
+    # Forecasts held column by column: one (cities x days) NumPy array per
+    # metric, so derived values like avatars are computed for every city in
+    # one vectorized pass. Cities with fewer days are padded; `lengths` holds
+    # the real day count of each city. days(city) rebuilds the familiar
+    # per-day dicts on demand and caches them until the city changes.
+    def __init__(self, cities, lengths, metrics, labels, start=None, avatars=None):
+        self.cities = list(cities)
+        self.city_index = {city: i for i, city in enumerate(self.cities)}
+        self.lengths = np.asarray(lengths, dtype=np.int32)
+        self.metrics = metrics
+        self.labels = labels  # name -> (codes array, categories list)
+        self.start = start or date.today()
+        self.max_days = self.metrics["aqi"].shape[1] if self.cities else 0
+        self.dates = [str(d) for d in np.datetime64(self.start, "D") + np.arange(self.max_days)]
+        self.avatars = self.classify() if avatars is None else avatars
+        self._days = {}
+
+    @classmethod
+    def from_json(cls, data, start=None):
+        cities = list(data["cities"])
+        forecasts = [data["cities"][city]["forecast"] for city in cities]
+        return cls.from_rows(cities, [list(map(_numbers, days)) for days in forecasts],
+                             [list(map(_labels, days)) for days in forecasts], start)
+
+    @classmethod
+    def from_rows(cls, cities, numbers, texts, start=None):
+        # numbers and texts hold each city's day rows, as city_rows() returns
+        # them, so a streamed ingest reads every day's fields only once
+        lengths = [len(rows) for rows in numbers]
+        max_days = max(lengths, default=0)
+        shape = (len(cities), max_days)
+
+        def flatten(cities_rows):
+            # Pad short cities with their last day so every column is rectangular
+            filler = next((rows[0] for rows in cities_rows if rows), None)
+            flat = []
+            for rows in cities_rows:
+                flat.extend(rows)
+                if len(rows) < max_days:
+                    flat.extend([rows[-1] if rows else filler] * (max_days - len(rows)))
+            return flat
+
+        # Numbers go straight into one float block: letting np.array infer a
+        # dtype from a tuple per day costs as much as reading the days
+        n = len(METRICS)
+        flat = flatten(numbers)
+        block = np.fromiter(chain.from_iterable(flat), dtype=np.float64,
+                            count=len(flat) * n).reshape(shape + (n,))
+        metrics = {}
+        for j, name in enumerate(METRICS):
+            column = block[..., j]
+            # Keep whole-number columns int, as they are in the JSON
+            if np.array_equal(column, np.round(column)):
+                column = column.astype(np.int64)
+            metrics[name] = np.ascontiguousarray(column)
+
+        # Text fields come in few combinations; encode each distinct
+        # combination once, then split it into one code array per field
+        combos = {}
+        flat = flatten(texts)
+        combo_codes = np.fromiter((combos.setdefault(row, len(combos)) for row in flat),
+                                  dtype=np.int32, count=len(flat)).reshape(shape)
+        table = list(combos)
+        labels = {}
+        for j, name in enumerate(LABELS):
+            values = [combo[j] for combo in table]
+            categories = {value: code for code, value in enumerate(dict.fromkeys(values))}
+            lookup = np.array([categories[value] for value in values], dtype=np.int16)
+            labels[name] = (lookup[combo_codes], list(categories))
+        return cls(cities, lengths, metrics, labels, start)
+
+    def classify(self):
+        return classify_weather(self.metrics["precipitation_probability"],
+                                self.metrics["cloud_cover"],
+                                self.metrics["temperature_current"])
+
+    def column(self, name, city=None):
+        array = self.metrics[name]
+        if city is None:
+            return array
+        i = self.city_index[city]
+        return array[i, :self.lengths[i]]
+
+    def label(self, name, city, day_index):
+        codes, categories = self.labels[name]
+        return categories[codes[self.city_index[city], day_index]]
+
+    def avatar(self, city, day_index):
+        return AVATARS[self.avatars[self.city_index[city], day_index]]
+
+    def days(self, city):
+        # The per-day dict view of one city, in the original JSON shape
+        days = self._days.get(city)
+        if days is None:
+            days = self._days[city] = self._build_days(self.city_index[city])
+        return days
+
+    def columns(self, city, names, limit=None):
+        # {name: list} of the first `limit` days of some METRICS or LABELS
+        # columns, "date", "avatar" or "avatar_code"
+        i = self.city_index[city]
+        n = int(self.lengths[i]) if limit is None else min(limit, int(self.lengths[i]))
+        out = {}
+        for name in names:
+            if name == "date":
+                out[name] = self.dates[:n]
+            elif name in ("avatar", "avatar_code"):
+                codes = self.avatars[i, :n].tolist()
+                out[name] = codes if name == "avatar_code" else [AVATARS[c] for c in codes]
+            elif name in self.labels:
+                codes, categories = self.labels[name]
+                out[name] = [categories[c] for c in codes[i, :n].tolist()]
+            else:
+                out[name] = self.metrics[name][i, :n].tolist()
+        return out
+
+    def day(self, city, day_index):
+        return self.days(city)[day_index]
+
+    def _build_days(self, i):
+        n = int(self.lengths[i])
+        m = {name: array[i, :n].tolist() for name, array in self.metrics.items()}
+        t = {name: [categories[c] for c in codes[i, :n].tolist()]
+             for name, (codes, categories) in self.labels.items()}
+        return build_days(self.dates, m, t, self.avatars[i, :n].tolist())
@@ -0,0 +1,169 @@
+# A local forecast API for testing the refresh path offline. Serves
+#   GET /cities           -> ["Qazvin", ...]
+#   GET /forecast/<city>  -> {"forecast": [...]}
+# from forcast_data.json (or any dict in the same shape), with ETag and
+# Last-Modified validators, and can inject latency and failures:
+#   python forecast_stub_server.py --port 8765 --latency 0.2 --jitter 0.1 --fail-rate 0.1
+# then start the app with FORECAST_API_URL=http://127.0.0.1:8765
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+# How an injected failure looks to the client
+FAIL_MODES = ("status", "drop", "garbage")
+
+
+class StubForecastServer:
+    def __init__(self, data, host="127.0.0.1", port=0, latency=0.0, jitter=0.0,
+                 fail_rate=0.0, fail_mode="status", seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.fail_mode = fail_mode
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = Counter()  # responses by kind: ok, not_modified, failed, not_found
+        self.clients = set()  # client ports seen; one per connection
+        self.set_data(data)
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def set_data(self, data):
+        # Replaces the served forecasts; cities whose body changed get a new
+        # ETag and Last-Modified
+        with self.lock:
+            old = getattr(self, "bodies", {})
+            self.bodies = {}
+            for city, city_data in data["cities"].items():
+                body = json.dumps(city_data).encode("utf-8")
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                previous = old.get(city)
+                modified = previous[2] if previous and previous[1] == etag else formatdate(usegmt=True)
+                self.bodies[city] = (body, etag, modified)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="forecast-stub", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _delay(self):
+        with self.lock:
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            fail = self.random.random() < self.fail_rate
+        if delay > 0:
+            time.sleep(delay)
+        return fail
+
+    def _count(self, kind, client):
+        with self.lock:
+            self.stats[kind] += 1
+            self.clients.add(client)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so pooled clients reuse connections
+            # Headers and body go out as separate writes; without this a
+            # kept-alive connection stalls on Nagle plus delayed ACKs
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                client = self.client_address[1]
+                fail = server._delay()
+                if fail:
+                    server._count("failed", client)
+                    if server.fail_mode == "drop":
+                        self.close_connection = True
+                        return
+                    if server.fail_mode == "garbage":
+                        self._send(200, b'{"forecast": [', {"Content-Type": "application/json"})
+                        return
+                    self._send(503, b"", {"Retry-After": "1"})
+                    return
+                path = unquote(self.path.split("?", 1)[0])
+                if path == "/cities":
+                    with server.lock:
+                        body = json.dumps(list(server.bodies)).encode("utf-8")
+                    server._count("ok", client)
+                    self._send(200, body, {"Content-Type": "application/json"})
+                    return
+                with server.lock:
+                    entry = server.bodies.get(path[len("/forecast/"):]) if path.startswith("/forecast/") else None
+                if entry is None:
+                    server._count("not_found", client)
+                    self._send(404, b"", {})
+                    return
+                body, etag, modified = entry
+                headers = {"ETag": etag, "Last-Modified": modified, "Cache-Control": "max-age=600"}
+                if_none_match = self.headers.get("If-None-Match")
+                if (if_none_match == etag
+                        or (if_none_match is None and self.headers.get("If-Modified-Since") == modified)):
+                    server._count("not_modified", client)
+                    self._send(304, b"", headers)
+                    return
+                server._count("ok", client)
+                headers["Content-Type"] = "application/json"
+                self._send(200, body, headers)
+
+            def _send(self, status, body, headers):
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if status != 304:
+                    self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if status != 304:
+                    self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve forecasts over HTTP for offline testing")
+    parser.add_argument("--data", default="forcast_data.json")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many more seconds, at random")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--fail-mode", choices=FAIL_MODES, default="status",
+                        help="503, a dropped connection, or truncated JSON")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    with open(args.data, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    server = StubForecastServer(data, args.host, args.port, args.latency, args.jitter,
+                                args.fail_rate, args.fail_mode, args.seed)
+    print(f"Serving {len(data['cities'])} cities on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(dict(server.stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import ctypes
+import ctypes.util
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+
+from forecast_ingest import iter_cities, validate_city
+
+# inotify(7) event masks
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+def _libc_inotify():
+    # libc's inotify functions, or None where there are none (macOS, Windows)
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    except OSError:
+        return None
+    if not hasattr(libc, "inotify_init1"):
+        return None
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+class FileWatcher:
+    # Calls on_change() on the Tk main loop after path has been rewritten.
+    # On Linux a thread waits on inotify, watching the directory so that a
+    # file replaced by rename is noticed too; elsewhere the file's mtime and
+    # size are polled. Either way a burst of writes produces one call, once
+    # the file has been quiet for settle ms.
+    def __init__(self, root, path, on_change, interval=1000, settle=250):
+        self.root = root
+        self.path = os.path.abspath(path)
+        self.on_change = on_change
+        self.interval = interval
+        self.settle = settle
+        self.events = queue.Queue()
+        self.mode = None
+        self._stopped = threading.Event()
+        self._fd = None
+        self._stat = self._stat_key()
+        self._settle_id = None
+
+    def start(self):
+        libc = _libc_inotify()
+        if libc is not None:
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            directory = os.path.dirname(self.path).encode()
+            if fd >= 0 and libc.inotify_add_watch(fd, directory, IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE) >= 0:
+                self._fd = fd
+                self.mode = "inotify"
+                threading.Thread(target=self._read_loop, name="forecast-watcher", daemon=True).start()
+            elif fd >= 0:
+                os.close(fd)
+        if self.mode is None:
+            self.mode = "poll"
+        self.root.after(self.interval, self._poll)
+        return self
+
+    def stop(self):
+        # Safe to call after the Tk root is gone; pending callbacks just
+        # return without rescheduling
+        self._stopped.set()
+
+    # --- Watcher thread ---
+    def _read_loop(self):
+        name = os.path.basename(self.path).encode()
+        try:
+            while not self._stopped.is_set():
+                ready, _, _ = select.select([self._fd], [], [], 0.5)
+                if not ready:
+                    continue
+                try:
+                    data = os.read(self._fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                offset = 0
+                while offset < len(data):
+                    _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                    offset += EVENT_HEADER.size
+                    event_name = data[offset:offset + length].rstrip(b"\0")
+                    offset += length
+                    if event_name == name:
+                        self.events.put(mask)
+        finally:
+            os.close(self._fd)
+
+    # --- Main-thread side ---
+    def _poll(self):
+        if self._stopped.is_set():
+            return
+        changed = False
+        if self.mode == "inotify":
+            while True:
+                try:
+                    self.events.get_nowait()
+                except queue.Empty:
+                    break
+                changed = True
+        else:
+            key = self._stat_key()
+            changed = key != self._stat
+            self._stat = key
+        if changed:
+            # Restart the quiet period on every change
+            if self._settle_id is not None:
+                self.root.after_cancel(self._settle_id)
+            self._settle_id = self.root.after(self.settle, self._fire)
+        # inotify only needs its queue drained, so it can be checked often
+        delay = self.interval if self.mode == "poll" else min(self.interval, 100)
+        self.root.after(delay, self._poll)
+
+    def _fire(self):
+        self._settle_id = None
+        if self._stopped.is_set():
+            return
+        self._stat = self._stat_key()
+        self.on_change()
+
+    def _stat_key(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+
+class ForecastReloader:
+    # Reloads a forecast JSON file when it changes, without re-converting
+    # cities that did not. Each city's source text is hashed while the file
+    # is streamed on a worker thread, without parsing it; only cities whose
+    # hash changed are parsed, validated and handed to on_cities(changed,
+    # removed) on the main loop, with changed mapping city -> city_data and
+    # removed a list of cities.
+    def __init__(self, root, path, on_cities, interval=1000, poll_interval=50):
+        self.root = root
+        self.path = path
+        self.on_cities = on_cities
+        self.poll_interval = poll_interval
+        self.watcher = FileWatcher(root, path, self.reload, interval)
+        self.digests = None  # city -> SHA-1 of its source text
+        self.results = queue.Queue()
+        self._busy = False
+        self._again = False
+
+    def start(self):
+        # The first scan only records digests; the data is already loaded
+        self._scan_async()
+        self.watcher.start()
+        return self
+
+    def stop(self):
+        self.watcher.stop()
+
+    def reload(self):
+        if self._busy:
+            # Rescan once the running scan is done
+            self._again = True
+            return
+        self._scan_async()
+
+    def _scan_async(self):
+        self._busy = True
+        threading.Thread(target=self._scan, args=(self.digests,), name="forecast-reload", daemon=True).start()
+        self.root.after(self.poll_interval, self._poll)
+
+    def _scan(self, old):
+        def decode(city, digest):
+            # Only cities whose text changed are parsed; none on the first scan
+            return old is not None and old.get(city) != digest
+
+        try:
+            digests = {}
+            changed = {}
+            for city, city_data, digest in iter_cities(self.path, digest=True, decode=decode):
+                digests[city] = digest
+                if old is not None and old.get(city) != digest:
+                    error = validate_city(city_data)
+                    if error:
+                        print(f"Skipped reloaded forecast for {city}: {error}")
+                        # Keep the last good forecast, and retry next time
+                        digests[city] = old.get(city)
+                    else:
+                        changed[city] = city_data
+            removed = [city for city in old or () if city not in digests]
+            self.results.put((digests, changed, removed))
+        except (OSError, ValueError) as e:
+            # Most likely caught mid-write; the next change event retries
+            print(f"Could not reload {self.path}: {e}")
+            self.results.put((old, {}, []))
+
+    def _poll(self):
+        try:
+            digests, changed, removed = self.results.get_nowait()
+        except queue.Empty:
+            self.root.after(self.poll_interval, self._poll)
+            return
+        first = self.digests is None
+        self.digests = digests
+        self._busy = False
+        if not first and (changed or removed):
+            self.on_cities(changed, removed)
+        if self._again:
+            self._again = False
+            self._scan_async()
@@ -0,0 +1,241 @@
+import weakref
+
+import numpy as np
+
+from forecast_store import LABELS, METRICS
+
+# Display unit of each convertible quantity, per unit system
+UNIT_SYSTEMS = {
+    "metric": {"temperature": "°C", "speed": "km/h", "pressure": "hPa", "length": "mm"},
+    "imperial": {"temperature": "°F", "speed": "mph", "pressure": "inHg", "length": "in"},
+}
+
+# Unit strings found in forecasts -> (quantity, display unit)
+SOURCE_UNITS = {
+    "Celsius": ("temperature", "°C"), "°C": ("temperature", "°C"), "C": ("temperature", "°C"),
+    "Fahrenheit": ("temperature", "°F"), "°F": ("temperature", "°F"), "F": ("temperature", "°F"),
+    "km/h": ("speed", "km/h"), "mph": ("speed", "mph"), "m/s": ("speed", "m/s"),
+    "hPa": ("pressure", "hPa"), "mb": ("pressure", "hPa"), "inHg": ("pressure", "inHg"),
+    "mm": ("length", "mm"), "in": ("length", "in"),
+}
+
+# Each display unit as (scale, offset) from its quantity's base unit
+# (°C, km/h, hPa, mm): value = base * scale + offset
+TO_UNIT = {
+    "°C": (1.0, 0.0), "°F": (1.8, 32.0),
+    "km/h": (1.0, 0.0), "mph": (0.621371, 0.0), "m/s": (1 / 3.6, 0.0),
+    "hPa": (1.0, 0.0), "inHg": (0.0295300, 0.0),
+    "mm": (1.0, 0.0), "in": (1 / 25.4, 0.0),
+}
+
+# printf format of numbers shown in a unit; %g keeps whole numbers whole
+NUMBER_FORMATS = {"°F": "%.0f", "mph": "%.0f", "inHg": "%.2f", "in": "%.2f"}
+
+# Numeric fields whose unit is given by a label field
+CONVERTED = {
+    "temperature_min": "temperature_unit",
+    "temperature_max": "temperature_unit",
+    "temperature_current": "temperature_unit",
+    "pressure": "pressure_unit",
+    "wind_speed": "wind_unit",
+    "precipitation": "precipitation_unit",
+}
+
+# Every displayed string, by style and label. Fields are the METRICS and
+# LABELS columns of forecast_store.py, already converted and formatted.
+FORMATS = {
+    # One line per weather parameter on a forecast card
+    "card": {
+        "Temperature": "Temperature: {temperature_current}{temperature_unit} "
+                       "(min: {temperature_min}, max: {temperature_max})",
+        "Atmospheric Pressure": "Pressure: {pressure} {pressure_unit}",
+        "Humidity": "Humidity: {humidity}{humidity_unit}",
+        "Precipitation": "Precipitation: {precipitation} {precipitation_unit} "
+                         "(prob: {precipitation_probability}%)",
+        "Wind": "Wind: {wind_speed} {wind_unit} {wind_direction}",
+        "Cloud Cover": "Cloud Cover: {cloud_cover}{cloud_cover_unit}",
+        "UV Index": "UV Index: {uv_index} ({uv_risk_level})",
+        "Air Quality Index (AQI)": "AQI: {aqi} ({aqi_level})",
+    },
+    # The value under each label of a detail window
+    "detail": {
+        "Temperature": "{temperature_current}{temperature_unit} "
+                       "(Min: {temperature_min}°, Max: {temperature_max}°)",
+        "Atmospheric Pressure": "{pressure} {pressure_unit}",
+        "Humidity": "{humidity}{humidity_unit}",
+        "Precipitation": "{precipitation} {precipitation_unit} (Probability: {precipitation_probability}%)",
+        "Wind": "{wind_speed} {wind_unit} {wind_direction}",
+        "Cloud Cover": "{cloud_cover}{cloud_cover_unit}",
+        "UV Index": "{uv_index} ({uv_risk_level})",
+        "Air Quality": "AQI: {aqi} ({aqi_level})",
+    },
+    # The Today view: the headline temperature, its range, and the grid
+    "today": {
+        "Now": "{temperature_current}{temperature_unit}",
+        "Range": "Min: {temperature_min}° | Max: {temperature_max}°",
+        "Humidity": "{humidity}{humidity_unit}",
+        "Wind": "{wind_speed} {wind_unit} {wind_direction}",
+        "Pressure": "{pressure} {pressure_unit}",
+        "Precipitation": "{precipitation} {precipitation_unit}",
+        "Cloud Cover": "{cloud_cover}{cloud_cover_unit}",
+        "UV Index": "{uv_index} ({uv_risk_level})",
+        "Air Quality": "AQI: {aqi} ({aqi_level})",
+    },
+}
+
+_compiled = {}  # (style, label, units) -> str.format_map of the template
+
+
+def compile_format(style, label, units):
+    # Templates are looked up and bound once per (style, label, unit system)
+    key = (style, label, units)
+    fn = _compiled.get(key)
+    if fn is None:
+        if units not in UNIT_SYSTEMS:
+            raise ValueError(f"unknown unit system: {units}")
+        fn = _compiled[key] = FORMATS[style][label].format_map
+    return fn
+
+
+def conversion(source, units):
+    # (scale, offset, display unit) turning values in the source unit into
+    # units; unknown units are shown unconverted, with their own name
+    quantity, unit = SOURCE_UNITS.get(source, (None, source))
+    if quantity is None:
+        return 1.0, 0.0, source
+    target = UNIT_SYSTEMS[units][quantity]
+    from_scale, from_offset = TO_UNIT[unit]
+    to_scale, to_offset = TO_UNIT[target]
+    # source -> base -> target
+    scale = to_scale / from_scale
+    return scale, to_offset - from_offset * scale, target
+
+
+def _unit_tables(categories, units):
+    # conversion() of every category of a unit label, as lookup arrays
+    scale, offset, shown = zip(*(conversion(source, units) for source in categories)) if categories else ((), (), ())
+    return np.array(scale, dtype=np.float64), np.array(offset, dtype=np.float64), list(shown)
+
+
+def convert_store(store, units):
+    # Every numeric column of a ForecastStore converted to units, and the
+    # display unit of every converted cell, in one vectorized pass per column
+    metrics = dict(store.metrics)
+    shown_units = {}
+    for name, unit_label in CONVERTED.items():
+        codes, categories = store.labels[unit_label]
+        scale, offset, shown = _unit_tables(categories, units)
+        if np.any(scale != 1.0) or np.any(offset != 0.0):
+            metrics[name] = store.metrics[name] * scale[codes] + offset[codes]
+        shown_units[unit_label] = (codes, shown)
+    return metrics, shown_units
+
+
+class CityTexts:
+    # Every display string of one city's days, in one unit system, built in
+    # one pass. card(day, params), detail(day) and today(day) only look up.
+    def __init__(self, store, city, metrics, shown_units, units):
+        i = store.city_index[city]
+        n = int(store.lengths[i])
+        self.units = units
+        self.index = {date: d for d, date in enumerate(store.dates[:n])}
+        columns = {}
+        for name in METRICS:
+            values = metrics[name][i, :n]
+            unit_label = CONVERTED.get(name)
+            fmt = "%g"
+            if unit_label is not None:
+                codes, shown = shown_units[unit_label]
+                # Cells of one column share their display unit in practice
+                fmt = NUMBER_FORMATS.get(shown[codes[i, 0]] if n else "", "%g")
+            columns[name] = np.char.mod(fmt, values).tolist() if n else []
+        for name in LABELS:
+            if name in shown_units:
+                codes, shown = shown_units[name]
+            else:
+                codes, shown = store.labels[name]
+            columns[name] = [shown[c] for c in codes[i, :n].tolist()]
+        names = list(columns)
+        days = [dict(zip(names, values)) for values in zip(*(columns[name] for name in names))]
+        self.tables = {}
+        for style, labels in FORMATS.items():
+            formats = [(label, compile_format(style, label, units)) for label in labels]
+            self.tables[style] = [{label: fn(fields) for label, fn in formats} for fields in days]
+
+    def row(self, style, day):
+        d = self.index.get(day["date"])
+        if d is None:  # a day of some other forecast of the city
+            return {label: format_day(style, label, day, self.units) for label in FORMATS[style]}
+        return self.tables[style][d]
+
+    def card(self, day, params):
+        row = self.row("card", day)
+        return [row[param] for param in params]
+
+    def detail(self, day):
+        return list(self.row("detail", day).items())
+
+    def today(self, day):
+        return self.row("today", day)
+
+
+class DisplayFormatter:
+    # The formatter registry's memo: texts(city, store) returns the city's
+    # CityTexts for the current unit system. Each store is converted once
+    # per unit system, and a city's texts are only rebuilt when its store is
+    # replaced, i.e. when its forecast changed. Switching units back to one
+    # used before costs nothing.
+    def __init__(self, units="metric"):
+        if units not in UNIT_SYSTEMS:
+            raise ValueError(f"unknown unit system: {units}")
+        self.units = units
+        self._converted = weakref.WeakKeyDictionary()  # store -> {units: (metrics, shown_units)}
+        self._cities = {}  # (city, units) -> (store, CityTexts)
+
+    def set_units(self, units):
+        if units not in UNIT_SYSTEMS:
+            raise ValueError(f"unknown unit system: {units}")
+        self.units = units
+
+    def texts(self, city, store):
+        key = (city, self.units)
+        cached = self._cities.get(key)
+        if cached is not None and cached[0] is store:
+            return cached[1]
+        per_units = self._converted.setdefault(store, {})
+        converted = per_units.get(self.units)
+        if converted is None:
+            converted = per_units[self.units] = convert_store(store, self.units)
+        texts = CityTexts(store, city, *converted, self.units)
+        self._cities[key] = (store, texts)
+        return texts
+
+
+def day_fields(day, units="metric"):
+    # The template fields of a single day dict, converted and formatted
+    fields = {}
+    for name, path in {**METRICS, **LABELS}.items():
+        value = day
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        fields[name] = value
+    if fields["temperature_current"] is None:
+        fields["temperature_current"] = 20
+    shown_units = {}
+    for name, unit_label in CONVERTED.items():
+        scale, offset, shown = conversion(fields[unit_label], units)
+        shown_units[unit_label] = shown
+        if fields[name] is not None and (scale != 1.0 or offset != 0.0):
+            fields[name] = fields[name] * scale + offset
+        if fields[name] is not None:
+            fields[name] = NUMBER_FORMATS.get(shown, "%g") % fields[name]
+    for name in METRICS:
+        if name not in CONVERTED and fields[name] is not None:
+            fields[name] = "%g" % fields[name]
+    fields.update(shown_units)
+    return fields
+
+
+def format_day(style, label, day, units="metric"):
+    # One string for a single day dict, without any caching
+    return compile_format(style, label, units)(day_fields(day, units))
@@ -0,0 +1,66 @@
+from collections import OrderedDict
+
+from PIL import Image, ImageTk
+
+# Gradient colours (top, bottom) for each weather type
+bg_colors = {
+    "sunny": ("#FFD700", "#FFA500"),  # Gold to Orange
+    "cloudy": ("#B0C4DE", "#778899"),  # Light Steel Blue to Slate Gray
+    "rainy": ("#4682B4", "#1E90FF"),  # Steel Blue to Dodger Blue
+    "stormy": ("#2F4F4F", "#696969"),  # Dark Slate Gray to Dim Gray
+    "foggy": ("#D3D3D3", "#A9A9A9"),  # Light Gray to Dark Gray
+    "snowy": ("#F0F8FF", "#E0FFFF")   # Alice Blue to Light Cyan
+}
+default_colors = ("#FFFFFF", "#F0F0F0")
+
+# Height of the 1px-wide master strip every size is rescaled from
+MASTER_HEIGHT = 1024
+
+
+def hex_to_rgb(color):
+    return int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)
+
+
+def render_gradient(start_color, end_color, width, height):
+    mask = Image.linear_gradient("L").resize((width, height))
+    start = Image.new("RGB", (width, height), hex_to_rgb(start_color))
+    end = Image.new("RGB", (width, height), hex_to_rgb(end_color))
+    return Image.composite(end, start, mask)
+
+
+class GradientCache:
+    # Gradient backgrounds as single images. Each weather type gets one master
+    # strip, rendered once; a window size is a bilinear rescale of that strip.
+    # Rendered PhotoImages are kept in an LRU bounded to max_entries, so going
+    # back and forth between a few sizes costs no PIL work at all.
+    def __init__(self, colors=bg_colors, max_entries=8):
+        self.colors = colors
+        self.max_entries = max_entries
+        self.masters = {}
+        self.images = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def master(self, weather_type):
+        strip = self.masters.get(weather_type)
+        if strip is None:
+            start_color, end_color = self.colors.get(weather_type, default_colors)
+            strip = render_gradient(start_color, end_color, 1, MASTER_HEIGHT)
+            self.masters[weather_type] = strip
+        return strip
+
+    def get(self, weather_type, width, height):
+        key = (weather_type, width, height)
+        image = self.images.get(key)
+        if image is not None:
+            self.hits += 1
+            self.images.move_to_end(key)
+            return image
+        self.misses += 1
+        # Interpolate along the strip, then widen it; NEAREST is exact sideways
+        column = self.master(weather_type).resize((1, height), Image.BILINEAR)
+        image = ImageTk.PhotoImage(column.resize((width, height), Image.NEAREST))
+        self.images[key] = image
+        while len(self.images) > self.max_entries:
+            self.images.popitem(last=False)
+        return image
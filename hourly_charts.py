@@ -0,0 +1,407 @@
+import json
+import math
+import tkinter as tk
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from forecast_format import source_key
+from formatters import NUMBER_FORMATS, conversion
+
+# Hourly series that can be charted: name -> (label, line color, unit when
+# the file gives none)
+HOURLY_SERIES = {
+    "temperature": ("Temperature", "#E4572E", "Celsius"),
+    "wind_speed": ("Wind", "#17BEBB", "km/h"),
+    "pressure": ("Pressure", "#7768AE", "hPa"),
+}
+# Longest forecast shown, in days: the cards' day count goes up to it and
+# hourly series are cut to it
+MAX_FORECAST_DAYS = 16
+# A pyramid level is drawn from when it has at most this many points per
+# pixel in view; coarser levels are built until one has MIN_LEVEL_POINTS
+LEVEL_SLACK = 4
+MIN_LEVEL_POINTS = 256
+# Time axis steps in hours, finest first, and the px kept between ticks
+TICK_STEPS = (0.25, 0.5, 1, 2, 3, 6, 12, 24, 48, 96, 168)
+TICK_SPACING = 70
+MAX_TICKS = 8
+# Plot area insets (left, top, right, bottom) and the axis text color, which
+# reads on both themes
+CHART_MARGINS = (48, 20, 10, 20)
+AXIS_COLOR = "#8a8f98"
+
+
+def minmax_decimate(x, y, bucket):
+    # Keeps the lowest and the highest point of every `bucket` consecutive
+    # points, in time order, so at most 2 points per bucket remain and no
+    # peak or trough is lost. Only whole points are kept, never averages.
+    n = len(y)
+    if n <= 2 or bucket <= 2:
+        return x, y
+    count = -(-n // bucket)
+    padded = np.empty(count * bucket, dtype=np.float64)
+    padded[:n] = y
+    padded[n:] = y[-1]
+    blocks = padded.reshape(count, bucket)
+    start = np.arange(count) * bucket
+    lo = np.minimum(start + blocks.argmin(axis=1), n - 1)
+    hi = np.minimum(start + blocks.argmax(axis=1), n - 1)
+    index = np.empty(2 * count, dtype=np.intp)
+    index[0::2] = np.minimum(lo, hi)
+    index[1::2] = np.maximum(lo, hi)
+    keep = np.empty(len(index), dtype=bool)
+    keep[0] = True
+    np.not_equal(index[1:], index[:-1], out=keep[1:])
+    index = index[keep]
+    return x[index], y[index]
+
+
+class SeriesPyramid:
+    # One series at every resolution: level 0 is the raw points and each
+    # level above keeps the min and max of every 4 points of the one below,
+    # about half as many, until one has MIN_LEVEL_POINTS or fewer. Building
+    # costs about two passes over the raw points. points() picks the finest
+    # level with at most LEVEL_SLACK points per pixel of the range in view
+    # and min/max-buckets that slice down to the pixel width, so a zoomed
+    # out view of 100k points reads a few thousand, and a zoomed in one
+    # draws the raw points.
+    def __init__(self, x, y, min_points=MIN_LEVEL_POINTS):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        self.levels = [(x, y)]
+        while len(self.levels[-1][0]) > min_points:
+            coarser = minmax_decimate(*self.levels[-1], 4)
+            if len(coarser[0]) >= len(self.levels[-1][0]):
+                break
+            self.levels.append(coarser)
+        # Narrowest range worth zooming to: a handful of raw points
+        self.spacing = (x[-1] - x[0]) / (len(x) - 1) if len(x) > 1 else 1.0
+
+    def __len__(self):
+        return len(self.levels[0][0])
+
+    def bounds(self):
+        x = self.levels[0][0]
+        return (float(x[0]), float(x[-1])) if len(x) else (0.0, 0.0)
+
+    def points(self, x0, x1, width):
+        # (level, xs, ys) of at most `width` points covering x0..x1, with
+        # the points just outside it so the line reaches both edges
+        width = max(2, int(width))
+        for level, (x, y) in enumerate(self.levels):
+            lo = max(0, int(np.searchsorted(x, x0, "right")) - 1)
+            hi = min(len(x), int(np.searchsorted(x, x1, "left")) + 1)
+            if hi - lo <= LEVEL_SLACK * width:
+                break
+        xs, ys = x[lo:hi], y[lo:hi]
+        if len(xs) > width:
+            xs, ys = minmax_decimate(xs, ys, -(-len(xs) // (width // 2)))
+        return level, xs, ys
+
+
+class HourlyStore:
+    # hourly_data.json, read again when its mtime or size changes. Series
+    # are parsed into arrays, and their pyramids built, the first time a
+    # city's series is asked for. Like ForecastStore's dates, the series of
+    # every city start at midnight of the first forecast day (today).
+    #
+    # {"cities": {city: {"interval_minutes": 60,
+    #                    "series": {name: {"unit": "Celsius", "values": [...]}}}}}
+    #
+    # Missing values may be null; they are left out and the line joins
+    # across them.
+    def __init__(self, path, start=None, max_days=MAX_FORECAST_DAYS):
+        self.path = path
+        self.start = datetime.combine(start or date.today(), datetime.min.time())
+        self.max_days = max_days
+        self.key = None
+        self.cities = {}
+        self._series = {}  # (city, name) -> (SeriesPyramid, unit) or None
+
+    def refresh(self):
+        # Re-reads the file if it changed since the last read; True if it did
+        try:
+            key = source_key(self.path, with_hash=False)
+        except OSError:
+            key = None
+        if key == self.key:
+            return False
+        self.key = key
+        self._series.clear()
+        cities = {}
+        if key is not None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    cities = json.load(f).get("cities", {})
+            except (OSError, ValueError, AttributeError) as e:
+                print(f"Could not load hourly series from {self.path}: {e}")
+        self.cities = cities
+        return True
+
+    def series(self, city, name):
+        # (SeriesPyramid over hours since start, source unit), or None when
+        # the city has no such series
+        key = (city, name)
+        if key not in self._series:
+            self._series[key] = self._load(city, name)
+        return self._series[key]
+
+    def offset(self, day):
+        # Hours from the start to midnight of day, a "YYYY-MM-DD" string
+        try:
+            return (date.fromisoformat(day) - self.start.date()).days * 24.0
+        except (TypeError, ValueError):
+            return 0.0
+
+    def _load(self, city, name):
+        entry = self.cities.get(city)
+        if not isinstance(entry, dict):
+            return None
+        spec = entry.get("series", {}).get(name)
+        if not isinstance(spec, dict) or not spec.get("values"):
+            return None
+        step = float(entry.get("interval_minutes", 60)) / 60
+        limit = int(self.max_days * 24 / step)
+        values = np.array([np.nan if v is None else v for v in spec["values"][:limit]], dtype=np.float64)
+        hours = np.arange(len(values)) * step
+        present = ~np.isnan(values)
+        if not present.any():
+            return None
+        return SeriesPyramid(hours[present], values[present]), spec.get("unit", HOURLY_SERIES[name][2])
+
+
+class HourlyChart(tk.Canvas):
+    # A line chart of one SeriesPyramid on a Canvas. The canvas holds a
+    # fixed set of items made once, the line, the frame, the axis labels and
+    # MAX_TICKS ticks, and a render only moves and relabels them: the line
+    # is a single item whose coordinates are replaced, with at most one
+    # point per pixel of the plot's width, however many points the series
+    # has. The wheel zooms about the pointer, dragging pans and a double
+    # click returns to the view set last. Renders are coalesced into one
+    # per idle.
+    def __init__(self, parent, theme=None, height=160, **options):
+        super().__init__(parent, height=height, highlightthickness=0, bd=0, **options)
+        if theme is not None:
+            theme.register(self, "chart")
+        self.pyramid = None
+        self.start = None
+        self.transform = (1.0, 0.0, "")
+        self.number_format = "%.1f"
+        self.view = self.home = (0.0, 24.0)
+        self.level = 0
+        self.drawn = 0
+        self._pending = False
+        self._drag = None
+
+        self.frame = self.create_rectangle(0, 0, 0, 0, outline=AXIS_COLOR)
+        self.midline = self.create_line(0, 0, 0, 0, fill=AXIS_COLOR, dash=(2, 4))
+        self.ticks = [(self.create_line(0, 0, 0, 0, fill=AXIS_COLOR, dash=(2, 4)),
+                       self.create_text(0, 0, anchor="n", fill=AXIS_COLOR, font=("Helvetica", 8)))
+                      for _ in range(MAX_TICKS)]
+        self.line = self.create_line(0, 0, 0, 0, width=1.5)
+        self.title = self.create_text(0, 0, anchor="nw", fill=AXIS_COLOR, font=("Helvetica", 9, "bold"))
+        self.y_labels = [self.create_text(0, 0, anchor="e", fill=AXIS_COLOR, font=("Helvetica", 8))
+                         for _ in range(3)]
+        self.message = self.create_text(0, 0, fill=AXIS_COLOR, font=("Helvetica", 10))
+
+        self.bind("<Configure>", lambda e: self.schedule())
+        self.bind("<MouseWheel>", lambda e: self.zoom(0.8 if e.delta > 0 else 1.25, e.x))
+        self.bind("<Button-4>", lambda e: self.zoom(0.8, e.x))
+        self.bind("<Button-5>", lambda e: self.zoom(1.25, e.x))
+        self.bind("<ButtonPress-1>", self._on_press)
+        self.bind("<B1-Motion>", self._on_drag)
+        self.bind("<Double-Button-1>", lambda e: self.set_view(*self.home))
+
+    def set_series(self, pyramid, title, color, start, transform=(1.0, 0.0, "")):
+        # transform is (scale, offset, unit) from formatters.conversion();
+        # it only relabels the value axis, the pyramid stays in source units
+        self.pyramid = pyramid
+        self.start = start
+        self.transform = transform
+        self.number_format = NUMBER_FORMATS.get(transform[2], "%.1f")
+        self.itemconfig(self.line, fill=color)
+        self.itemconfig(self.title, text=f"{title} ({transform[2]})" if transform[2] else title)
+        self.schedule()
+
+    def set_view(self, x0, x1, home=True):
+        # Shows hours x0..x1 since start; with home=True a double click
+        # comes back to this view
+        self.view = self._clamp(x0, x1)
+        if home:
+            self.home = self.view
+        self.schedule()
+
+    def zoom(self, factor, px=None):
+        x0, x1 = self.view
+        left, _, right, _ = self._plot()
+        anchor = 0.5 if px is None else min(1.0, max(0.0, (px - left) / max(1, right - left)))
+        at = x0 + (x1 - x0) * anchor
+        span = (x1 - x0) * factor
+        self.view = self._clamp(at - span * anchor, at + span * (1 - anchor))
+        self.schedule()
+
+    def pan(self, hours):
+        x0, x1 = self.view
+        self.view = self._clamp(x0 + hours, x1 + hours)
+        self.schedule()
+
+    def schedule(self):
+        if not self._pending:
+            self._pending = True
+            self.after_idle(self.render)
+
+    def render(self):
+        self._pending = False
+        left, top, right, bottom = self._plot()
+        self.coords(self.frame, left, top, right, bottom)
+        self.coords(self.title, left, 3)
+        if self.pyramid is None or right - left < 2 or bottom - top < 2:
+            self._hide_plot("No hourly data" if self.pyramid is None else "")
+            return
+        x0, x1 = self.view
+        self.level, xs, ys = self.pyramid.points(x0, x1, right - left)
+        xs, ys = _clip(xs, ys, x0, x1)
+        self.drawn = len(xs)
+        if self.drawn < 2:
+            self._hide_plot("No data in this range")
+            return
+        self.itemconfig(self.message, state="hidden")
+        lo, hi = float(ys.min()), float(ys.max())
+        pad = (hi - lo) * 0.08 or 1.0
+        lo, hi = lo - pad, hi + pad
+        flat = np.empty(2 * self.drawn, dtype=np.float64)
+        flat[0::2] = left + (xs - x0) * ((right - left) / (x1 - x0))
+        flat[1::2] = bottom - (ys - lo) * ((bottom - top) / (hi - lo))
+        self.coords(self.line, flat.tolist())
+        self.itemconfig(self.line, state="normal")
+        self._label_values(lo, hi, left, top, bottom)
+        self._label_times(x0, x1, left, right, top, bottom)
+
+    def _plot(self):
+        left, top, right, bottom = CHART_MARGINS
+        return left, top, self.winfo_width() - right, self.winfo_height() - bottom
+
+    def _clamp(self, x0, x1):
+        if self.pyramid is None or not len(self.pyramid):
+            return x0, x1
+        first, last = self.pyramid.bounds()
+        full = max(last - first, self.pyramid.spacing)
+        span = min(full, max(x1 - x0, self.pyramid.spacing * 4))
+        x0 = min(max(x0 + ((x1 - x0) - span) / 2, first), first + full - span)
+        return x0, x0 + span
+
+    def _hide_plot(self, message):
+        self.drawn = 0
+        self.itemconfig(self.line, state="hidden")
+        self.itemconfig(self.midline, state="hidden")
+        for line, text in self.ticks:
+            self.itemconfig(line, state="hidden")
+            self.itemconfig(text, state="hidden")
+        for label in self.y_labels:
+            self.itemconfig(label, state="hidden")
+        self.coords(self.message, self.winfo_width() / 2, self.winfo_height() / 2)
+        self.itemconfig(self.message, text=message, state="normal")
+
+    def _label_values(self, lo, hi, left, top, bottom):
+        scale, offset, _ = self.transform
+        middle = (top + bottom) / 2
+        self.coords(self.midline, left, middle, self._plot()[2], middle)
+        self.itemconfig(self.midline, state="normal")
+        for label, y, value in zip(self.y_labels, (top, middle, bottom), (hi, (lo + hi) / 2, lo)):
+            self.coords(label, left - 4, y)
+            self.itemconfig(label, text=self.number_format % (value * scale + offset), state="normal")
+
+    def _label_times(self, x0, x1, left, right, top, bottom):
+        span = x1 - x0
+        wanted = min(MAX_TICKS, max(1, (right - left) // TICK_SPACING))
+        step = next((s for s in TICK_STEPS if span / s <= wanted), TICK_STEPS[-1])
+        first = math.ceil(x0 / step) * step
+        for i, (line, text) in enumerate(self.ticks):
+            at = first + i * step
+            if at > x1 or i >= wanted + 1:
+                self.itemconfig(line, state="hidden")
+                self.itemconfig(text, state="hidden")
+                continue
+            px = left + (at - x0) * ((right - left) / span)
+            when = self.start + timedelta(hours=at)
+            daily = step >= 24 or (when.hour == 0 and when.minute == 0)
+            self.coords(line, px, top, px, bottom)
+            self.coords(text, px, bottom + 2)
+            self.itemconfig(line, state="normal")
+            self.itemconfig(text, text=when.strftime("%b %d" if daily else "%H:%M"), state="normal")
+
+    def _on_press(self, event):
+        self._drag = event.x
+
+    def _on_drag(self, event):
+        if self._drag is None:
+            return
+        left, _, right, _ = self._plot()
+        x0, x1 = self.view
+        self.pan((self._drag - event.x) * (x1 - x0) / max(1, right - left))
+        self._drag = event.x
+
+
+def _clip(xs, ys, x0, x1):
+    # Cuts the segments that cross x0 or x1 at the edge, so the line stays
+    # inside the plot
+    if len(xs) < 2:
+        return xs, ys
+    if xs[0] < x0 < xs[1] or xs[-1] > x1 > xs[-2]:
+        xs, ys = xs.copy(), ys.copy()
+        if xs[0] < x0 < xs[1]:
+            ys[0] = np.interp(x0, xs[:2], ys[:2])
+            xs[0] = x0
+        if xs[-1] > x1 > xs[-2]:
+            ys[-1] = np.interp(x1, xs[-2:], ys[-2:])
+            xs[-1] = x1
+    return xs, ys
+
+
+class HourlyPanel(tk.Frame):
+    # A choice of HOURLY_SERIES over an HourlyChart of one city, for the
+    # detail windows and the Today view. show() charts the given days;
+    # picking another series keeps the range in view. get_units() returns
+    # the unit system the value axis is labelled in.
+    def __init__(self, parent, hourly, get_units, theme=None, height=160, **options):
+        super().__init__(parent, **options)
+        if theme is not None:
+            theme.register(self, "card")
+        self.hourly = hourly
+        self.get_units = get_units
+        self.city = None
+        self.name = tk.StringVar(value=next(iter(HOURLY_SERIES)))
+        choices = tk.Frame(self)
+        if theme is not None:
+            theme.register(choices, "card")
+        choices.pack(fill="x")
+        for name, (label, _, _) in HOURLY_SERIES.items():
+            button = tk.Radiobutton(choices, text=label, value=name, variable=self.name,
+                                    command=lambda: self.redraw(keep_view=True))
+            if theme is not None:
+                theme.register(button, "choice")
+            button.pack(side="left", padx=(0, 6))
+        self.chart = HourlyChart(self, theme, height=height)
+        self.chart.pack(fill="both", expand=True)
+
+    def show(self, city, day, days=1):
+        # Charts city's series from midnight of day ("YYYY-MM-DD") for days
+        self.hourly.refresh()
+        self.city = city
+        self.redraw()
+        start = self.hourly.offset(day)
+        self.chart.set_view(start, start + 24.0 * days)
+
+    def redraw(self, keep_view=False):
+        # Loads the chosen series again, e.g. after a unit switch
+        name = self.name.get()
+        label, color, _ = HOURLY_SERIES[name]
+        loaded = self.hourly.series(self.city, name) if self.city is not None else None
+        if loaded is None:
+            self.chart.set_series(None, label, color, self.hourly.start)
+            return
+        pyramid, unit = loaded
+        self.chart.set_series(pyramid, label, color, self.hourly.start, conversion(unit, self.get_units()))
+        if keep_view:
+            self.chart.set_view(*self.chart.view, home=False)
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageTk
+
+# Pre-resized variants kept on disk, by name -> (width, height) at 1x
+VARIANTS = {
+    "card": (128, 128),
+    "detail": (160, 160),
+}
+
+
+class ImageService:
+    # Decodes and resizes avatars on a small thread pool and hands the results
+    # back to the Tk main loop through root.after, so first paint never waits
+    # on PIL. Resized variants are persisted under cache_dir and invalidated by
+    # the source's mtime/size, falling back to its SHA-1 when those change.
+    # PhotoImages live in an LRU bounded by memory_budget bytes; widgets
+    # showing an image must keep their own reference (label.image = photo) so
+    # an eviction cannot blank them.
+    def __init__(self, root, source_dir=os.path.join("assets", "images"),
+                 cache_dir=os.path.join("assets", "cache"), memory_budget=32 * 1024 * 1024,
+                 max_workers=2, poll_interval=16):
+        self.root = root
+        self.source_dir = source_dir
+        self.cache_dir = cache_dir
+        self.memory_budget = memory_budget
+        self.poll_interval = poll_interval
+        self.scale = 2 if float(root.tk.call("tk", "scaling")) >= 2.0 else 1
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="images")
+        self.images = OrderedDict()  # (filename, variant) -> (PhotoImage or None, bytes)
+        self.memory_used = 0
+        self.pending = {}  # (filename, variant) -> [callbacks]
+        self.results = queue.Queue()
+        self._polling = False
+        self._manifest_lock = threading.Lock()
+        self._manifest_path = os.path.join(cache_dir, "index.json")
+        self._manifest = self._read_manifest()
+
+    def size_of(self, variant):
+        width, height = VARIANTS[variant]
+        return width * self.scale, height * self.scale
+
+    def get(self, filename, variant="card", on_ready=None):
+        # Returns the PhotoImage if it is already in memory. Otherwise starts
+        # loading it, returns None and calls on_ready(photo) on the main loop
+        # once it is available (photo is None if the source does not exist).
+        if not filename:
+            return None
+        key = (filename, variant)
+        entry = self.images.get(key)
+        if entry is not None:
+            self.images.move_to_end(key)
+            return entry[0]
+        callbacks = self.pending.get(key)
+        if callbacks is None:
+            callbacks = self.pending[key] = []
+            future = self.executor.submit(self._load, filename, self.size_of(variant))
+            future.add_done_callback(lambda f: self.results.put((key, f)))
+            self._schedule_poll()
+        if on_ready is not None:
+            callbacks.append(on_ready)
+        return None
+
+    def prefetch(self, filenames, variant="card"):
+        for filename in filenames:
+            self.get(filename, variant)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # --- Main-thread side ---
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        while True:
+            try:
+                key, future = self.results.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                img = future.result()
+            except Exception as e:
+                print(f"Could not load image {key[0]}: {e}")
+                img = None
+            photo = ImageTk.PhotoImage(img) if img is not None else None
+            self._store(key, photo, img.width * img.height * 4 if img is not None else 0)
+            for callback in self.pending.pop(key, []):
+                callback(photo)
+        if self.pending:
+            self.root.after(self.poll_interval, self._poll)
+        else:
+            self._polling = False
+
+    def _store(self, key, photo, size):
+        self.images[key] = (photo, size)
+        self.memory_used += size
+        while self.memory_used > self.memory_budget and len(self.images) > 1:
+            _, (_, evicted_size) = self.images.popitem(last=False)
+            self.memory_used -= evicted_size
+
+    # --- Worker side ---
+    def _load(self, filename, size):
+        source = os.path.join(self.source_dir, filename)
+        if not os.path.exists(source):
+            return None
+        stem = os.path.splitext(filename)[0]
+        cached = os.path.join(self.cache_dir, f"{stem}-{size[0]}x{size[1]}.png")
+        if self._is_fresh(filename, source) and os.path.exists(cached):
+            with Image.open(cached) as img:
+                img.load()
+                return img.copy()
+        with Image.open(source) as img:
+            img = img.convert("RGBA").resize(size, Image.LANCZOS)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = f"{cached}.{threading.get_ident()}.tmp"
+        img.save(tmp, format="PNG")
+        os.replace(tmp, cached)
+        return img
+
+    def _is_fresh(self, filename, source):
+        st = os.stat(source)
+        with self._manifest_lock:
+            entry = self._manifest.get(filename)
+            if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+                return True
+            with open(source, "rb") as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+            fresh = bool(entry) and entry["sha1"] == digest
+            if not fresh:
+                self._drop_variants(filename)
+            self._manifest[filename] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha1": digest}
+            self._write_manifest()
+            return fresh
+
+    def _drop_variants(self, filename):
+        prefix = os.path.splitext(filename)[0] + "-"
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(prefix) and name.endswith(".png"):
+                os.remove(os.path.join(self.cache_dir, name))
+
+    def _read_manifest(self):
+        try:
+            with open(self._manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = self._manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f)
+        os.replace(tmp, self._manifest_path)
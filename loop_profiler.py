@@ -0,0 +1,308 @@
+import json
+import os
+import threading
+import time
+import tkinter as tk
+from bisect import bisect_left
+from collections import Counter, deque
+from tkinter import filedialog, ttk
+
+# Upper edges of the histogram buckets, in ms; the last bucket is open-ended
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# tkinter.Misc.after() registers this closure around the real callback
+_AFTER_CALLIT = "Misc.after.<locals>.callit"
+
+
+def callback_label(func):
+    # A readable, stable name for a callback: "create_app.update_cards",
+    # "RenderScheduler._run", or "create_app.<lambda>@app.py:606"
+    func = getattr(func, "__func__", func)
+    name = getattr(func, "__qualname__", None) or getattr(func, "__name__", None) or type(func).__name__
+    name = name.replace(".<locals>", "")
+    code = getattr(func, "__code__", None)
+    if "<lambda>" in name and code is not None:
+        name += f"@{os.path.basename(code.co_filename)}:{code.co_firstlineno}"
+    return name
+
+
+class LoopProfiler:
+    # Opt-in timing of everything the Tk loop runs. install() wraps
+    # tkinter's callback registration, so every command, binding, variable
+    # trace and after/after_idle handler registered from then on records its
+    # wall time under its callback_label(). A heartbeat scheduled every
+    # heartbeat ms detects stalls: when it fires more than stall_ms late, the
+    # loop was blocked, and the slowest callback since the previous beat is
+    # blamed. Durations are kept per name in a rolling window of the last
+    # `window` calls; every call and stall also goes to a bounded trace that
+    # export_trace() writes in Chrome's trace format (chrome://tracing,
+    # Perfetto). Nothing is wrapped until install(), so a disabled profiler
+    # costs nothing.
+    _installed = None
+
+    def __init__(self, root, heartbeat=50, stall_ms=100, window=500, max_events=200000):
+        self.root = root
+        self.heartbeat = heartbeat
+        self.stall_ms = stall_ms
+        self.window = window
+        self.epoch = time.perf_counter()
+        self.pid = os.getpid()
+        self.main_thread = threading.get_ident()
+        self.events = deque(maxlen=max_events)  # (name, cat, start, end)
+        self.reset()
+        self._originals = None
+        self.raw_after = None  # tkinter's own after(), for untimed housekeeping
+        self._beat_id = None
+        self._due = None
+
+    def reset(self):
+        self.samples = {}  # name -> deque of recent durations, ms
+        self.calls = Counter()
+        self.total = Counter()  # name -> ms
+        self.worst = Counter()  # name -> ms
+        self.stalls = deque(maxlen=1000)  # (start, ms, culprit)
+        self.events.clear()
+        self._slowest = (0.0, None)  # slowest callback since the last beat
+
+    # --- Installing ---
+    def install(self):
+        if LoopProfiler._installed is not None:
+            raise RuntimeError("a LoopProfiler is already installed")
+        LoopProfiler._installed = self
+        register, after, trace = tk.Misc._register, tk.Misc.after, tk.Variable._register
+        self._originals = (register, after, trace)
+        self.raw_after = after
+        profiler = self
+
+        def _register(widget, func, subst=None, needcleanup=1):
+            # after() hands over its own closure; the real callback was
+            # already wrapped by the after() below
+            if getattr(func, "__qualname__", None) != _AFTER_CALLIT:
+                func = profiler.wrap(func, callback_label(func), "callback")
+            return register(widget, func, subst, needcleanup)
+
+        def _after(widget, ms, func=None, *args):
+            if func is not None:
+                func = profiler.wrap(func, callback_label(func), "idle" if ms == "idle" else "after")
+            return after(widget, ms, func, *args)
+
+        def _register_trace(variable, callback):
+            return trace(variable, profiler.wrap(callback, callback_label(callback), "trace"))
+
+        tk.Misc._register = _register
+        tk.Misc.after = _after
+        tk.Variable._register = _register_trace
+        self._due = time.perf_counter() + self.heartbeat / 1000
+        self._beat_id = after(self.root, self.heartbeat, self._beat)
+        return self
+
+    def uninstall(self):
+        if self._originals is None:
+            return
+        tk.Misc._register, tk.Misc.after, tk.Variable._register = self._originals
+        self._originals = None
+        self.raw_after = None
+        LoopProfiler._installed = None
+        if self._beat_id is not None:
+            try:
+                self.root.after_cancel(self._beat_id)
+            except tk.TclError:
+                pass
+            self._beat_id = None
+
+    def wrap(self, func, name, cat="callback"):
+        record = self._record
+
+        def timed(*args):
+            start = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                record(name, cat, start, time.perf_counter())
+        timed.__name__ = getattr(func, "__name__", type(func).__name__)
+        return timed
+
+    def span(self, name, cat="render"):
+        # Times a block that is not a callback of its own, e.g. one region of
+        # a render pass: with profiler.span("render:cards"): ...
+        return _Span(self, name, cat)
+
+    # --- Recording ---
+    def _record(self, name, cat, start, end):
+        ms = (end - start) * 1000
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+        samples.append(ms)
+        self.calls[name] += 1
+        self.total[name] += ms
+        if ms > self.worst[name]:
+            self.worst[name] = ms
+        if ms > self._slowest[0]:
+            self._slowest = (ms, name)
+        self.events.append((name, cat, start, end))
+
+    def _beat(self):
+        now = time.perf_counter()
+        late = (now - self._due) * 1000
+        if late > self.stall_ms:
+            culprit = self._slowest[1]
+            self.stalls.append((self._due, late, culprit))
+            self.events.append((f"loop stall ({culprit or 'unknown'})", "stall", self._due, now))
+        self._slowest = (0.0, None)
+        self._due = now + self.heartbeat / 1000
+        self._beat_id = None
+        if self.raw_after is not None:
+            try:
+                self._beat_id = self.raw_after(self.root, self.heartbeat, self._beat)
+            except tk.TclError:
+                pass  # root destroyed
+
+    # --- Reading ---
+    def summary(self):
+        # [(name, calls, p50, p95, max, total)], slowest total first; the
+        # percentiles cover the rolling window
+        rows = []
+        for name, samples in self.samples.items():
+            ordered = sorted(samples)
+            p50 = ordered[(len(ordered) - 1) // 2]
+            p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+            rows.append((name, self.calls[name], p50, p95, self.worst[name], self.total[name]))
+        rows.sort(key=lambda row: row[5], reverse=True)
+        return rows
+
+    def histogram(self, name):
+        # Counts of the rolling window per BUCKETS bucket, plus one for
+        # anything slower than the last edge
+        counts = [0] * (len(BUCKETS) + 1)
+        for ms in self.samples.get(name, ()):
+            counts[bisect_left(BUCKETS, ms)] += 1
+        return counts
+
+    def trace(self):
+        # The recorded events as a Chrome trace; timestamps are microseconds
+        # since the profiler was created
+        events = [{"name": name, "cat": cat, "ph": "X", "pid": self.pid, "tid": self.main_thread,
+                   "ts": round((start - self.epoch) * 1e6, 1), "dur": round((end - start) * 1e6, 1)}
+                  for name, cat, start, end in list(self.events)]
+        events.append({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": self.main_thread,
+                       "args": {"name": "Tk main loop"}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_trace(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.trace(), f)
+
+
+class _Span:
+    def __init__(self, profiler, name, cat):
+        self.profiler = profiler
+        self.name = name
+        self.cat = cat
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._record(self.name, self.cat, self.start, time.perf_counter())
+        return False
+
+
+class ProfilerOverlay:
+    # A debug window over a LoopProfiler: the callbacks that cost the loop
+    # the most, the stall count and worst stall, and a histogram of the
+    # selected callback's recent durations. Refreshes every refresh ms
+    # through the profiler's own, untimed after().
+    def __init__(self, profiler, refresh=500):
+        self.profiler = profiler
+        self.refresh = refresh
+        self.window = tk.Toplevel(profiler.root)
+        self.window.title("Loop Profiler")
+        self.window.geometry("720x480")
+        self.selected = None
+        self._after_id = None
+
+        frame = ttk.Frame(self.window, padding=8)
+        frame.pack(fill="both", expand=True)
+        self.status = ttk.Label(frame)
+        self.status.pack(fill="x")
+
+        columns = ("calls", "p50", "p95", "max", "total")
+        self.table = ttk.Treeview(frame, columns=columns, height=12)
+        self.table.heading("#0", text="callback")
+        self.table.column("#0", width=300)
+        for column in columns:
+            self.table.heading(column, text=column if column == "calls" else column + " ms")
+            self.table.column(column, width=70, anchor="e")
+        self.table.pack(fill="both", expand=True, pady=6)
+        self.table.bind("<<TreeviewSelect>>", self.on_select)
+
+        self.chart = tk.Canvas(frame, height=110, highlightthickness=0, bg="white")
+        self.chart.pack(fill="x")
+
+        buttons = ttk.Frame(frame)
+        buttons.pack(fill="x", pady=(6, 0))
+        ttk.Button(buttons, text="Export Trace...", command=self.export).pack(side="right")
+        ttk.Button(buttons, text="Reset", command=self.reset).pack(side="right", padx=6)
+
+        self.window.bind("<Destroy>", self.on_destroy)
+        self.update()
+
+    def update(self):
+        profiler = self.profiler
+        stalls = list(profiler.stalls)
+        if stalls:
+            start, ms, culprit = max(stalls, key=lambda stall: stall[1])
+            self.status.config(text=f"{len(stalls)} stalls over {profiler.stall_ms} ms; "
+                                    f"worst {ms:.0f} ms, slowest callback then: {culprit or 'unknown'}")
+        else:
+            self.status.config(text=f"No stalls over {profiler.stall_ms} ms")
+        self.table.delete(*self.table.get_children())
+        for name, calls, p50, p95, worst, total in profiler.summary()[:50]:
+            self.table.insert("", "end", iid=name, text=name,
+                              values=(calls, f"{p50:.1f}", f"{p95:.1f}", f"{worst:.1f}", f"{total:.0f}"))
+        if self.selected is not None and self.table.exists(self.selected):
+            self.table.selection_set(self.selected)
+        self.draw_histogram()
+        if profiler.raw_after is not None:
+            self._after_id = profiler.raw_after(self.window, self.refresh, self.update)
+
+    def draw_histogram(self):
+        self.chart.delete("all")
+        if self.selected is None:
+            self.chart.create_text(10, 55, anchor="w", fill="#888", text="Select a callback for its histogram")
+            return
+        counts = self.profiler.histogram(self.selected)
+        labels = [f"<{edge}" for edge in BUCKETS] + [f">{BUCKETS[-1]}"]
+        width = max(self.chart.winfo_width(), 400) / len(counts)
+        peak = max(counts) or 1
+        for i, (count, label) in enumerate(zip(counts, labels)):
+            height = 80 * count / peak
+            x = i * width
+            self.chart.create_rectangle(x + 4, 90 - height, x + width - 4, 90, fill="#4a90e2", width=0)
+            self.chart.create_text(x + width / 2, 100, text=label, fill="#555", font=("Helvetica", 8))
+            if count:
+                self.chart.create_text(x + width / 2, 84 - height, text=count, fill="#333", font=("Helvetica", 8))
+
+    def on_select(self, event):
+        selection = self.table.selection()
+        if selection:
+            self.selected = selection[0]
+            self.draw_histogram()
+
+    def reset(self):
+        self.profiler.reset()
+        self.selected = None
+
+    def export(self):
+        path = filedialog.asksaveasfilename(parent=self.window, defaultextension=".json",
+                                            initialfile="loop_trace.json",
+                                            filetypes=[("Chrome trace", "*.json")])
+        if path:
+            self.profiler.export_trace(path)
+
+    def on_destroy(self, event):
+        if event.widget is self.window and self._after_id is not None:
+            self.window.after_cancel(self._after_id)
+            self._after_id = None
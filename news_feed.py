@@ -0,0 +1,211 @@
+import json
+import tkinter as tk
+from bisect import bisect_left, bisect_right
+
+from card_renderer import NewsCard
+from forecast_format import source_key
+from virtual_grid import VirtualGrid
+
+# Widths at which the news grid gets another column, in px
+NEWS_BREAKPOINTS = (700,)
+# NewsCard's text is inset this much from the card's edges
+NEWS_TEXT_INSET = 32
+
+
+class NewsFeed:
+    # news_data.json, parsed once and kept until the file's mtime or size
+    # changes. Items are held oldest first with their dates in a parallel
+    # list, so a date range is two bisects and a page is a slice: showing
+    # page p of any feed costs the same however long the feed is.
+    def __init__(self, path):
+        self.path = path
+        self.key = None
+        self.items = []  # oldest first; same-day items in reverse feed order
+        self.dates = []
+
+    def refresh(self):
+        # Re-reads the file if it changed since the last read; True if it did
+        try:
+            key = source_key(self.path, with_hash=False)
+        except OSError:
+            key = None
+        if key == self.key:
+            return False
+        self.key = key
+        items = []
+        if key is not None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    items = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Could not load news from {self.path}: {e}")
+        # Newest first when read backwards, and in feed order within a day
+        order = sorted(range(len(items)), key=lambda i: (str(items[i].get("date", "")), -i))
+        self.items = [items[i] for i in order]
+        self.dates = [str(item.get("date", "")) for item in self.items]
+        print(f"Loaded {len(self.items)} news items from {self.path}")
+        return True
+
+    def count(self, since=None, until=None):
+        lo, hi = self._range(since, until)
+        return hi - lo
+
+    def page(self, page, page_size, since=None, until=None):
+        # Items of page `page` (0 is the newest) dated since..until
+        # inclusive, either bound optional, newest first
+        lo, hi = self._range(since, until)
+        end = hi - page * page_size
+        return self.items[max(lo, end - page_size):max(lo, end)][::-1]
+
+    def _range(self, since, until):
+        lo = bisect_left(self.dates, since) if since else 0
+        hi = bisect_right(self.dates, until) if until else len(self.dates)
+        return lo, max(lo, hi)
+
+
+class NewsView(tk.Frame):
+    # The "News of the Day" view, built once and kept with its cards while
+    # other views are shown. show() picks up a changed feed file. The grid is
+    # only re-laid out when the width crosses a column breakpoint or the page
+    # changes; other resizes just move every card's wraplength in one pass.
+    # From/To filter by ISO date (either may be blank), and Newer/Older page
+    # through page_size items at a time.
+    def __init__(self, parent, feed, scheduler, theme, on_back, page_size=50, resize_delay=150):
+        super().__init__(parent)
+        theme.register(self, "window")
+        self.feed = feed
+        self.scheduler = scheduler
+        self.page_size = page_size
+        self.page = 0
+        self.since = None
+        self.until = None
+        self.items = None  # the page shown in the grid
+        self.wrap = None
+        self.shown = False
+
+        theme.register(tk.Label(self, text="News of the Day", font=('Helvetica', 26, 'bold')),
+                       "label").pack(pady=(30, 10))
+
+        # Date filter and paging
+        bar = theme.register(tk.Frame(self), "window")
+        bar.pack(fill="x", padx=16, pady=(0, 8))
+        self.since_var = tk.StringVar()
+        self.until_var = tk.StringVar()
+        for text, var in (("From:", self.since_var), ("To:", self.until_var)):
+            theme.register(tk.Label(bar, text=text), "label").pack(side="left", padx=(0, 4))
+            entry = theme.register(tk.Entry(bar, textvariable=var, width=11), "input")
+            entry.pack(side="left", padx=(0, 10))
+            entry.bind("<Return>", lambda e: self.apply_filter())
+        theme.register(tk.Button(bar, text="Filter", command=self.apply_filter), "accent_button").pack(side="left")
+        self.older_button = theme.register(tk.Button(bar, text="Older", command=lambda: self.go(self.page + 1)),
+                                           "accent_button")
+        self.older_button.pack(side="right")
+        self.page_label = theme.register(tk.Label(bar), "secondary_label")
+        self.page_label.pack(side="right", padx=8)
+        self.newer_button = theme.register(tk.Button(bar, text="Newer", command=lambda: self.go(self.page - 1)),
+                                           "accent_button")
+        self.newer_button.pack(side="right")
+
+        # Back to Main button
+        back_button = tk.Button(self, text="Back to Main",
+                                command=on_back,
+                                font=('Helvetica', 12, 'bold'),
+                                relief='flat',
+                                bd=0,
+                                padx=18,
+                                pady=8,
+                                cursor='hand2')
+        theme.register(back_button, "accent_button")
+        back_button.pack(side="bottom", pady=(10, 30))
+
+        # Responsive grid area
+        self.canvas = theme.register(tk.Canvas(self, highlightthickness=0, bd=0), "canvas")
+        scrollbar = theme.register(tk.Scrollbar(self, orient="vertical", command=self.canvas.yview), "scrollbar")
+        self.grid_frame = theme.register(tk.Frame(self.canvas), "window")
+        grid_frame_id = self.canvas.create_window((0, 0), window=self.grid_frame, anchor="nw")
+        # Only the news cards in view exist; they are recycled as the list scrolls
+        self.news_grid = VirtualGrid(self.grid_frame, self.canvas,
+                                     create_cell=lambda parent: NewsCard(parent, theme),
+                                     bind_cell=self._bind_card,
+                                     scrollbar=scrollbar, padx=16, pady=16)
+        self.empty_label = theme.register(tk.Label(self.grid_frame, text="No news available",
+                                                   font=('Helvetica', 14)), "secondary_label")
+
+        def on_grid_configure(event):
+            # Scrollregion comes from the row heights, not a measured bbox
+            self.canvas.configure(scrollregion=(0, 0, event.width, self.news_grid.total_height()))
+        self.grid_frame.bind("<Configure>", on_grid_configure, add="+")
+        self.canvas.bind("<Configure>", lambda e: self.canvas.itemconfig(grid_frame_id, width=e.width), add="+")
+        self.canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        scheduler.register("news", self.render)
+        self.bind('<Configure>', lambda e: scheduler.invalidate_later(resize_delay, "news"))
+
+    def show(self, **pack):
+        if self.feed.refresh():
+            self.page = 0
+            self.items = None
+        self.pack(fill=tk.BOTH, expand=True, **pack)
+        self.shown = True
+        self.scheduler.invalidate("news")
+
+    def hide(self):
+        self.shown = False
+        self.pack_forget()
+
+    def apply_filter(self):
+        self.since = self.since_var.get().strip() or None
+        self.until = self.until_var.get().strip() or None
+        self.go(0)
+
+    def go(self, page):
+        pages = self.page_count()
+        self.page = max(0, min(page, pages - 1))
+        self.items = None
+        self.scheduler.invalidate("news")
+
+    def page_count(self):
+        return max(1, -(-self.feed.count(self.since, self.until) // self.page_size))
+
+    # --- Rendering ---
+    def render(self):
+        if not self.shown:
+            return
+        width = self.winfo_width() or 800
+        num_columns = 1 + sum(width > edge for edge in NEWS_BREAKPOINTS)
+        grid = self.news_grid
+        if self.items is None:
+            self.items = self.feed.page(self.page, self.page_size, self.since, self.until)
+            pages = self.page_count()
+            self.page_label.config(text=f"Page {self.page + 1} of {pages}")
+            self.newer_button.config(state="normal" if self.page > 0 else "disabled")
+            self.older_button.config(state="normal" if self.page + 1 < pages else "disabled")
+            if self.items:
+                self.empty_label.place_forget()
+            else:
+                self.empty_label.place(relx=0.5, y=40, anchor="n")
+            self.canvas.yview_moveto(0)
+            self._set_wrap(num_columns)
+            grid.set_items(self.items, num_columns, row_height=160 + 2 * grid.pady)
+        elif num_columns != grid.num_columns:
+            self._set_wrap(num_columns)
+            grid.set_items(self.items, num_columns)
+        else:
+            self._set_wrap(num_columns)
+
+    def _set_wrap(self, num_columns):
+        # Every pooled card, shown or spare, gets the new wraplength at once
+        col_width = (self.canvas.winfo_width() or self.winfo_width() or 800) // num_columns
+        wrap = col_width - 2 * self.news_grid.padx - NEWS_TEXT_INSET
+        if wrap == self.wrap or wrap <= 0:
+            return
+        self.wrap = wrap
+        grid = self.news_grid
+        for card in [entry[0] for entry in grid.visible.values()] + grid.free:
+            card.set_wraplength(wrap)
+
+    def _bind_card(self, card, news):
+        card.set_news(news)
+        if self.wrap is not None:
+            card.set_wraplength(self.wrap)
@@ -0,0 +1,281 @@
+import os
+import queue
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from urllib.parse import quote
+
+SCHEMA_VERSION = 2
+
+
+def connect(path, read_only=False):
+    if read_only:
+        # Opened read-only, a query can never write to the file
+        return sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True)
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+def has_fts5(conn):
+    try:
+        conn.execute('CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)')
+        conn.execute('DROP TABLE temp.fts5_probe')
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def migrate(conn):
+    # Brings the database up to SCHEMA_VERSION, one version at a time.
+    # Version 0 is the original layout: a notes(city, note) table with no key
+    # and no index.
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version < 1:
+        migrate_v1(conn)
+    if version < 2 and has_fts5(conn):
+        migrate_v2(conn)
+
+
+def migrate_v1(conn):
+    with conn:
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(notes)')]
+        if columns and 'id' not in columns:
+            conn.execute('ALTER TABLE notes RENAME TO notes_v0')
+        conn.execute('''CREATE TABLE IF NOT EXISTS notes (
+            id INTEGER PRIMARY KEY,
+            city TEXT NOT NULL,
+            note TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )''')
+        conn.execute('CREATE INDEX IF NOT EXISTS notes_city ON notes (city, id)')
+        if columns and 'id' not in columns:
+            # Keep the old insertion order; the original timestamps are unknown
+            conn.execute('''INSERT INTO notes (city, note, created_at)
+                            SELECT city, note, ? FROM notes_v0 ORDER BY rowid''',
+                         (datetime.now().isoformat(timespec='seconds'),))
+            conn.execute('DROP TABLE notes_v0')
+        conn.execute('PRAGMA user_version=1')
+
+
+def migrate_v2(conn):
+    # Full-text index over notes, kept in sync by triggers. It is an external
+    # content table, so the text itself is only stored once, in notes.
+    with conn:
+        conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+            note, city, content='notes', content_rowid='id', prefix='2 3'
+        )''')
+        conn.execute('''CREATE TRIGGER IF NOT EXISTS notes_ai AFTER INSERT ON notes BEGIN
+            INSERT INTO notes_fts (rowid, note, city) VALUES (new.id, new.note, new.city);
+        END''')
+        conn.execute('''CREATE TRIGGER IF NOT EXISTS notes_ad AFTER DELETE ON notes BEGIN
+            INSERT INTO notes_fts (notes_fts, rowid, note, city) VALUES ('delete', old.id, old.note, old.city);
+        END''')
+        conn.execute('''CREATE TRIGGER IF NOT EXISTS notes_au AFTER UPDATE ON notes BEGIN
+            INSERT INTO notes_fts (notes_fts, rowid, note, city) VALUES ('delete', old.id, old.note, old.city);
+            INSERT INTO notes_fts (rowid, note, city) VALUES (new.id, new.note, new.city);
+        END''')
+        conn.execute("INSERT INTO notes_fts (notes_fts) VALUES ('rebuild')")
+        conn.execute('PRAGMA user_version=2')
+
+
+def fts_query(text):
+    # Every word must match, as a prefix: "rain teh" -> "rain"* "teh"*
+    words = re.findall(r'\w+', text)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+class NotesSearch:
+    # Search results read a page at a time from an open cursor
+    def __init__(self, cursor, page_size):
+        self.cursor = cursor
+        self.page_size = page_size
+        self.done = cursor is None
+
+    def next_page(self):
+        if self.done:
+            return []
+        rows = self.cursor.fetchmany(self.page_size)
+        if len(rows) < self.page_size:
+            self.close()
+        return rows
+
+    def close(self):
+        if not self.done:
+            self.done = True
+            self.cursor.close()
+
+
+class NotesStore:
+    # City notes in SQLite. Reads run on the caller's connection; inserts and
+    # deletes go through a single writer thread that batches whatever has
+    # queued up into one transaction, so adding a note never blocks a frame.
+    # Completion callbacks are delivered on the Tk main loop through
+    # root.after when a root is given, otherwise on the writer thread.
+    #
+    # read_only=True opens the file read-only for queries (see cli.py): the
+    # schema is not migrated and no writer is started. Reads name notes by
+    # rowid, which is the id from version 1 on, so they also work on a
+    # database still in the original layout.
+    def __init__(self, path, root=None, max_batch=256, poll_interval=20, read_only=False):
+        self.path = path
+        self.root = root
+        self.max_batch = max_batch
+        self.poll_interval = poll_interval
+        self.read_only = read_only
+        self.conn = connect(path, read_only)
+        if not read_only:
+            migrate(self.conn)
+        self.has_fts = self.conn.execute('PRAGMA user_version').fetchone()[0] >= 2
+        # Search cursors stay open between pages, so they get their own
+        # connection; otherwise their read snapshot would hide new notes
+        # from get_notes()
+        self.search_conn = connect(path, read_only)
+        self._search = None
+        self.ops = queue.Queue()
+        self.completed = queue.Queue()
+        # Writes submitted and not yet delivered; without a root the writer
+        # thread delivers them, so the count is shared under a lock
+        self.pending = 0
+        self._pending_lock = threading.Lock()
+        self._callbacks = True  # False once close(deliver=False) drops them
+        self._polling = False
+        self.writer = None
+        if not read_only:
+            self.writer = threading.Thread(target=self._write_loop, name="notes-writer", daemon=True)
+            self.writer.start()
+
+    # --- Reads ---
+    def get_notes(self, city):
+        return self.conn.execute('SELECT rowid, note FROM notes WHERE city=? ORDER BY rowid',
+                                 (city,)).fetchall()
+
+    def get_all_notes(self):
+        return self.conn.execute('SELECT rowid, city, note FROM notes ORDER BY city, rowid').fetchall()
+
+    def count(self, city=None):
+        if city is None:
+            return self.conn.execute('SELECT COUNT(*) FROM notes').fetchone()[0]
+        return self.conn.execute('SELECT COUNT(*) FROM notes WHERE city=?', (city,)).fetchone()[0]
+
+    def search(self, text, page_size=50):
+        # Ranked prefix search over every city's notes. Rows are
+        # (id, city, note), fetched a page at a time with next_page().
+        if self._search is not None:
+            self._search.close()
+        query = fts_query(text)
+        if not query:
+            cursor = None
+        elif self.has_fts:
+            cursor = self.search_conn.execute('''SELECT notes.id, notes.city, notes.note
+                                                 FROM notes_fts JOIN notes ON notes.id = notes_fts.rowid
+                                                 WHERE notes_fts MATCH ? ORDER BY rank''', (query,))
+        else:
+            # SQLite built without FTS5: a plain scan, first word only
+            word = re.findall(r'\w+', text)[0]
+            cursor = self.search_conn.execute('''SELECT rowid, city, note FROM notes
+                                                 WHERE note LIKE ? ORDER BY rowid''', (f'%{word}%',))
+        self._search = NotesSearch(cursor, page_size)
+        return self._search
+
+    # --- Writes ---
+    def add_note(self, city, note, on_done=None):
+        created_at = datetime.now().isoformat(timespec='seconds')
+        self._submit(('insert', (city, note, created_at)), on_done)
+
+    def delete_note(self, note_id, on_done=None):
+        self._submit(('delete', note_id), on_done)
+
+    def flush(self):
+        # Blocks until every queued write has been committed
+        self.ops.join()
+        self._deliver()
+
+    def close(self, deliver=True):
+        # deliver=False commits queued writes without calling their on_done,
+        # e.g. once the Tk root they would update is destroyed
+        self._callbacks = self._callbacks and deliver
+        if self.writer is not None:
+            self.flush()
+            self.ops.put(None)
+            self.writer.join()
+        if self._search is not None:
+            self._search.close()
+        self.search_conn.close()
+        self.conn.close()
+
+    def _submit(self, op, on_done):
+        if self.writer is None:
+            raise sqlite3.OperationalError(f"{self.path} is open read-only")
+        with self._pending_lock:
+            self.pending += 1
+        self.ops.put((op, on_done))
+        if self.root is not None and not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self._poll)
+
+    # --- Main-thread side ---
+    def _poll(self):
+        self._deliver()
+        if self.pending:
+            self.root.after(self.poll_interval, self._poll)
+        else:
+            self._polling = False
+
+    def _deliver(self):
+        while True:
+            try:
+                on_done, result = self.completed.get_nowait()
+            except queue.Empty:
+                break
+            with self._pending_lock:
+                self.pending -= 1
+            if on_done is not None and self._callbacks:
+                on_done(result)
+
+    # --- Writer thread ---
+    def _write_loop(self):
+        conn = connect(self.path)
+        while True:
+            first = self.ops.get()
+            if first is None:
+                self.ops.task_done()
+                break
+            batch = [first]
+            while len(batch) < self.max_batch:
+                try:
+                    item = self.ops.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    # Leave the sentinel for the next round
+                    self.ops.task_done()
+                    self.ops.put(None)
+                    break
+                batch.append(item)
+            results = []
+            try:
+                with conn:
+                    for (kind, args), on_done in batch:
+                        if kind == 'insert':
+                            cursor = conn.execute('INSERT INTO notes (city, note, created_at) VALUES (?, ?, ?)', args)
+                            results.append((on_done, cursor.lastrowid))
+                        else:
+                            conn.execute('DELETE FROM notes WHERE id=?', (args,))
+                            results.append((on_done, args))
+            except sqlite3.Error as e:
+                print(f"Could not write notes: {e}")
+                results = [(on_done, None) for _, on_done in batch]
+            for on_done, result in results:
+                if self.root is None:
+                    with self._pending_lock:
+                        self.pending -= 1
+                    if on_done is not None and self._callbacks:
+                        on_done(result)
+                else:
+                    self.completed.put((on_done, result))
+            for _ in batch:
+                self.ops.task_done()
+        conn.close()
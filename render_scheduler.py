@@ -0,0 +1,74 @@
+from collections import Counter
+
+
+class RenderScheduler:
+    # Components mark regions of the UI dirty instead of redrawing on the
+    # spot. Every invalidation made before Tk next goes idle is folded into a
+    # single pass that calls each dirty region's renderer once, in the order
+    # the regions were registered. Bursty events such as resizes go through
+    # invalidate_later(), a trailing-edge debounce, so the last event of a
+    # burst is always the one that gets rendered.
+    def __init__(self, root):
+        self.root = root
+        self.renderers = {}  # region -> render(), in registration order
+        self.dirty = set()
+        self.requested = Counter()
+        self.performed = Counter()
+        self._pending = None
+        self._timers = {}  # regions tuple -> after id
+        self.profiler = None  # a LoopProfiler times each region's render
+
+    def register(self, region, render):
+        self.renderers[region] = render
+
+    def unregister(self, region):
+        self.renderers.pop(region, None)
+        self.dirty.discard(region)
+
+    def invalidate(self, *regions):
+        for region in regions:
+            self.requested[region] += 1
+        self._mark(regions)
+
+    def invalidate_later(self, delay, *regions):
+        # Each call pushes the render back by delay ms, so a burst of calls
+        # renders once, with the state after the last of them
+        for region in regions:
+            self.requested[region] += 1
+        after_id = self._timers.pop(regions, None)
+        if after_id is not None:
+            self.root.after_cancel(after_id)
+        self._timers[regions] = self.root.after(delay, self._fire, regions)
+
+    def flush(self):
+        # Renders every dirty region now; normally called from after_idle
+        if self._pending is not None:
+            self.root.after_cancel(self._pending)
+            self._pending = None
+        dirty, self.dirty = self.dirty, set()
+        for region, render in list(self.renderers.items()):
+            if region in dirty:
+                self.performed[region] += 1
+                if self.profiler is None:
+                    render()
+                else:
+                    with self.profiler.span("render:" + region):
+                        render()
+
+    def stats(self):
+        # region -> (renders requested, renders performed)
+        return {region: (self.requested[region], self.performed[region])
+                for region in self.requested}
+
+    def _fire(self, regions):
+        self._timers.pop(regions, None)
+        self._mark(regions)
+
+    def _mark(self, regions):
+        self.dirty.update(region for region in regions if region in self.renderers)
+        if self.dirty and self._pending is None:
+            self._pending = self.root.after_idle(self._run)
+
+    def _run(self):
+        self._pending = None
+        self.flush()
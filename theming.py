@@ -0,0 +1,156 @@
+import tkinter as tk
+from tkinter import ttk
+
+light_theme = {
+    'bg': '#f5f5f5',
+    'fg': '#222',
+    'card_bg': 'white',
+    'card_shadow': '#e0e0e0',
+    'accent': '#FFD700',
+    'accent_fg': '#222',
+    'button_active_bg': '#FFA500',
+    'button_active_fg': 'white',
+    'divider': '#eee',
+    'input_bg': 'white',
+    'input_fg': '#222',
+    'menu_bg': '#f5f5f5',
+    'menu_fg': '#222',
+    'secondary_fg': '#888',
+    'alert_fg': '#C62828',
+}
+dark_theme = {
+    'bg': '#121212',  # Android dark background
+    'fg': '#FFFFFF',  # Primary text
+    'card_bg': '#1E1E1E',  # Card background
+    'card_shadow': '#232323',
+    'accent': '#03DAC6',  # Teal accent
+    'accent_fg': '#121212',
+    'button_active_bg': '#2196F3',  # Blue active
+    'button_active_fg': '#FFFFFF',
+    'divider': '#222222',
+    'input_bg': '#232323',
+    'input_fg': '#FFFFFF',
+    'menu_bg': '#121212',
+    'menu_fg': '#03DAC6',
+    'secondary_fg': '#B0B0B0',
+    'alert_fg': '#FF6E6E',
+}
+
+
+# --- Semantic roles ---
+# Each role maps a theme to the widget options it controls. Every widget
+# registered under a role must accept all of that role's options.
+ROLES = {
+    # Backgrounds of windows and of the frames laid directly on them
+    "window": lambda t: {"bg": t["bg"]},
+    # Frames inside a card or a group box
+    "surface": lambda t: {"bg": t["card_bg"]},
+    "card": lambda t: {"bg": t["card_bg"]},
+    "shadow": lambda t: {"bg": t["card_shadow"]},
+    "divider": lambda t: {"bg": t["divider"]},
+    # LabelFrames
+    "group": lambda t: {"bg": t["card_bg"], "fg": t["fg"]},
+    "label": lambda t: {"bg": t["bg"], "fg": t["fg"]},
+    "secondary_label": lambda t: {"bg": t["bg"], "fg": t["secondary_fg"]},
+    "card_label": lambda t: {"bg": t["card_bg"], "fg": t["fg"]},
+    "card_secondary_label": lambda t: {"bg": t["card_bg"], "fg": t["secondary_fg"]},
+    # Alert badges on cards
+    "card_alert_label": lambda t: {"bg": t["card_bg"], "fg": t.get("alert_fg", t["fg"])},
+    "accent_button": lambda t: {"bg": t["accent"], "fg": t["accent_fg"],
+                                "activebackground": t["button_active_bg"],
+                                "activeforeground": t["button_active_fg"]},
+    # Checkbuttons and Radiobuttons
+    "choice": lambda t: {"bg": t["card_bg"], "fg": t["fg"], "activebackground": t["card_bg"],
+                         "activeforeground": t["fg"], "selectcolor": t["input_bg"]},
+    # Entries and Spinboxes
+    "input": lambda t: {"bg": t["input_bg"], "fg": t["input_fg"], "insertbackground": t["input_fg"]},
+    "list": lambda t: {"bg": t["input_bg"], "fg": t["input_fg"],
+                       "selectbackground": t["accent"], "selectforeground": t["accent_fg"]},
+    "canvas": lambda t: {"bg": t["bg"], "highlightbackground": t["bg"]},
+    # Chart canvases, drawn on a card
+    "chart": lambda t: {"bg": t["card_bg"], "highlightbackground": t["card_bg"]},
+    "scrollbar": lambda t: {"bg": t["bg"], "troughcolor": t["card_bg"], "activebackground": t["accent"]},
+}
+
+
+# Bind tag of every registered widget
+THEMED = "Themed"
+
+
+class ThemeEngine:
+    # Widgets register under a semantic role when they are created and are
+    # configured for the current theme right away. Switching themes then
+    # reconfigures only the registered widgets, with one precomputed option
+    # list per role, and ttk widgets follow their styles without any
+    # per-widget work. Widgets are tracked by Tk path name and carry a
+    # THEMED bind tag whose <Destroy> binding forgets them, so views that are
+    # rebuilt on every visit do not pile up dead paths.
+    def __init__(self, root, theme, roles=ROLES):
+        self.root = root
+        self.theme = theme
+        self.roles = roles
+        self.style = ttk.Style(root)
+        self.widgets = {role: {} for role in roles}  # role -> {path: None}
+        self._roles = {}  # path -> roles it is registered under
+        self._options = {}
+        self._configure_styles()
+        root.bind_class(THEMED, "<Destroy>", self._forget)
+
+    def register(self, widget, role):
+        # Returns the widget, so creation and registration can be chained
+        path = str(widget)
+        roles = self._roles.get(path)
+        if roles is None:
+            roles = self._roles[path] = set()
+            widget.bindtags(widget.bindtags() + (THEMED,))
+        roles.add(role)
+        self.widgets[role][path] = None
+        widget.tk.call(path, "configure", *self.options(role))
+        return widget
+
+    def options(self, role):
+        # The role's options as a flat Tcl argument list for the current theme
+        options = self._options.get(role)
+        if options is None:
+            options = self._options[role] = tuple(
+                arg for name, value in self.roles[role](self.theme).items()
+                for arg in ("-" + name, value))
+        return options
+
+    def set_theme(self, theme):
+        self.theme = theme
+        self._options.clear()
+        self._configure_styles()
+        call = self.root.tk.call
+        for role, paths in self.widgets.items():
+            options = self.options(role)
+            dead = []
+            for path in paths:
+                try:
+                    call(path, "configure", *options)
+                except tk.TclError:
+                    dead.append(path)
+            for path in dead:
+                del paths[path]
+                self._roles.pop(path, None)
+
+    def count(self):
+        return sum(len(paths) for paths in self.widgets.values())
+
+    def _forget(self, event):
+        path = str(event.widget)
+        for role in self._roles.pop(path, ()):
+            self.widgets[role].pop(path, None)
+
+    def _configure_styles(self):
+        t = self.theme
+        style = self.style
+        style.configure("TFrame", background=t["bg"])
+        style.configure("TLabel", background=t["bg"], foreground=t["fg"])
+        style.configure("Secondary.TLabel", foreground=t["secondary_fg"])
+        style.configure("TButton", background=t["accent"], foreground=t["accent_fg"])
+        style.map("TButton",
+                  background=[("active", t["button_active_bg"])],
+                  foreground=[("active", t["button_active_fg"])])
+        style.configure("Vertical.TScrollbar", background=t["bg"], troughcolor=t["card_bg"])
+        style.configure("Horizontal.TProgressbar", background=t["accent"], troughcolor=t["card_bg"])
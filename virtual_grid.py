@@ -0,0 +1,146 @@
+import heapq
+
+
+class VirtualGrid:
+    # Lays items out as fixed-height rows inside `frame` and only keeps cell
+    # widgets for the rows inside the viewport of `canvas` (plus `overscan`
+    # rows on each side). Cells that scroll out are recycled for the rows that
+    # scroll in, so the widget count stays constant however many items there
+    # are. The frame's height, and therefore the scrollregion, is computed
+    # from the row height instead of being measured with bbox("all").
+    #
+    # create_cell(parent) must return a widget; bind_cell(cell, item) fills it
+    # in and is expected to be cheap when the cell already shows the item.
+    # The row height is the tallest of up to `measure_sample` items: spread
+    # evenly over the list, or the largest by measure_key(item) when given.
+    def __init__(self, frame, canvas, create_cell, bind_cell, scrollbar=None,
+                 overscan=2, padx=5, pady=5, measure_sample=16, measure_key=None):
+        self.frame = frame
+        self.canvas = canvas
+        self.create_cell = create_cell
+        self.bind_cell = bind_cell
+        self.scrollbar = scrollbar
+        self.overscan = overscan
+        self.padx = padx
+        self.pady = pady
+        self.measure_sample = max(1, measure_sample)
+        self.measure_key = measure_key
+        self.items = []
+        self.num_columns = 1
+        self.row_height = 0
+        self.visible = {}  # item index -> [cell, bound item, placed geometry]
+        self.free = []
+        self._stale = False
+        self._pending = None
+
+        canvas.configure(yscrollcommand=self._on_yscroll)
+        canvas.bind("<Configure>", lambda e: self.schedule_refresh(), add="+")
+        frame.bind("<Configure>", lambda e: self.schedule_refresh(), add="+")
+
+    def rows(self):
+        return (len(self.items) + self.num_columns - 1) // self.num_columns
+
+    def total_height(self):
+        return self.rows() * self.row_height
+
+    def cell_count(self):
+        return len(self.visible) + len(self.free)
+
+    def set_items(self, items, num_columns, row_height=None, remeasure=False):
+        self.items = items
+        self.num_columns = max(1, num_columns)
+        if row_height is not None:
+            self.row_height = row_height
+        elif remeasure or not self.row_height:
+            self.row_height = self.measure_row_height()
+        self.frame.configure(height=max(1, self.total_height()))
+        self._stale = True
+        self.refresh()
+
+    def measure_row_height(self):
+        # Bind a sample of items into a spare cell and ask Tk for the
+        # tallest, so a longer item is not clipped to the first one's height
+        if not self.items:
+            return self.row_height
+        cell = self._acquire()
+        height = 0
+        for item in self._measure_sample():
+            self.bind_cell(cell, item)
+            cell.update_idletasks()
+            height = max(height, cell.winfo_reqheight())
+        self._release(cell)
+        return height + 2 * self.pady
+
+    def _measure_sample(self):
+        count = len(self.items)
+        if count <= self.measure_sample:
+            return self.items
+        if self.measure_key is not None:
+            return heapq.nlargest(self.measure_sample, self.items, key=self.measure_key)
+        step = (count - 1) / (self.measure_sample - 1) if self.measure_sample > 1 else count
+        return [self.items[round(i * step)] for i in range(self.measure_sample)]
+
+    def schedule_refresh(self):
+        if self._pending is None:
+            self._pending = self.frame.after_idle(self.refresh)
+
+    def refresh(self):
+        if self._pending is not None:
+            self.frame.after_cancel(self._pending)
+            self._pending = None
+        rebind = self._stale
+        self._stale = False
+
+        wanted = range(0)
+        if self.items and self.row_height:
+            # Viewport in frame coordinates
+            top = self.canvas.winfo_rooty() - self.frame.winfo_rooty()
+            bottom = top + self.canvas.winfo_height()
+            first_row = max(0, top // self.row_height - self.overscan)
+            last_row = min(self.rows() - 1, bottom // self.row_height + self.overscan)
+            wanted = range(first_row * self.num_columns,
+                           min(len(self.items), (last_row + 1) * self.num_columns))
+
+        # Recycle cells that scrolled out of view
+        for index in list(self.visible):
+            if index not in wanted:
+                self._release(self.visible.pop(index)[0])
+
+        col_width = max(1, self.frame.winfo_width() // self.num_columns)
+        for index in wanted:
+            entry = self.visible.get(index)
+            if entry is None:
+                entry = self.visible[index] = [self._acquire(), None, None]
+            item = self.items[index]
+            if rebind or entry[1] is not item:
+                self.bind_cell(entry[0], item)
+                entry[1] = item
+            row, col = divmod(index, self.num_columns)
+            geometry = (col * col_width + self.padx, row * self.row_height + self.pady,
+                        max(1, col_width - 2 * self.padx), max(1, self.row_height - 2 * self.pady))
+            if entry[2] != geometry:
+                x, y, width, height = geometry
+                entry[0].place(x=x, y=y, width=width, height=height)
+                entry[2] = geometry
+
+    def clear(self):
+        for entry in self.visible.values():
+            entry[0].destroy()
+        for cell in self.free:
+            cell.destroy()
+        self.visible = {}
+        self.free = []
+
+    def _acquire(self):
+        if self.free:
+            return self.free.pop()
+        return self.create_cell(self.frame)
+
+    def _release(self, cell):
+        cell.place_forget()
+        self.free.append(cell)
+
+    def _on_yscroll(self, first, last):
+        if self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+        self.schedule_refresh()